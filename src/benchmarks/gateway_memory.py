@@ -0,0 +1,69 @@
+import gc
+import sys
+import tracemalloc
+
+import discord as d
+from discord.state import ConnectionState
+
+from src.gateway_profiles import PROFILES, client_options
+
+
+# Estimates how much memory discord.py's caches take for every gateway profile. A synthetic guild is fed into a
+# ConnectionState exactly as the gateway would deliver it for the profile's intents - members and presences only arrive
+# with the privileged intents - followed by a stream of messages. No connection to discord is needed.
+#   python -m src.benchmarks.gateway_memory [members] [messages]
+
+
+def guild_payload(guild_id: int, members: int, intents: d.Intents) -> dict:
+    payload = {
+        'id': guild_id, 'name': 'Benchmark', 'owner_id': 1, 'member_count': members,
+        'roles': [{'id': guild_id, 'name': '@everyone', 'permissions': '0', 'position': 0}],
+        'channels': [{'id': guild_id + i, 'type': 0, 'name': f'channel-{i}', 'position': i} for i in range(1, 21)],
+        'members': [], 'presences': [],
+    }
+    if intents.members:
+        payload['members'] = [{'user': {'id': 1000 + i, 'username': f'user{i}', 'discriminator': '0001', 'avatar': None},
+                               'roles': [], 'joined_at': '2022-01-01T00:00:00+00:00', 'deaf': False, 'mute': False}
+                              for i in range(members)]
+    if intents.presences:
+        payload['presences'] = [{'user': {'id': 1000 + i}, 'status': 'online', 'client_status': {'desktop': 'online'}, 'activities': []} for i in range(members)]
+    return payload
+
+
+def message_payload(message_id: int, channel_id: int, guild_id: int) -> dict:
+    author = {'id': 1000 + message_id % 50, 'username': 'author', 'discriminator': '0001', 'avatar': None}
+    return {'id': message_id, 'channel_id': channel_id, 'guild_id': guild_id, 'author': author, 'content': '.remindme in 5 minutes "test"',
+            'timestamp': '2022-01-01T00:00:00+00:00', 'edited_timestamp': None, 'tts': False, 'mention_everyone': False,
+            'mentions': [], 'mention_roles': [], 'attachments': [], 'embeds': [], 'pinned': False, 'type': 0}
+
+
+def measure(profile: str, members: int, messages: int) -> int:
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+
+    options = client_options(profile)
+    options.pop('chunk_guilds_at_startup')
+    state = ConnectionState(dispatch=lambda *args, **kwargs: None, handlers={}, hooks={}, http=None, **options)
+    guild_id = 10 ** 6
+    state._add_guild_from_data(guild_payload(guild_id, members, state.intents))
+    for i in range(messages):
+        state.parse_message_create(message_payload(i, guild_id + 1 + i % 20, guild_id))
+
+    gc.collect()
+    used = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    del state
+    return used
+
+
+def main(members=20000, messages=5000):
+    print(f'Synthetic guild with {members} members, followed by {messages} messages')
+    results = {profile: measure(profile, members, messages) for profile in PROFILES}
+    baseline = results['full']
+    for profile, used in results.items():
+        print(f'  {profile:<10} {used / 2 ** 10:>9.0f} KiB  ({used / baseline:>6.1%} of full)')
+
+
+if __name__ == '__main__':
+    main(*map(int, sys.argv[1:3]))
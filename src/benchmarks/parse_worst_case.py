@@ -0,0 +1,87 @@
+import argparse
+import random
+import sys
+import time
+
+from src.exceptions.errors import InvalidArgumentsException
+from src.localization.quote_server import QuoteServer as Quotes
+from src.utils.time_parser import TimeParser, TIME_UNITS, DATE_UNITS
+
+
+# Measures the worst case of TimeParser.parse over adversarial texts for every pattern in quotes.json: long runs of digits in
+# front of (almost) every unit, endless date and time fragments, keyword prefixes, quotes and options, plus random fuzz.
+# Every text is parsed at the length of a full message (4000 characters, which the length budget has to reject cheaply)
+# and right at the budget (which is scanned completely). Fails if any single parse takes longer than the bound.
+#   python -m src.benchmarks.parse_worst_case [--limit-ms 5] [--fuzz 2000] [--seed 0]
+
+MESSAGE_LENGTH = 4000
+
+
+def fill(fragment: str, length: int) -> str:
+    return (fragment * (length // len(fragment) + 1))[:length]
+
+
+def adversarial_texts() -> dict[str, list[str]]:
+    units = [pattern.split('(?=')[1].rstrip(')') for unit in TIME_UNITS + DATE_UNITS for pattern in Quotes.get_choices(f'timestamp/{unit}/patterns')]
+    keywords = [keyword for unit in TIME_UNITS + DATE_UNITS for keyword in Quotes.get_dict(f'timestamp/{unit}/keywords')]
+    keywords += Quotes.get_choices('timestamp/futileKeywords/date') + Quotes.get_choices('timestamp/futileKeywords/time')
+
+    return {
+        # a run of digits that is (almost) followed by a unit
+        'units': [fill('1', 180) + suffix for unit in units for suffix in (unit.replace(' ?', ' ').replace('?', ''), 'x')],
+        'dates': [fill(fragment, 200) for fragment in ('1.1.', '31-12-', '01/0', '3.3.20', '12.12.2')],
+        'times': [fill(fragment, 200) for fragment in ('23:5', '1:', '0:00:', '2:3')],
+        'keywords': [fill(keyword[:-1], 200) for keyword in keywords] + [fill(keyword, 200) for keyword in keywords],
+        'options': [fill(fragment, 200) for fragment in (' -', ' -a', '-' * 10 + ' ', ' -rrule=' + '=' * 20)],
+        'quotes': [fill(fragment, 200) for fragment in ('"', '"a\n', 'a"', '" "\n')],
+        'memo': ['24.12.22 18:00 "' + fill('a', MESSAGE_LENGTH - 20) + '"'],
+    }
+
+
+def fuzz_texts(count: int, seed: int) -> list[str]:
+    rng = random.Random(seed)
+    alphabet = '0123456789 .:-/"\nhdmswtyjaeinorgu'
+    return [''.join(rng.choice(alphabet) for _ in range(rng.randint(1, 200))) for _ in range(count)]
+
+
+# seconds of the fastest of a few parses - the cache of the parser is bypassed, otherwise only the first parse would count
+def parse_time(text: str, repeats: int = 3) -> float:
+    best = float('inf')
+    for _ in range(repeats):
+        start = time.perf_counter()
+        try:
+            TimeParser.parse.__wrapped__(TimeParser, text)
+        except InvalidArgumentsException:
+            pass
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main(limit_ms: float, fuzz: int, seed: int) -> int:
+    TimeParser.parse('')    # builds the scanner
+    families = adversarial_texts()
+    families['fuzz'] = fuzz_texts(fuzz, seed)
+
+    print(f'Worst parse time per family (budget: {TimeParser.max_length} characters outside the memo, bound: {limit_ms} ms)')
+    worst_overall = 0.0
+    for family, texts in families.items():
+        # every text at the budget, and blown up to the length of a full message
+        variants = texts + [fill(text, MESSAGE_LENGTH) for text in texts if len(text) < MESSAGE_LENGTH]
+        worst, worst_text = max((parse_time(text), text) for text in variants)
+        worst_overall = max(worst_overall, worst)
+        print(f'  {family:<10} {len(variants):>5} texts  {worst * 1000:>8.3f} ms  ({len(worst_text)} characters: {worst_text[:24]!r}...)')
+
+    if worst_overall * 1000 > limit_ms:
+        print(f'FAILED: the worst case took {worst_overall * 1000:.3f} ms')
+        return 1
+    print(f'OK: the worst case took {worst_overall * 1000:.3f} ms')
+    return 0
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(prog='python -m src.benchmarks.parse_worst_case', description='Worst-case parse time of reminder texts')
+    parser.add_argument('--limit-ms', type=float, default=5.0, help='upper bound for a single parse (default: 5 ms)')
+    parser.add_argument('--fuzz', type=int, default=2000, help='number of random texts (default: 2000)')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+    sys.exit(main(args.limit_ms, args.fuzz, args.seed))
@@ -0,0 +1,225 @@
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import sys
+import time
+import uuid
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Iterator
+
+from src.wrapper.database_wrapper import DatabaseWrapper, DBUser, Reminder
+
+
+# Times the reminder queries of a DatabaseWrapper against a large, seeded reminder relation, so that changes of the schema
+# (indexes, partitioning) or of the queries can be judged on numbers. Seeds a configurable number of reminders - expired
+# history and upcoming ones - spread over guilds, channels and users, then runs every query a few times and reports the
+# fastest, median and slowest run. On Postgres, --explain adds the EXPLAIN ANALYZE plan of every query to the report.
+#   python -m src.benchmarks.reminder_workload [--database-url memory://] [--reminders 100000] [--distribution uniform]
+#                                              [--guilds 50] [--channels 10] [--users 1000] [--output report.json] [--compare old.json]
+# Use a scratch database: the seeded reminders are removed again afterwards (unless --keep), but the clean-up query that
+# is measured removes expired reminders just like the reaper would.
+
+TIME_ZONES = ['Europe/Berlin', 'Europe/Vienna', 'Europe/London', 'America/New_York', 'Asia/Tokyo', None]
+SEED_BATCH = 10000
+DM_CHANNELS = 10 ** 15          # dm channels of the seeded users get ids from here on, guild channels below
+
+
+@dataclass()
+class Workload:
+    reminders: int
+    distribution: str       # how the upcoming due dates are spread: 'uniform', 'near' or 'hourly'
+    history: float          # share of the reminders that are expired already
+    guilds: int
+    channels: int           # per guild
+    users: int
+    dm_share: float         # share of the reminders that are sent as direct messages
+    seed: int
+
+
+    def guild_channels(self, guild: int) -> list[int]:
+        return [guild * self.channels + channel + 1 for channel in range(self.channels)]
+
+
+    def due_date(self, rng: random.Random, now: datetime) -> datetime:
+        if rng.random() < self.history:
+            # expired within the last 90 days
+            return now - timedelta(seconds=rng.uniform(0, 90 * 86400))
+        match self.distribution:
+            case 'near':
+                # most reminders are due within a few days, few of them months ahead
+                seconds = min(rng.expovariate(1 / (3 * 86400)), 365 * 86400)
+            case 'hourly':
+                # lots of reminders at the very same full hours (e.g. '18:00') - many ties for the next due date
+                seconds = (now.replace(minute=0, second=0, microsecond=0) + timedelta(hours=rng.randint(1, 30 * 24)) - now).total_seconds()
+            case _:
+                seconds = rng.uniform(0, 365 * 86400)
+        return now + timedelta(seconds=max(seconds, 1.0))
+
+
+    def generate(self, rng: random.Random, now: datetime) -> Iterator[list[Reminder]]:
+        batch = []
+        for _ in range(self.reminders):
+            user_id = rng.randint(1, self.users)
+            if rng.random() < self.dm_share:
+                channel_id = DM_CHANNELS + user_id
+            else:
+                channel_id = rng.choice(self.guild_channels(rng.randrange(self.guilds)))
+            recurrence = 'FREQ=WEEKLY' if rng.random() < 0.05 else None
+            batch.append(Reminder(uuid.UUID(int=rng.getrandbits(128), version=4), user_id, channel_id, self.due_date(rng, now), 'benchmark', recurrence))
+            if len(batch) >= SEED_BATCH:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+
+# records the statements a PostgresWrapper sends, so that they can be explained afterwards
+class QueryRecorder:
+
+    def __init__(self, db: DatabaseWrapper):
+        self.db = db
+        self.queries: list[tuple[str, tuple]] = []
+        # the single choke point every query of the wrapper goes through
+        self.query = db._PostgresWrapper__query
+
+        async def recording_query(method: str, query: str, *args, idempotent: bool):
+            # only these can be explained, not e.g. the maintenance of partitions
+            if query.split(None, 1)[0].upper() in ('SELECT', 'WITH', 'INSERT', 'UPDATE', 'DELETE'):
+                self.queries.append((query, args))
+            return await self.query(method, query, *args, idempotent=idempotent)
+        db._PostgresWrapper__query = recording_query
+
+
+    # EXPLAIN ANALYZE runs the statement for real, so it happens in a transaction that is rolled back again
+    async def explain(self, query: str, args: tuple) -> str:
+        connection = await self.db.database_connection.acquire()
+        try:
+            transaction = connection.transaction()
+            await transaction.start()
+            try:
+                rows = await connection.fetch(f'EXPLAIN (ANALYZE, BUFFERS) {query}', *args)
+            finally:
+                await transaction.rollback()
+        finally:
+            await self.db.database_connection.release(connection)
+        return '\n'.join(row[0] for row in rows)
+
+
+async def seed(db: DatabaseWrapper, workload: Workload, now: datetime) -> tuple[list[uuid.UUID], float]:
+    rng = random.Random(workload.seed)
+    await db.import_users([DBUser(user_id, f'user{user_id}', '0000', rng.choice(TIME_ZONES)) for user_id in range(1, workload.users + 1)])
+    ids = []
+    start = time.perf_counter()
+    for batch in workload.generate(rng, now):
+        await db.import_reminders(batch)
+        ids += [rem.rem_id for rem in batch]
+    return ids, time.perf_counter() - start
+
+
+# the measured queries: name -> coroutine function, as the bot calls them
+def queries(db: DatabaseWrapper, workload: Workload) -> dict:
+    busiest_guild = [str(channel) for channel in workload.guild_channels(0)]
+    some_user = DBUser(1, 'user1', '0000', None)
+    return {
+        'check_next_reminder': lambda: db.check_next_reminder(),
+        'fetch_next_reminder': lambda: db.fetch_next_reminder(),
+        'fetch_reminders(channels)': lambda: db.fetch_reminders(channels=busiest_guild),
+        'fetch_reminders(user)': lambda: db.fetch_reminders(user=some_user),
+        'fetch_upcoming_reminders': lambda: db.fetch_upcoming_reminders(300),
+        'fetch_missed_reminders': lambda: db.fetch_missed_reminders(6 * 3600),
+        # removes a batch of the expired history with every run - measured last, so the other queries see all of it
+        'clean_up_reminders': lambda: db.clean_up_reminders(500),
+    }
+
+
+async def measure(db: DatabaseWrapper, workload: Workload, repeats: int, explain: bool) -> dict:
+    recorder = QueryRecorder(db) if explain else None
+    results = {}
+    for name, run in queries(db, workload).items():
+        times = []
+        for _ in range(repeats):
+            if recorder:
+                recorder.queries.clear()
+            start = time.perf_counter()
+            await run()
+            times.append(time.perf_counter() - start)
+
+        result = {'min_ms': min(times) * 1000, 'median_ms': statistics.median(times) * 1000, 'max_ms': max(times) * 1000}
+        if recorder:
+            result['plans'] = [await recorder.explain(query, args) for query, args in recorder.queries]
+        results[name] = result
+    return results
+
+
+async def clean_up(db: DatabaseWrapper, ids: list[uuid.UUID]) -> None:
+    for start in range(0, len(ids), SEED_BATCH):
+        await db.delete_reminders([Reminder(rem_id) for rem_id in ids[start:start + SEED_BATCH]])
+
+
+def print_report(report: dict, baseline: dict | None) -> None:
+    workload = report['workload']
+    print(f"{report['backend']}: {workload['reminders']} reminders ({workload['distribution']}, {workload['history']:.0%} expired), "
+          f"{workload['guilds']} guilds x {workload['channels']} channels, {workload['users']} users - "
+          f"seeded in {report['seed_seconds']:.1f} s")
+    print(f"  {'query':<28}{'min':>10}{'median':>10}{'max':>10}" + (f"{'baseline':>12}{'change':>9}" if baseline else ''))
+    for name, result in report['results'].items():
+        line = f"  {name:<28}{result['min_ms']:>8.2f}ms{result['median_ms']:>8.2f}ms{result['max_ms']:>8.2f}ms"
+        if baseline and name in baseline['results']:
+            before = baseline['results'][name]['median_ms']
+            line += f"{before:>10.2f}ms{(result['median_ms'] / before - 1) if before else 0:>+9.0%}"
+        print(line)
+
+    for name, result in report['results'].items():
+        for plan in result.get('plans', []):
+            print(f'\n{name}:\n{plan}')
+
+
+async def main(args: argparse.Namespace) -> int:
+    workload = Workload(args.reminders, args.distribution, args.history, args.guilds, args.channels, args.users, args.dm_share, args.seed)
+    db = await DatabaseWrapper.connect(args.database_url)
+    try:
+        await db.migrate()
+        now = datetime.now(timezone.utc)
+        ids, seed_seconds = await seed(db, workload, now)
+        try:
+            results = await measure(db, workload, args.repeats, args.explain and type(db).__name__ == 'PostgresWrapper')
+        finally:
+            if not args.keep:
+                await clean_up(db, ids)
+    finally:
+        await db.close()
+
+    report = {'backend': type(db).__name__, 'workload': vars(workload), 'repeats': args.repeats, 'seed_seconds': seed_seconds, 'results': results}
+    baseline = None
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as file:
+            baseline = json.load(file)
+    print_report(report, baseline)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as file:
+            json.dump(report, file, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(prog='python -m src.benchmarks.reminder_workload', description='Reminder query times on a large seeded database')
+    parser.add_argument('--database-url', default='memory://', help='postgres://, sqlite:/// or memory:// url of a scratch database (default: memory://)')
+    parser.add_argument('--reminders', type=int, default=100000, help='number of seeded reminders, e.g. 10000 to 1000000 (default: 100000)')
+    parser.add_argument('--distribution', choices=['uniform', 'near', 'hourly'], default='uniform',
+                        help='due dates of the upcoming reminders: spread over a year, mostly within days, or piled up on full hours')
+    parser.add_argument('--history', type=float, default=0.5, help='share of already expired reminders (default: 0.5)')
+    parser.add_argument('--guilds', type=int, default=50)
+    parser.add_argument('--channels', type=int, default=10, help='channels per guild (default: 10)')
+    parser.add_argument('--users', type=int, default=1000)
+    parser.add_argument('--dm-share', type=float, default=0.2, help='share of reminders sent as direct messages (default: 0.2)')
+    parser.add_argument('--repeats', type=int, default=5, help='runs of every query (default: 5)')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--explain', action='store_true', help='add the EXPLAIN ANALYZE plans of every query (Postgres only)')
+    parser.add_argument('--output', help='write the report to this json file')
+    parser.add_argument('--compare', help='json report of an earlier run to compare the median times with')
+    parser.add_argument('--keep', action='store_true', help="don't remove the seeded reminders afterwards")
+    sys.exit(asyncio.run(main(parser.parse_args())))
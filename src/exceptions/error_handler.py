@@ -1,4 +1,5 @@
 import traceback as tb
+import asyncio
 import os
 
 from logging import Logger
@@ -16,8 +17,8 @@ class ErrorHandler:
 
 
     async def handle(self, exp: Exception, user_msg: MsgContainer = None):
-        # log error message and stacktrace
-        traceback = list(tb.extract_tb(exp.__traceback__, limit=4))
+        # log error message and stacktrace (extracting it reads the source files, which must not block the event loop)
+        traceback = await asyncio.to_thread(lambda: list(tb.extract_tb(exp.__traceback__, limit=4)))
         # summary: '↪ func_name, line ### -------> method call in traceback record'
         summary = "".join(["\t{ind}↪ {0.name}, line {num:-<{width}}> {0.line}\n"   # string template
                           .format(trace, ind='  '*i, num=str(trace.lineno) + ' ', width=30-len(trace.name)-2*i)  # string format
@@ -63,12 +64,22 @@ class ErrorHandler:
             case QuoteServerException(cause=Cause.NOT_A_LIST):
                 feedback = Quotes.get_quote('exceptions/quoteServer/notADict').format(exp)
 
+            case AuthorizationException(cause=Cause.OWNER_ONLY) as exp:
+                feedback = Quotes.get_quote('exceptions/ownerOnly').format(exp)
             case AuthorizationException() as exp:
                 feedback = Quotes.get_quote('exceptions/authorization').format(exp)
 
+            case CapacityException(cause=Cause.GUILD_JOB_LIMIT) as exp:
+                feedback = Quotes.get_quote('exceptions/capacity/guild').format(exp)
+            case CapacityException(cause=Cause.GLOBAL_JOB_LIMIT) as exp:
+                feedback = Quotes.get_quote('exceptions/capacity/global').format(exp)
+
             case ReminderNotFoundException(cause=Cause.EMPTY_DB):
                 feedback = Quotes.get_quote('exceptions/reminderNotFound').format(exp)
 
+            case FruitlessChoosingException(cause=Cause.NO_WRITTEN_ANSWERS):
+                feedback = Quotes.get_quote('exceptions/fruitlessChoosing/noWrittenAnswers').format(exp)
+
             case IndexOutOfBoundsException() as exp:
                 feedback = Quotes.get_quote('exceptions/indexOutOfBounds').format(exp, index=exp.index + 1)
 
@@ -89,5 +100,18 @@ class ErrorHandler:
                 feedback = Quotes.get_quote('exceptions/invalidArguments/incorrectTime/remSet').format(exp)
             case InvalidArgumentsException(cause=Cause.TIMESTAMP_IN_THE_PAST, goal=Goal.REMINDER_SET):
                 feedback = Quotes.get_quote('exceptions/invalidArguments/timestampInThePast/remSet').format(exp)
+            case InvalidArgumentsException(cause=Cause.INVALID_RECURRENCE, goal=Goal.REMINDER_SET):
+                feedback = Quotes.get_quote('exceptions/invalidArguments/invalidRecurrence/remSet').format(exp)
+            case InvalidArgumentsException(cause=Cause.INPUT_TOO_LONG, goal=Goal.REMINDER_SET):
+                feedback = Quotes.get_quote('exceptions/invalidArguments/inputTooLong/remSet').format(exp)
+            case InvalidArgumentsException(cause=Cause.INSUFFICIENT_ARGUMENTS, goal=Goal.REMINDER_SET):
+                feedback = Quotes.get_quote('exceptions/invalidArguments/insufficientArguments/remSet').format(exp)
+            case InvalidArgumentsException(cause=Cause.TOO_MANY_ENTRIES, goal=Goal.REMINDER_SET):
+                feedback = Quotes.get_quote('exceptions/invalidArguments/tooManyEntries/remSet').format(exp)
+
+            # the reason of every invalid entry, one per line
+            case BulkReminderException():
+                feedback = Quotes.get_quote('exceptions/bulkReminder').format(exp, count=len(exp.failures))
+                feedback += ''.join(f'\n**{number}.** {self.__react(failure)}' for number, failure in exp.failures[:10])
 
         return feedback
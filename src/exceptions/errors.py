@@ -15,7 +15,15 @@ class Cause(Enum):
     INVALID_JSON_PATH = 10
     NOT_A_LIST = 11
     NOT_A_DICT = 12
+    INVALID_RECURRENCE = 13
+    OWNER_ONLY = 14
+    GUILD_JOB_LIMIT = 15
+    GLOBAL_JOB_LIMIT = 16
+    INPUT_TOO_LONG = 17
+    INVALID_ENTRIES = 18
+    TOO_MANY_ENTRIES = 19
     INSUFFICIENT_ARGUMENTS = 20
+    NO_WRITTEN_ANSWERS = 21
 
 
 class Goal(Enum):
@@ -82,6 +90,20 @@ class IndexOutOfBoundsException(BotBaseException):
         self.object = collection
 
 
+class CapacityException(BotBaseException):
+
+    def __init__(self, err_message: str, cause: Cause, *args, limit: int, **kwargs):
+        super().__init__(err_message, args, kwargs, cause=cause)
+        self.limit = limit
+
+
+class BulkReminderException(BotBaseException):
+
+    def __init__(self, err_message: str, cause: Cause, *args, failures: list[tuple[int, Exception]], **kwargs):
+        super().__init__(err_message, args, kwargs, cause=cause, goal=Goal.REMINDER_SET)
+        self.failures = failures    # (number of the entry, reason) for every reminder that couldn't be set
+
+
 class QuoteServerException(BotBaseException):
 
     def __init__(self, err_message: str, cause: Cause, *args, quote_path: str, error_node: str = None, **kwargs):
@@ -0,0 +1,29 @@
+import discord as d
+
+
+PROFILES = ['minimal', 'slash', 'full']
+
+
+# The gateway profile decides which events the bot receives from discord and how much of that data discord.py keeps in memory.
+# 'minimal' is all the bot needs for its prefix commands: guilds, their text channels and messages (including their content).
+# Users that aren't cached are fetched on demand instead (see RecipientResolver).
+# 'slash' receives no messages at all, so only the slash commands are left (see SlashCommands) - without the privileged message
+# content intent, and without the bot having to look at every single message of every guild.
+# 'full' is the former behaviour: every intent, every member (and presence) of every guild and a cache of the last 1000 messages.
+def client_options(profile: str) -> dict:
+    match profile:
+        case 'minimal':
+            intents = d.Intents.none()
+            intents.guilds = True
+            intents.guild_messages = True
+            intents.dm_messages = True
+            intents.message_content = True
+            return {'intents': intents, 'member_cache_flags': d.MemberCacheFlags.none(), 'chunk_guilds_at_startup': False, 'max_messages': None}
+        case 'slash':
+            intents = d.Intents.none()
+            intents.guilds = True
+            return {'intents': intents, 'member_cache_flags': d.MemberCacheFlags.none(), 'chunk_guilds_at_startup': False, 'max_messages': None}
+        case 'full':
+            return {'intents': d.Intents.all(), 'member_cache_flags': d.MemberCacheFlags.all(), 'chunk_guilds_at_startup': True, 'max_messages': 1000}
+
+    raise ValueError(f"Unknown gateway profile '{profile}' - choose one of {PROFILES}")
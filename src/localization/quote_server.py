@@ -1,7 +1,9 @@
 import json
+import os
 import random
 
 from src.exceptions.errors import *
+from src.tracing import tracer
 
 # In the future, maybe make this a sort of generic class that works on a given .json
 # document. The class shall only work on one file at a time but the user has to
@@ -13,11 +15,15 @@ from src.exceptions.errors import *
 
 
 class QuoteServer:
-    filename: str = 'src/localization/quotes.json'
+    filename: str = os.path.join(os.path.dirname(__file__), 'quotes.json')
+    quotes: dict = None     # loaded from the json file on first access
+
 
     # load all the data from the json file
-    with open(filename, encoding='utf-8') as json_file:
-        quotes = json.load(json_file)
+    @classmethod
+    def load(cls) -> None:
+        with open(cls.filename, encoding='utf-8') as json_file:
+            cls.quotes = json.load(json_file)
 
 
     @classmethod
@@ -57,15 +63,19 @@ class QuoteServer:
 
     @classmethod
     def __query_json(cls, quote_path: str) -> dict | list[str]:
-        path_nodes: list[str] = quote_path.split('/')
-        current_node = cls.quotes
-
-        for node in path_nodes:
-            # get the next node, which will either be a dict (json object) or a list (json array)
-            current_node = current_node.get(node)
-
-            # if results is none, then the given key didn't exist in the dictionary
-            if current_node is None:
-                raise QuoteServerException(f'Invalid JSON path! Node "{node}" does not exist in {cls.filename}',
-                                           Cause.INVALID_JSON_PATH, quote_path=quote_path, error_node=node)
-        return current_node
+        with tracer.span('quotes', path=quote_path):
+            if cls.quotes is None:
+                cls.load()
+
+            path_nodes: list[str] = quote_path.split('/')
+            current_node = cls.quotes
+
+            for node in path_nodes:
+                # get the next node, which will either be a dict (json object) or a list (json array)
+                current_node = current_node.get(node)
+
+                # if results is none, then the given key didn't exist in the dictionary
+                if current_node is None:
+                    raise QuoteServerException(f'Invalid JSON path! Node "{node}" does not exist in {cls.filename}',
+                                               Cause.INVALID_JSON_PATH, quote_path=quote_path, error_node=node)
+            return current_node
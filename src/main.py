@@ -1,41 +1,77 @@
+import sys
+from profiler import StartupProfiler
+
+# the profiler has to be set up before all the other imports, so that their import times can be measured as well
+profiler = StartupProfiler.from_args(sys.argv)
+
 import asyncio
+import contextvars
 import datetime
 import traceback
-import asyncpg
+import io
+import math
+import signal
 import random
 import discord as d
 import logging
 import os
 import pytz
 
+from types import SimpleNamespace
 from typing import List, Tuple
 from logger import CustomFormatter
-from fuzzywuzzy import fuzz, process
+from gateway_profiles import client_options
 from wrapper.msg_container import MsgContainer
 from wrapper.database_wrapper import DatabaseWrapper, Reminder
 from localization.quote_server import QuoteServer as Quotes
 from utils import *
 from exceptions import *
+# imported through the package, so that main shares the one tracer with the database wrappers and the quote server
+from src.tracing import tracer
 
 
 async def __startup():
 
     # setup connection to heroku postgres database
-    database_connection = await asyncpg.create_pool(os.environ.get("DATABASE_URL", None), max_size=5, min_size=3)
-    database = DatabaseWrapper(database_connection)
+    with profiler.phase('database pool'):
+        database = await DatabaseWrapper.connect(os.environ.get("DATABASE_URL", None))
+        await database.migrate()
+
+    # record a sample of the handled messages and reminder deliveries as traces
+    tracer.configure(float(os.environ.get("TRACE_SAMPLE_RATE", 0.0)), os.environ.get("TRACE_OUTPUT", 'traces.jsonl'))
 
-    # give the bot all rights and privileges
-    intents = d.Intents.all()
+    # only subscribe to the gateway events (and cache the data) the bot actually needs, unless configured otherwise
+    gateway_options = client_options(os.environ.get("GATEWAY_PROFILE", 'minimal'))
     # instantiate a discord bot of custom class MyBot
-    bot = MyBot(name="Shuvi", db=database, prefix='.', intents=intents)
+    bot = MyBot(name="Shuvi", db=database, prefix='.', **gateway_options)
+    # remember which conversations were interrupted by the last shutdown
+    with profiler.phase('conversation store'):
+        await bot.conversation_store.load()
+    # trace memory allocations right from the start, e.g. to find a leak that only shows up in production
+    if frames := int(os.environ.get("DIAG_TRACEMALLOC", 0)):
+        bot.diagnostics.start(frames)
 
     try:
         # run bot via its private API token
-        main_task = asyncio.create_task(bot.start(os.environ['DISCORD_TOKEN']), name='main_task')
-        asyncio.create_task(bot.watch_reminders(), name='reminder_watchdog')
+        with profiler.phase('login'):
+            await bot.login(os.environ['DISCORD_TOKEN'])
+        main_task = asyncio.create_task(bot.connect(), name='main_task')
+        # a restart of the dyno (SIGTERM) drains the bot instead of killing it in the middle of whatever it is doing
+        try:
+            asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, bot.shut_down, float(os.environ.get("SHUTDOWN_GRACE", 20.0)))
+        except NotImplementedError:
+            pass    # there are no signal handlers for the event loop on windows
+        asyncio.create_task(bot.reap_reminders(), name='reminder_reaper')
+        asyncio.create_task(bot.monitor_database(), name='database_monitor')
+        asyncio.create_task(bot.report_diagnostics(), name='diagnostics_reporter')
+        asyncio.create_task(bot.loop_monitor.run(), name='loop_monitor')
         await main_task
+        # the gateway is closed already, but the shutdown might not be done yet
+        if bot.drain_task:
+            await bot.drain_task
     finally:
-        await database_connection.close()
+        await tracer.close()
+        await database.close()
 
 
 def __init_logs():
@@ -50,18 +86,56 @@ def __init_logs():
 
 class MyBot(d.Client):
 
-    def __init__(self, name="Bot", db=None, prefix='.', intents=None):
-        super().__init__(intents=intents)  # superclass discord.Client needs to be properly initialized as well
+    def __init__(self, name="Bot", db=None, prefix='.', **options):
+        super().__init__(**options)  # superclass discord.Client needs to be properly initialized as well
         self.name = name
         self.db = db
         self.prefix = prefix
         self.error_handler = None
+        self.conversations = ConversationRouter()    # routes answers to the conversations (e.g. confirmations) waiting for them
+        self.conversation_store = ConversationStore(db)  # persists those conversations, so they survive a restart
+        self.reminder_views = ReminderViewCache()       # upcoming reminders (and their embeds) per guild or dm user
+        self.recipients = RecipientResolver(self)       # users and dm channels that aren't in discord.py's cache (without member intents)
+        self.diagnostics = Diagnostics(self, directory=os.environ.get("DIAG_DIR", 'diagnostics'))
+        self.jobs = TaskSupervisor(max_per_guild=int(os.environ.get("JOBS_PER_GUILD", 2)), max_total=int(os.environ.get("JOBS_TOTAL", 10)))
+        self.rate_limiter = RateLimiter(enabled=os.environ.get("RATE_LIMITING", 'TRUE') == 'TRUE')
+        self.loop_monitor = LoopMonitor(logging.getLogger('discord'), threshold=float(os.environ.get("LOOP_LAG_THRESHOLD", 0.25)))
+        self.timezones = TimezoneIndex(pytz.common_timezones, default=Quotes.get_dict('timezone')['default'])
+        # slash commands next to the prefix commands, optionally registered for a single (test) guild only
+        slash_guild = int(os.environ.get("SLASH_COMMANDS_GUILD", 0)) or None
+        self.slash_commands = SlashCommands(self, self.timezones, slash_guild) if os.environ.get("SLASH_COMMANDS", 'TRUE') == 'TRUE' else None
+        self.warm_up_task = None
+        self.watched_due_date = None    # due date of the reminder the watchdog is currently waiting for
+        self.prefetch_task: asyncio.Task | None = None      # resolves the recipients of upcoming reminders
+        self.reminders_in_delivery: set = set()     # ids of the reminders that are being sent (and deleted) right now
+        self.drain_task = None      # set as soon as the bot shuts down, from then on no new commands are accepted
+
+
+    # executes after the login, before the gateway connection is established
+    async def setup_hook(self):
+        if not self.slash_commands:
+            return
+        try:
+            if await self.slash_commands.sync():
+                logger.info('Registered the slash commands with discord')
+            else:
+                logger.info('Slash commands are unchanged since their last registration')
+        except d.HTTPException as exp:
+            # the prefix commands work either way
+            logger.warning(f'Failed to register the slash commands: {exp}')
 
 
     # executes when bot setup is finished
     async def on_ready(self):
         logger.info('Logged on as {0}!'.format(self.user))
 
+        if profiler.enabled and self.warm_up_task is None:
+            profiler.mark('ready')
+            logger.info(profiler.report())
+        # load everything that was left out to speed up the startup, without blocking the event loop
+        if self.warm_up_task is None:
+            self.warm_up_task = asyncio.create_task(asyncio.to_thread(self.__warm_up), name='warm_up')
+
         # setup ErrorHandler to process errors during runtime
         debug_channel = self.get_channel(int(os.environ.get("DEBUG_CHANNEL", None)))
         self.error_handler = ErrorHandler(self.name, logger, debug_channel)
@@ -72,29 +146,95 @@ class MyBot(d.Client):
                 chat = self.get_channel(int(os.environ.get("TEST_CHANNEL", None)))
                 await chat.send(Quotes.get_quote('startup').format(self))
 
-            # remove long expired reminders from database
-            await self.db.clean_up_reminders()
-
         except Exception as exp:
             # forward any exception to the ErrorHandler
             await self.error_handler.handle(exp)
 
+        # (re)start the reminder watchdog on every (re)connect, so that it catches up on everything that was missed in the meantime
+        self.restart_watchdog()
+
+
+    # starts to shut the bot down (see drain) - only the first call counts
+    def shut_down(self, grace: float):
+        if self.drain_task is None:
+            self.drain_task = asyncio.create_task(self.drain(grace), name='drain')
+
+
+    # shuts the bot down without losing anything: no new commands are accepted, while running commands, jobs and reminder deliveries
+    # get the grace period to finish. Conversations which are still waiting for an answer after that are cancelled, but their
+    # state stays persisted, so they are resumed after the restart. The gateway is closed last, __startup closes the pool afterwards.
+    async def drain(self, grace: float):
+        logger.info(f'Shutting down: no new commands are accepted, running ones have {grace} seconds to finish')
+
+        # the background tasks don't hold anything that would be lost - the watchdog catches up on missed reminders after the restart
+        for task in asyncio.all_tasks():
+            if task.get_name() in ('reminder_watchdog', 'reminder_reaper', 'database_monitor', 'diagnostics_reporter', 'loop_monitor',
+                                   'recipient_prefetch'):
+                task.cancel()
+
+        # command handlers (of prefix and slash commands), supervised jobs and reminder deliveries that are still running
+        running = {task for task in asyncio.all_tasks()
+                   if task.get_name() in ('discord.py: on_message', 'CommandTree-invoker', 'reminder_delivery') or task.get_name().startswith('job_')}
+        if running:
+            _, running = await asyncio.wait(running, timeout=grace)
+        if running:
+            logger.warning(f'Shutting down: cancelling {len(running)} tasks that are still running: {[task.get_name() for task in running]}')
+            for task in running:
+                task.cancel()
+            await asyncio.gather(*running, return_exceptions=True)
+
+        try:
+            due_date, _ = await self.db.check_next_reminder()
+            logger.info(f'Shutting down: next reminder is due {due_date}, closing the gateway')
+        finally:
+            await self.close()
+
+
+    # stops the current watchdog task (which is most likely sleeping) and creates a new one that starts by scanning again for the next due date
+    def restart_watchdog(self):
+        if self.drain_task:
+            return
+        for task in asyncio.all_tasks():
+            if task.get_name() == 'reminder_watchdog':
+                task.cancel()
+        self.watched_due_date = None
+        # in a context of its own, otherwise everything the watchdog ever does would end up in the trace of the command that restarted it
+        # (create_task copies the context it is called in - its context argument only exists since Python 3.11)
+        contextvars.Context().run(asyncio.create_task, self.watch_reminders(), name='reminder_watchdog')
+
+
+    # new reminders only concern the watchdog if the earliest of them is due before the reminder it is waiting for already
+    def notify_watchdog(self, due_date: datetime.datetime):
+        if self.watched_due_date is None or due_date < self.watched_due_date:
+            self.restart_watchdog()
+
 
     async def watch_reminders(self):
         # wait until the bot is ready
         await self.wait_until_ready()
+        prefetch_window = float(os.environ.get("RECIPIENT_PREFETCH_WINDOW", 300))   # seconds ahead of their due date
 
         try:
+            # first of all, deliver every reminder that was missed while the bot was offline or the watchdog stalled
+            await self.__catch_up_reminders()
+
             while True:
                 # check the time remaining until the next reminder is due
                 due_date, time_remaining = await self.db.check_next_reminder()
 
                 if not due_date or not time_remaining:
                     logger.info(f'Currently no reminders in the DB. ReminderWatchdog is placed on hold until further notice')
+                    self.watched_due_date = None
                     break   # escape while loop
+                self.watched_due_date = due_date
+
+                # resolve the channels of every reminder that is due soon ahead of time, so that sending them is all that's left to do
+                if time_remaining <= prefetch_window and (self.prefetch_task is None or self.prefetch_task.done()):
+                    upcoming = await self.db.fetch_upcoming_reminders(prefetch_window)
+                    self.prefetch_task = asyncio.create_task(self.recipients.prefetch(upcoming), name='recipient_prefetch')
 
                 # localize the due date to CET
-                due_date = due_date.astimezone(pytz.timezone('Europe/Berlin'))
+                due_date = TimeService.to_local(due_date, 'Europe/Berlin')
 
                 logger.info(f'Next reminder is due at: {due_date}')
                 logger.info(f'Time left: {time_remaining} seconds')
@@ -120,26 +260,213 @@ class MyBot(d.Client):
 
                     # wait for countdown to finish, then post reminder memo into the specified channel
                     await countdown
-                    await chat.send(Quotes.get_quote('reminder/due').format(self, reminder=reminder))
-
-                    # delete reminder in database afterwards
-                    await self.db.delete_reminder(reminder)
+                    # shielded, so that neither a watchdog restart nor a shutdown can cancel the delivery between sending and deleting
+                    # the reminder - the task is named, so that a shutdown can wait for it
+                    await asyncio.shield(self.__start_delivery([reminder], self.__deliver_reminder(chat, reminder)))
 
         except Exception as exp:
+            # the watchdog is gone, so the next new reminder has to start a new one
+            self.watched_due_date = None
             # forward any exception to the ErrorHandler
             await self.error_handler.handle(exp)
 
 
+    # drops the cached reminder lists which contain the given reminder
+    def __invalidate_reminder_views(self, reminder: Reminder):
+        channel = self.get_channel(reminder.channel_id)
+        guild: d.Guild | None = getattr(channel, 'guild', None)
+        self.reminder_views.invalidate(guild_id=guild.id if guild else None, user_id=reminder.user_id)
+
+
+    # runs the delivery of the given reminders in a task of its own. Until it is done (including the deletion of the reminders),
+    # the reminders count as in delivery, so that a restarted watchdog doesn't catch up on them while the old delivery is still running
+    def __start_delivery(self, reminders: List[Reminder], delivery) -> asyncio.Task:
+        reminder_ids = {reminder.rem_id for reminder in reminders}
+        self.reminders_in_delivery |= reminder_ids
+        task = asyncio.create_task(delivery, name='reminder_delivery')
+        task.add_done_callback(lambda _: self.reminders_in_delivery.difference_update(reminder_ids))
+        return task
+
+
+    async def __deliver_reminder(self, chat: d.abc.Messageable | None, reminder: Reminder):
+        with tracer.trace('reminder_delivery', reminder=str(reminder.rem_id), channel=reminder.channel_id):
+            # the recipient's account might not exist anymore, but the reminder is done either way
+            if chat:
+                with tracer.span('send', channel=chat.id):
+                    await chat.send(Quotes.get_quote('reminder/due').format(self, reminder=reminder))
+            # delete reminder in database afterwards (or move it on to its next occurrence)
+            await self.__finish_reminder(reminder)
+
+
+    # deletes a reminder that has been delivered, unless it is a recurring one - those are moved on to their next occurrence instead
+    async def __finish_reminder(self, reminder: Reminder):
+        self.__invalidate_reminder_views(reminder)
+        if reminder.recurrence:
+            now = datetime.datetime.now(datetime.timezone.utc)
+            next_due_date = TimeHandler.next_occurrence(reminder.recurrence, reminder.due_date, reminder.time_zone, after=now)
+            if next_due_date:
+                return await self.db.advance_reminder(reminder, next_due_date)
+        await self.db.delete_reminder(reminder)
+
+
+    # sends every reminder that is overdue by no more than the grace period, tagged as late, in rate-limited batches
+    async def __catch_up_reminders(self):
+        grace_period = float(os.environ.get("REMINDER_GRACE_PERIOD", 6 * 3600))   # seconds a reminder may be overdue
+        batch_size = int(os.environ.get("CATCH_UP_BATCH_SIZE", 10))               # reminders sent in one go
+        pause = float(os.environ.get("CATCH_UP_PAUSE", 2.0))                      # seconds to wait between two batches
+
+        # recurring reminders that were missed for too long aren't sent anymore, but their series mustn't end because of that
+        stale_reminders = [reminder for reminder in await self.db.fetch_stale_reminders(grace_period)
+                           if reminder.rem_id not in self.reminders_in_delivery]
+        for reminder in stale_reminders:
+            await self.__finish_reminder(reminder)
+        if stale_reminders:
+            logger.info(f'Moved {len(stale_reminders)} recurring reminders which were missed for too long on to their next occurrence')
+
+        missed_reminders: List[Reminder] = [reminder for reminder in await self.db.fetch_missed_reminders(grace_period)
+                                            if reminder.rem_id not in self.reminders_in_delivery]
+        if not missed_reminders:
+            return
+        logger.info(f'Catching up on {len(missed_reminders)} missed reminders')
+
+        for start in range(0, len(missed_reminders), batch_size):
+            batch = missed_reminders[start:start + batch_size]
+            # a batch is delivered as a whole (see watch_reminders) - and skipped by any other watchdog until it's done, so that
+            # no reminder is ever sent twice
+            await asyncio.shield(self.__start_delivery(batch, self.__catch_up_batch(batch)))
+            if start + batch_size < len(missed_reminders):
+                await asyncio.sleep(pause)
+
+
+    async def __catch_up_batch(self, batch: List[Reminder]):
+        with tracer.trace('reminder_catch_up', reminders=len(batch)):
+            await self.recipients.prefetch(batch)
+            for reminder in batch:
+                try:
+                    chat = await self.__get_channel_by_id(reminder.channel_id, reminder.user_id)
+                    epoch = round(reminder.due_date.timestamp())
+                    if chat:
+                        with tracer.span('send', channel=chat.id):
+                            await chat.send(Quotes.get_quote('reminder/late').format(self, reminder=reminder, epoch=epoch))
+                except Exception as exp:
+                    # one undeliverable reminder (e.g. deleted channel) must not hold up the others
+                    await self.error_handler.handle(exp)
+
+            # every reminder of this batch has had its chance, so none of them should be sent again
+            await self.db.delete_reminders([reminder for reminder in batch if not reminder.recurrence])
+            for reminder in batch:
+                if reminder.recurrence:
+                    await self.__finish_reminder(reminder)
+                else:
+                    self.__invalidate_reminder_views(reminder)
+
+
+    # imports and prepares the heavy subsystems which are otherwise only loaded on first use
+    @staticmethod
+    def __warm_up():
+        import fuzzywuzzy.process
+        import dateutil.rrule
+        import dateutil.relativedelta
+        Quotes.load()
+        TimeParser.parse('')    # builds the scanner
+
+
+    # periodically removes long expired reminders from the database in small batches, so that neither the startup
+    # nor any other query ever has to wait for one big delete
+    async def reap_reminders(self):
+        interval = float(os.environ.get("REAPER_INTERVAL", 3600))     # seconds between two cleanup runs
+        batch_size = int(os.environ.get("REAPER_BATCH_SIZE", 500))    # max number of rows deleted at once
+        pause = float(os.environ.get("REAPER_PAUSE", 1.0))            # seconds to wait between two batches
+
+        # wait until the bot is ready
+        await self.wait_until_ready()
+
+        while True:
+            try:
+                # a partitioned reminder relation needs the partitions of the next months before their reminders are set
+                await self.db.maintain_partitions()
+
+                removed = 0
+                while True:
+                    deleted = await self.db.clean_up_reminders(batch_size)
+                    removed += deleted
+                    # a batch that wasn't full means that there is nothing left to delete
+                    if deleted < batch_size:
+                        break
+                    await asyncio.sleep(pause)
+
+                if removed:
+                    logger.info(f'ReminderReaper removed {removed} expired reminders from the DB')
+
+                # conversations nobody answered in time can't be resumed anymore either
+                await self.db.clean_up_conversations()
+
+            except Exception as exp:
+                # forward any exception to the ErrorHandler, but keep the reaper alive
+                await self.error_handler.handle(exp)
+
+            await asyncio.sleep(interval)
+
+
+    # regularly logs the health of the database along with the utilization of the connection pool
+    async def monitor_database(self):
+        interval = float(os.environ.get("DB_METRICS_INTERVAL", 0))    # seconds between two reports, 0 disables the monitor
+        if interval <= 0:
+            return
+
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                health = await self.db.health()
+                if health['healthy']:
+                    logger.info(f'DatabaseMonitor: {health}')
+                else:
+                    logger.warning(f'DatabaseMonitor: database did not respond in time! {health}')
+                # the peak values are reported per interval
+                self.db.metrics.reset_peaks()
+            except Exception as exp:
+                # forward any exception (e.g. too many connections during a failover) to the ErrorHandler, but keep the monitor alive
+                await self.error_handler.handle(exp)
+
+
+    # regularly reports the memory allocations since the last report, the running tasks and the size of every cache
+    async def report_diagnostics(self):
+        interval = float(os.environ.get("DIAG_INTERVAL", 0))    # seconds between two reports, 0 disables the reports
+        if interval <= 0:
+            return
+        to_file = os.environ.get("DIAG_OUTPUT", 'debug') == 'file'
+
+        await self.wait_until_ready()
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                report = self.diagnostics.status()
+                if self.diagnostics.tracing:
+                    # taking and comparing snapshots of the whole heap takes a while, so it mustn't block the event loop
+                    await asyncio.to_thread(self.diagnostics.snapshot)
+                    report += '\n\n' + await asyncio.to_thread(self.diagnostics.diff)
+                await self.__publish_diagnostics(report, to_file)
+            except Exception as exp:
+                await self.error_handler.handle(exp)
+
+
+    # posts a diagnostics report into the debug channel (as an attachment, if it's too long for a message) or writes it to a file
+    async def __publish_diagnostics(self, report: str, to_file=False):
+        if to_file:
+            path = self.diagnostics.write(report)
+            logger.info(f'Diagnostics written to {path}')
+            return await self.error_handler.debug.send(f'Diagnostics written to `{path}`')
+
+        if len(report) < 1900:
+            return await self.error_handler.debug.send(f'```\n{report}```')
+        attachment = d.File(io.BytesIO(report.encode('utf-8')), filename='diagnostics.txt')
+        await self.error_handler.debug.send(file=attachment)
+
+
     # returns a channel object corresponding to a given channel_id
     async def __get_channel_by_id(self, channel_id: int, user_id: int) -> d.abc.Messageable | None:
-        # try to get a channel object through the channel id - this method only works for server channels
-        chat = self.get_channel(channel_id)
-        if chat:
-            return chat
-
-        # in case we don't have a dm chat with that user yet, we need to create one
-        user = self.get_user(user_id)
-        return await user.create_dm()
+        # server channels are cached by discord.py, dm channels by the resolver (usually resolved in advance, see watch_reminders)
+        return await self.recipients.channel(channel_id, user_id)
 
 
     # executes when a new message is detected in any channel
@@ -150,10 +477,34 @@ class MyBot(d.Client):
         if message.author.bot:
             return
 
+        # the message is the answer to a question of an ongoing conversation - unless it's a command (like .cancel), no question
+        # expects one of those, so they still run next to the conversation
+        if not self.__is_command(message.content) and self.conversations.dispatch(message):
+            return
+
+        # the bot is shutting down and won't start anything new (but the answers above still complete running commands)
+        if self.drain_task:
+            return
+
         # create a custom message object from the real message object
         msg = MsgContainer(message, self.db)
+        with tracer.trace('on_message', channel=msg.chat.id, command=msg.cmd):
+            await self.__handle_message(msg)
+
+
+    # a prefix followed by an alphabetic character - anything else (like '.)') is most likely a smiley, not a command
+    def __is_command(self, text: str) -> bool:
+        return text.startswith(self.prefix) and text[len(self.prefix):len(self.prefix) + 1].isalpha()
 
+
+    async def __handle_message(self, msg: MsgContainer):
         try:
+            # the message might be the answer to a conversation that was interrupted by a restart (commands are no answers)
+            if not self.__is_command(msg.text) and self.conversation_store.is_pending(msg.user.id, msg.chat.id):
+                state = await self.conversation_store.take(msg.user.id, msg.chat.id)
+                if state:
+                    return await self.resume_conversation(msg, state)
+
             # check for command at message begin
             if msg.prefix == self.prefix:
 
@@ -161,16 +512,7 @@ class MyBot(d.Client):
                 # this is most likely a smiley, not a command
                 if not msg.text[1].isalpha():
                     return
-
-                logger.info(f"Command '{msg.cmd}' by {msg.user.name}")
-
-                # only show the help info for a given command
-                if '-h' in msg.words or '-help' in msg.words:
-                    return await self.__get_command_info(msg)
-
-                # call the respective function belonging to given cmd with arguments (self, msg);
-                # if cmd is invalid, return function for dict-key 'not_found'
-                return await self.execute_command.get(msg.cmd, self.execute_command['not_found'])(self, msg)
+                return await self.run_command(msg)
 
             # check for own name in message
             if self.name.casefold() in msg.text:
@@ -188,6 +530,33 @@ class MyBot(d.Client):
             await self.error_handler.handle(exp, msg)
 
 
+    # runs the command of a message (or of a slash command) - returns the job if it was started as one
+    async def run_command(self, msg: MsgContainer) -> Job | None:
+        # refuse commands of users (or guilds) that exceeded their rate limit, before any parsing or database work
+        retry_after, first_refusal = self.rate_limiter.acquire(msg.cmd, msg.user.id, msg.server.id if msg.server else None)
+        if retry_after:
+            logger.info(f"Command '{msg.cmd}' by {msg.user.name} refused by the rate limiter")
+            # only tell the user once, otherwise the refusals would flood the channel just the same
+            if first_refusal:
+                refusal = Quotes.get_quote('rateLimited').format(self, user=msg.user, seconds=math.ceil(retry_after))
+                await msg.post(refusal, ttl=10.0)
+            return
+
+        logger.info(f"Command '{msg.cmd}' by {msg.user.name}")
+
+        # only show the help info for a given command
+        if '-h' in msg.words or '-help' in msg.words:
+            return await self.__get_command_info(msg)
+
+        # call the respective function belonging to given cmd with arguments (self, msg);
+        # if cmd is invalid, return function for dict-key 'not_found'
+        command = self.execute_command.get(msg.cmd, self.execute_command['not_found'])
+        # long commands run as supervised jobs, which can be listed and cancelled
+        if msg.cmd in self.long_running_commands:
+            return self.jobs.start(msg, msg.cmd, lambda: command(self, msg), self.error_handler.handle, self.__job_cancelled)
+        await command(self, msg)
+
+
     # defines reaction to when a user message includes the bot's name (content of self.name)
     @staticmethod
     async def __react_to_name(msg: MsgContainer) -> str:
@@ -235,6 +604,65 @@ class MyBot(d.Client):
         return await msg.post(embed=cmd_embed)
 
 
+    # owner-only memory diagnostics: '.diag [start <frames>|stop|snapshot|diff|top|tasks|caches|loop] [-file]'
+    async def diagnose(self, msg: MsgContainer):
+        if msg.user.id != int(os.environ.get('LUIGI_FAN_ID', 0)):
+            raise AuthorizationException(f"User {msg.user.display_name} (id: {msg.user.id}) tried to use the diagnostics",
+                                         accessor=msg.user, resource=msg.cmd, cause=Cause.OWNER_ONLY)
+
+        action = next((word for word in msg.words if not word.startswith('-') and not word.isnumeric()), 'status')
+        number = int(next(filter(lambda word: word.isnumeric(), msg.words), 0))
+        match action:
+            case 'start':
+                report = self.diagnostics.start(number or 1)
+            case 'stop':
+                report = self.diagnostics.stop()
+            case 'snapshot':
+                report = await asyncio.to_thread(self.diagnostics.snapshot)
+            case 'diff':
+                report = await asyncio.to_thread(self.diagnostics.diff, number or 15)
+            case 'top':
+                report = await asyncio.to_thread(self.diagnostics.top, number or 15)
+            case 'tasks':
+                report = self.diagnostics.tasks()
+            case 'caches':
+                report = self.diagnostics.caches()
+            case 'loop':
+                report = self.loop_monitor.summary()
+            case _:
+                report = self.diagnostics.status()
+
+        await self.__publish_diagnostics(report, to_file='-file' in msg.options)
+
+
+    # lists the long commands that are currently running on this server (or in this dm chat)
+    async def list_jobs(self, msg: MsgContainer):
+        jobs = self.jobs.running(msg.server.id if msg.server else msg.chat.id)
+        if not jobs:
+            return await msg.post(Quotes.get_quote('jobs/empty').format(self))
+
+        entries = [Quotes.get_quote('jobs/entry').format(self, job=job, epoch=round(job.started)) for job in jobs]
+        jobs_embed = d.Embed(title=Quotes.get_quote('jobs/title').format(self), description='\n'.join(entries), color=0x008800)
+        return await msg.post(embed=jobs_embed)
+
+
+    # cancels the user's long commands in this chat, or only the one with the given number
+    async def cancel_jobs(self, msg: MsgContainer):
+        job_id = self.__find_first_number(msg.words)
+        cancelled = self.jobs.cancel(msg.user.id, msg.chat.id, job_id)
+        if not cancelled:
+            return await msg.post(Quotes.get_quote('jobs/nothingToCancel').format(self))
+
+        summary = ', '.join(f'#{job.id} {self.prefix}{job.command}' for job in cancelled)
+        await msg.post(Quotes.get_quote('jobs/cancelled').format(self, jobs=summary), ttl=10.0)
+
+
+    # a job that is cancelled while it waits for an answer mustn't be resumed after a restart
+    async def __job_cancelled(self, job: Job):
+        logger.info(f"Job #{job.id} '{job.command}' of user {job.user_id} was cancelled")
+        await self.conversation_store.discard(job.user_id, job.channel_id)
+
+
     @staticmethod
     # spams the channel with messages counting up to the number given as a parameter
     async def spam(_, msg: MsgContainer) -> None:
@@ -242,9 +670,13 @@ class MyBot(d.Client):
         number = int(next(filter(lambda word: word.isnumeric(), msg.words), 0))
         if not number:
             raise InvalidArgumentsException('No number of messages to spam was given', cause=Cause.NOT_A_NUMBER, goal=Goal.SPAM, arguments=msg.words)
+        # pause in between two messages, which leaves room for the messages of every other command in the send rate limit
+        interval = float(os.environ.get("SPAM_INTERVAL", 1.0))
         for i in range(number):
             async with msg.chat.typing():
                 await msg.post(i + 1)
+            if i + 1 < number:
+                await asyncio.sleep(interval)
         # end the spam with an assertive message
         await msg.post(Quotes.get_quote('spam_end'), ttl=5.0)
 
@@ -258,10 +690,16 @@ class MyBot(d.Client):
         number = int(next(filter(lambda word: word.isnumeric(), msg.words), 0))
 
         # get a confirmation from the user first before deleting
-        delete_confirmation = UserInteractionHandler(self, msg)
+        delete_confirmation = UserInteractionHandler(self, msg, flow='deletion')
+        delete_confirmation.checkpoint('confirm', number=number)
+        return await self.__confirm_deletion(msg, delete_confirmation)
+
+
+    async def __confirm_deletion(self, msg: MsgContainer, interaction: UserInteractionHandler):
+        number: int = interaction.state['number']
         question = Quotes.get_quote('deletion/question').format(self, number=number)
         abort_msg = Quotes.get_quote('deletion/abort').format(self)
-        confirmed, extra_messages = await delete_confirmation.get_confirmation(question=question, abort_msg=abort_msg)
+        confirmed, extra_messages = await interaction.get_confirmation(question=question, abort_msg=abort_msg)
 
         # we also want the messages needed for the confirmation process to disappear
         remaining = number + extra_messages
@@ -293,136 +731,269 @@ class MyBot(d.Client):
             # if the user hasn't defined a timezone yet, add one
             user_data.tz = await self.__add_timezone(msg)
 
+        # option 3: several reminders at once, one per line (or per line of an attached text file)
+        entries: List[str] = await self.__reminder_entries(msg)
+        if len(entries) > 1 or self.__text_attachments(msg):
+            return await self.__set_reminders(msg, user_data.tz, entries)
+
         # parse memo and timestamp from user message
-        reminder_parser = TimeHandler()
-        timestamp: datetime.datetime = await reminder_parser.get_timestamp(msg)
-        memo: str = reminder_parser.get_memo(msg)
+        with tracer.span('parse'):
+            reminder_parser = TimeHandler()
+            timestamp: datetime.datetime = await reminder_parser.get_timestamp(msg)
+            memo: str = reminder_parser.get_memo(msg)
+            recurrence: str | None = reminder_parser.get_recurrence(msg)
 
         user = msg.user
         epoch = round(timestamp.timestamp())  # convert timestamp to UNIX epoch in order to display them as discord timestamp
 
         # check if the reminder datetime has already passed (with regard to the user's timezone ofc)
-        user_tz = pytz.timezone(user_data.tz)
-        now = datetime.datetime.now(user_tz)
+        now = TimeService.now(user_data.tz)
         if timestamp < now:
             raise InvalidArgumentsException('Cannot set reminder for datetime in the past', cause=Cause.TIMESTAMP_IN_THE_PAST,
                                             goal=Goal.REMINDER_SET, arguments=timestamp)
 
         # write the new reminder to the database
-        await self.db.push_reminder(msg, timestamp, memo)
-        await msg.post(Quotes.get_quote('reminder/setDone').format(self, uid=user.id, unix=epoch, memo=memo))
+        await self.db.push_reminder(msg, timestamp, memo, recurrence)
+        self.reminder_views.invalidate(guild_id=msg.server.id if msg.server else None, user_id=msg.user.id)
+        confirmation = Quotes.get_quote('reminder/setDone').format(self, uid=user.id, unix=epoch, memo=memo)
+        if recurrence:
+            confirmation += Quotes.get_quote('reminder/recurring').format(self, rule=recurrence)
+        await msg.post(confirmation)
 
-        # the newly created reminder might be due earlier than the current next task, so we need to restart the watchdog
-        for task in asyncio.all_tasks():
-            if task.get_name() == 'reminder_watchdog':
-                # stop the current watchdog task which is most likely sleeping
-                task.cancel()
-        # create a new watchdog task which starts by scanning again for the next due date
-        asyncio.create_task(self.watch_reminders(), name='reminder_watchdog')
+        # the newly created reminder might be due earlier than the current next task, so the watchdog might need a restart
+        self.notify_watchdog(timestamp)
+
+
+    # the reminders of a message: the rest of its first line and every other line, plus every line of attached text files
+    @staticmethod
+    async def __reminder_entries(msg: MsgContainer) -> List[str]:
+        command_line, *lines = msg.original_text.strip().splitlines() or ['']
+        entries = command_line.split(maxsplit=1)[1:] + lines
+        for attachment in MyBot.__text_attachments(msg):
+            entries += (await attachment.read()).decode('utf-8', errors='replace').splitlines()
+        return [entry.strip() for entry in entries if entry.strip()]
+
+
+    # other attachments (e.g. an image) are no reminders, so they don't make a message a bulk reminder
+    @staticmethod
+    def __text_attachments(msg: MsgContainer) -> List[d.Attachment]:
+        return [attachment for attachment in msg.attachments
+                if (attachment.content_type or '').startswith('text/') and attachment.size <= 64 * 2 ** 10]
+
+
+    # sets every reminder of the entries, or none at all if any of them is invalid - the user can simply fix the message and send it again
+    async def __set_reminders(self, msg: MsgContainer, timezone: str, entries: List[str]):
+        limit = int(os.environ.get("BULK_REMINDER_LIMIT", 50))
+        if not entries:
+            # e.g. an empty text file
+            raise InvalidArgumentsException('No reminders in the message', cause=Cause.INSUFFICIENT_ARGUMENTS, goal=Goal.REMINDER_SET)
+        if len(entries) > limit:
+            raise InvalidArgumentsException(f'{len(entries)} reminders in one message exceed the limit of {limit}', cause=Cause.TOO_MANY_ENTRIES,
+                                            goal=Goal.REMINDER_SET, arguments=limit)
+
+        # tokenize all entries in one go in a worker thread - resolve() then finds them in the parser's cache
+        with tracer.span('parse', entries=len(entries)):
+            await asyncio.to_thread(self.__tokenize_all, entries)
+            now = TimeService.now(timezone)
+            reminders: List[Tuple[datetime.datetime, str, str | None]] = []
+            failures: List[Tuple[int, Exception]] = []
+            for number, entry in enumerate(entries, start=1):
+                try:
+                    timestamp = TimeHandler().resolve(entry, timezone)
+                    if timestamp < now:
+                        raise InvalidArgumentsException('Cannot set reminder for datetime in the past', cause=Cause.TIMESTAMP_IN_THE_PAST,
+                                                        goal=Goal.REMINDER_SET, arguments=timestamp)
+                    options = [word for word in entry.casefold().split() if word.startswith('-')]
+                    reminders.append((timestamp, TimeHandler.memo_of(entry), TimeHandler.recurrence_of(options)))
+                except InvalidArgumentsException as exp:
+                    failures.append((number, exp))
+
+        if failures:
+            raise BulkReminderException(f'{len(failures)} of {len(entries)} reminders are invalid', cause=Cause.INVALID_ENTRIES, failures=failures)
+
+        # a single insert for all of them, and a single notification of the watchdog
+        await self.db.push_reminders(msg, reminders)
+        self.reminder_views.invalidate(guild_id=msg.server.id if msg.server else None, user_id=msg.user.id)
+        earliest = min(timestamp for timestamp, _, _ in reminders)
+        await msg.post(Quotes.get_quote('reminder/bulkDone').format(self, count=len(reminders), uid=msg.user.id, unix=round(earliest.timestamp())))
+        self.notify_watchdog(earliest)
+
+
+    # the invalid entries are left for resolve(), which raises their errors again
+    @staticmethod
+    def __tokenize_all(entries: List[str]):
+        for entry in entries:
+            try:
+                TimeParser.parse(entry)
+            except InvalidArgumentsException:
+                pass
 
 
     async def __add_timezone(self, msg: MsgContainer) -> str:
-        default_tz = Quotes.get_quote('timezone/default')
-        timezone_interrogation = UserInteractionHandler(self, msg)
-        want_default = Quotes.get_quote('timezone/firstTime').format(self, default_tz=default_tz)
-        start_selection = Quotes.get_quote('timezone/selection/start').format(self)
-        confirmed, _ = await timezone_interrogation.get_confirmation(question=want_default, abort_msg=start_selection)
-        if confirmed:
-            await self.db.update_timezone(msg.user, default_tz)
-            await msg.post(Quotes.get_quote('timezone/selection/done').format(self, new_tz=default_tz))
-            return default_tz
-
-        # choose a different timezone
-        timezone_guess = await timezone_interrogation.listen()
-        timezone: str = await self.__choose_timezone(timezone_interrogation, timezone_guess)
+        timezone_interrogation = UserInteractionHandler(self, msg, flow='timezone')
+        timezone_interrogation.checkpoint('default')
+        timezone: str = await self.__select_timezone(msg, timezone_interrogation)
         if not timezone:
             raise FruitlessChoosingException(f"Failed to select a timezone for the user {msg.user.display_name}, most likely due to a timeout", cause=Cause(0))
-        await self.db.update_timezone(msg.user, timezone)
-        await msg.post(Quotes.get_quote('timezone/selection/done').format(self, new_tz=timezone))
         return timezone
 
 
-    async def __choose_timezone(self, interaction: UserInteractionHandler, tz_guess: str) -> str | None:
-        result_limit = 20
-        # evaluates a "similarity score" between 0 and 100 for every timezone
-        # then sorts them descending by their score and returns the [result_limit] best matching tuples
-        scores: List[Tuple[str, int]] = process.extract(tz_guess, pytz.common_timezones, scorer=fuzz.partial_ratio, limit=result_limit)
-
-        # if the match is very clear, ask the user if that's the correct timezone
-        if (scores[0][1] == 100 and scores[1][1] < 100) or 0.8 * scores[0][1] > scores[1][1]:
-            question = Quotes.get_quote('timezone/selection/didYouMean').format(self, best_match=scores[0][0])
-            abort_msg = Quotes.get_quote('timezone/selection/otherResults').format(self)
-            confirmed, _ = await interaction.get_confirmation(question=question, abort_msg=abort_msg)
+    # guides the user through the selection of a timezone, starting at the interaction's current step;
+    # every step sets a checkpoint before waiting for the user, so the selection can be resumed after a restart
+    async def __select_timezone(self, msg: MsgContainer, interaction: UserInteractionHandler) -> str | None:
+        step = interaction.state['step']
+
+        # step 1 (first time): offer the default timezone
+        if step == 'default':
+            default_tz = Quotes.get_dict('timezone')['default']
+            want_default = Quotes.get_quote('timezone/firstTime').format(self, default_tz=default_tz)
+            # without the message content intent (see the 'slash' gateway profile) the written selection below would never get
+            # an answer, so the user is sent to /timezone instead
+            written_answers = self.intents.message_content
+            start_selection = Quotes.get_quote('timezone/selection/start').format(self) if written_answers else None
+            confirmed, num_of_messages = await interaction.get_confirmation(question=want_default, abort_msg=start_selection)
             if confirmed:
-                return scores[0][0]     # return the timezone that matched with the highest score
-            # if the user rejected our offer, continue with the usual timezone choosing procedure below
+                return await self.__save_timezone(msg, default_tz)
+            if not num_of_messages:
+                return None     # timeout
+            if not written_answers:
+                raise FruitlessChoosingException(f"{msg.user.display_name} can't name a timezone without written answers", cause=Cause.NO_WRITTEN_ANSWERS)
+
+        # step 1 (timezone already set): ask whether the user wants to change their timezone at all
+        elif step == 'change':
+            question = Quotes.get_quote('timezone/info').format(tz=interaction.state['tz'])
+            abort_msg = Quotes.get_quote('abort/happy')
+            confirmed, _ = await interaction.get_confirmation(question=question, abort_msg=abort_msg)
+            if not confirmed:
+                return interaction.state['tz']  # apparently the user didn't want to change his timezone
+            await interaction.talk(Quotes.get_quote('timezone/selection/start').format(self))
+
+        # step 2: let the user name a timezone and choose one of the most similar ones
+        if step in ('default', 'change', 'guess'):
+            interaction.checkpoint('guess')
+            timezone_guess = await interaction.get_response()
+            if not timezone_guess:
+                return None     # timeout
+            timezone: str = await self.__choose_timezone(interaction, timezone_guess)
+        else:
+            # the conversation was resumed somewhere in the middle of the choosing procedure
+            timezone: str = await self.__choose_timezone(interaction)
 
-        # let the user choose either one of those highest ranking timezones or search again with another string
-        tz_selection: str = Quotes.get_quote('timezone/selection/mostSimilar').format(self) + \
-                            "\n".join([str(i + 1) + ') ' + match[0]    # '1) Europe/Berlin' (example)
-                                      for i, match in enumerate(scores)  # iterate through every element in the list
-                                      if i < 5 or match[1] == scores[0][1]])  # take the first 5, potentially more if they have the same score as the 1st element
+        if not timezone:
+            return None
+        return await self.__save_timezone(msg, timezone)
 
-        if len(scores) == result_limit:
-            tz_selection += Quotes.get_quote('timezone/selection/andMore').format(self)
-        await interaction.talk(tz_selection)
 
-        choose_one: str = Quotes.get_quote('timezone/selection/chooseOne').format(self)
-        hint: str = Quotes.get_quote('timezone/selection/hint').format(self)
-        response: str = await interaction.get_response(question=choose_one, hint_msg=hint, hint_on_try=3)
+    async def __save_timezone(self, msg: MsgContainer, timezone: str) -> str:
+        await self.db.update_timezone(msg.user, timezone)
+        await msg.post(Quotes.get_quote('timezone/selection/done').format(self, new_tz=timezone))
+        return timezone
 
-        if not response:
-            return None     # something went wrong, perhaps a TimeOut
-        index = response[0]
-        # the user responded with a numbers (index of timezone)
-        if index.isnumeric():
-            return scores[int(index) - 1][0]    # return the corresponding timezone
-        # the user responded with another search term
-        return await self.__choose_timezone(interaction, response)  # search again for string matches
+
+    async def __choose_timezone(self, interaction: UserInteractionHandler, tz_guess: str = None) -> str | None:
+        from fuzzywuzzy import fuzz, process     # imported on first use, to keep the startup fast
+        result_limit = 20
+        # without a new search term, continue with the scores of the step the conversation was interrupted at
+        step: str = 'search' if tz_guess is not None else interaction.state['step']
+        scores: List[Tuple[str, int]] = interaction.state.get('scores')
+
+        # search again for string matches as long as the user responds with another search term
+        while True:
+            if step == 'search':
+                # evaluates a "similarity score" between 0 and 100 for every timezone
+                # then sorts them descending by their score and returns the [result_limit] best matching tuples
+                # (comparing against every timezone takes a while, so it runs in a worker thread instead of blocking the event loop)
+                scores = await asyncio.to_thread(process.extract, tz_guess, pytz.common_timezones, scorer=fuzz.partial_ratio, limit=result_limit)
+                # if the match is very clear, ask the user if that's the correct timezone
+                step = 'didYouMean' if (scores[0][1] == 100 and scores[1][1] < 100) or 0.8 * scores[0][1] > scores[1][1] else 'list'
+
+            if step == 'didYouMean':
+                interaction.checkpoint('didYouMean', scores=scores)
+                question = Quotes.get_quote('timezone/selection/didYouMean').format(self, best_match=scores[0][0])
+                abort_msg = Quotes.get_quote('timezone/selection/otherResults').format(self)
+                confirmed, _ = await interaction.get_confirmation(question=question, abort_msg=abort_msg)
+                if confirmed:
+                    return scores[0][0]     # return the timezone that matched with the highest score
+                # if the user rejected our offer, continue with the usual timezone choosing procedure below
+                step = 'list'
+
+            if step == 'list':
+                # let the user choose either one of those highest ranking timezones or search again with another string
+                tz_selection: str = Quotes.get_quote('timezone/selection/mostSimilar').format(self) + \
+                                    "\n".join([str(i + 1) + ') ' + match[0]    # '1) Europe/Berlin' (example)
+                                              for i, match in enumerate(scores)  # iterate through every element in the list
+                                              if i < 5 or match[1] == scores[0][1]])  # take the first 5, potentially more if they have the same score as the 1st element
+
+                if len(scores) == result_limit:
+                    tz_selection += Quotes.get_quote('timezone/selection/andMore').format(self)
+                await interaction.talk(tz_selection)
+
+            interaction.checkpoint('choose', scores=scores)
+            choose_one: str = Quotes.get_quote('timezone/selection/chooseOne').format(self)
+            hint: str = Quotes.get_quote('timezone/selection/hint').format(self)
+            response: str = await interaction.get_response(question=choose_one, hint_msg=hint, hint_on_try=3)
+
+            if not response:
+                return None     # something went wrong, perhaps a TimeOut
+            index = response[0]
+            # the user responded with a numbers (index of timezone)
+            if index.isnumeric():
+                return scores[int(index) - 1][0]    # return the corresponding timezone
+            # the user responded with another search term
+            tz_guess = response
+            step = 'search'
 
 
     async def change_timezone(self, msg: MsgContainer) -> None:
         # fetch data about the user from the database
         user_data = await msg.db_user
 
+        # a timezone that is named right away (e.g. '.timezone Europe/Vienna') is set without any questions
+        if named_tz := next(filter(None, map(self.timezones.lookup, msg.original_text.split()[1:])), None):
+            await self.__save_timezone(msg, named_tz)
+            return
+
         # if the user hasn't defined a timezone yet, add one
         if not user_data.tz:
             user_data.tz = await self.__add_timezone(msg)
             return
 
         # if we already have an entry for this user, and he chose a timezone before, they can change it
-        change_tz_interaction = UserInteractionHandler(self, msg)
-        question = Quotes.get_quote('timezone/info').format(tz=user_data.tz)
-        abort_msg = Quotes.get_quote('abort/happy')
-        confirmed, _ = await change_tz_interaction.get_confirmation(question=question, abort_msg=abort_msg)
+        change_tz_interaction = UserInteractionHandler(self, msg, flow='timezone')
+        change_tz_interaction.checkpoint('change', tz=user_data.tz)
+        await self.__finish_timezone_change(msg, change_tz_interaction)
 
-        if not confirmed:
-            return  # apparently the user didn't want to change his timezone
-        # let the user choose a new timezone
-        question = Quotes.get_quote('timezone/selection/start').format(self)
-        timezone_guess = await change_tz_interaction.get_response(question=question)
-        timezone: str = await self.__choose_timezone(change_tz_interaction, timezone_guess)
 
+    async def __finish_timezone_change(self, msg: MsgContainer, interaction: UserInteractionHandler) -> None:
+        timezone: str = await self.__select_timezone(msg, interaction)
         if not timezone:
             return await msg.post(Quotes.get_quote('timezone/selection/error').format(self))
 
-        await self.db.update_timezone(msg.user, timezone)
-        return await msg.post(Quotes.get_quote('timezone/selection/done').format(self, new_tz=timezone))
-
 
     # returns an embed, listing all reminders that are currently in the database
     async def show_reminders(self, msg: MsgContainer) -> d.Embed | ReminderNotFoundException:
         # find all reminders which the user is supposed to see
         next_reminders: List[Reminder] = await self.__find_local_reminders(msg, 20)
 
+        # the same list of reminders has been rendered before
+        view_key = ReminderViewCache.key(msg.server, msg.user)
+        if cached_embed := self.reminder_views.get_embed(view_key):
+            return cached_embed
+
         # create an embed to neatly display the upcoming reminders
         reminder_embed = d.Embed(title=Quotes.get_quote('reminder/show/title').format(self), color=0x660000)
+        # resolve every distinct owner only once (and concurrently, since some of them might have to be fetched)
+        user_ids = list(dict.fromkeys(rem.user_id for rem in next_reminders))
+        users = dict(zip(user_ids, await asyncio.gather(*(self.recipients.user(user_id) for user_id in user_ids))))
         for i, rem in enumerate(next_reminders):
-            user = self.get_user(rem.user_id)
+            user = users[rem.user_id] or SimpleNamespace(display_name=Quotes.get_quote('reminder/show/unknownUser'))
             epoch = round(rem.due_date.timestamp())
             reminder_entry: str = Quotes.get_quote('reminder/show/entry').format(self, index=i+1, epoch=epoch, user=user)
+            if rem.recurrence:
+                reminder_entry += ' :repeat:'
             reminder_embed.add_field(name=reminder_entry, value=rem.memo, inline=False)
         reminder_embed.set_footer(text=Quotes.get_quote('reminder/show/hint').format(self))
+        self.reminder_views.put_embed(view_key, reminder_embed)
         return reminder_embed
 
 
@@ -449,31 +1020,40 @@ class MyBot(d.Client):
             raise AuthorizationException(f"User {msg.user.display_name} (id: {msg.user.id}) tried to delete a reminder of user {del_rem.user_id}!",
                                          accessor=msg.user, owner=del_rem.user_id, resource=del_rem, cause=Cause.ILLEGAL_REMINDER_DELETION)
 
-        date = del_rem.due_date.date().strftime('%d.%m.%Y')  # get the date in standardized format (dd.mm.yyyy)
-        time = del_rem.due_date.time().isoformat(timespec='minutes')
+        # display the due date in the reminder owner's timezone
+        due_date = TimeService.to_local(del_rem.due_date, del_rem.time_zone or Quotes.get_dict('timezone')['default'])
+        date = due_date.date().strftime('%d.%m.%Y')  # get the date in standardized format (dd.mm.yyyy)
+        time = due_date.time().isoformat(timespec='minutes')
 
         # get a confirmation from the user first before deleting
-        reminder_confirmation = UserInteractionHandler(self, msg)
+        reminder_confirmation = UserInteractionHandler(self, msg, flow='reminderDeletion')
         deletion_summary = Quotes.get_quote('reminder/deletion/summary').format(self, rem=del_rem, date=date, time=time)
+        reminder_confirmation.checkpoint('confirm', rem_id=str(del_rem.rem_id), channel_id=del_rem.channel_id, summary=deletion_summary)
+        return await self.__confirm_reminder_deletion(msg, reminder_confirmation)
+
+
+    async def __confirm_reminder_deletion(self, msg: MsgContainer, interaction: UserInteractionHandler) -> None:
         abort_msg = Quotes.get_quote('reminder/deletion/abort').format(self)
-        confirmed, num_of_messages = await reminder_confirmation.get_confirmation(question=deletion_summary, abort_msg=abort_msg)
+        confirmed, num_of_messages = await interaction.get_confirmation(question=interaction.state['summary'], abort_msg=abort_msg)
         if not confirmed:
             return  # deletion aborted
-        await self.db.delete_reminder(del_rem)
+        await self.db.delete_reminder_by_id(interaction.state['rem_id'])
+        # the reminder may belong to another guild than the current one (e.g. deleted from a dm), so its own channel decides
+        # which guild's view it was listed in - only the owner can delete a reminder, so it's the user's view as well
+        deleted = Reminder(interaction.state['rem_id'], msg.user.id, interaction.state.get('channel_id'))
+        self.__invalidate_reminder_views(deleted)
         return await msg.post(Quotes.get_quote('reminder/deletion/done').format(self))
 
 
     # finds the next <limit> reminders which belong to either the current server or the asking user in case of a dm channel
     async def __find_local_reminders(self, msg: MsgContainer, limit=20) -> List[Reminder]:
-        # check if command was sent in a server
-        if not msg.server:
-            # command was invoked in a private chat -> fetch all reminders for that user
-            local_reminders: List[Reminder] = await self.db.fetch_reminders(user=msg.user)
-        else:
-            # get a list of channel_ids for all channels on the message's server
-            channel_list = [str(channel.id) for channel in msg.server.text_channels]
-            # fetch a list of upcoming reminders on this server from the database
-            local_reminders: List[Reminder] = await self.db.fetch_reminders(channels=channel_list)
+        view_key = ReminderViewCache.key(msg.server, msg.user)
+        local_reminders: List[Reminder] | None = self.reminder_views.get_reminders(view_key)
+
+        # only ask the database if the reminders of this guild (or user) aren't cached
+        if local_reminders is None:
+            local_reminders = await self.__fetch_local_reminders(msg)
+            self.reminder_views.put_reminders(view_key, local_reminders)
 
         if not local_reminders:  # empty list -> no reminders found in the database
             raise ReminderNotFoundException('There are no upcoming reminders at the moment', cause=Cause.EMPTY_DB)
@@ -481,6 +1061,18 @@ class MyBot(d.Client):
         return local_reminders
 
 
+    async def __fetch_local_reminders(self, msg: MsgContainer) -> List[Reminder]:
+        # check if command was sent in a server
+        if not msg.server:
+            # command was invoked in a private chat -> fetch all reminders for that user
+            return await self.db.fetch_reminders(user=msg.user)
+
+        # get a list of channel_ids for all channels on the message's server
+        channel_list = [str(channel.id) for channel in msg.server.text_channels]
+        # fetch a list of upcoming reminders on this server from the database
+        return await self.db.fetch_reminders(channels=channel_list)
+
+
     @staticmethod
     def __find_first_number(words: list[str]) -> int | None:
         for word in words:
@@ -498,10 +1090,19 @@ class MyBot(d.Client):
     # TODO: prevent deleting in private channels, as it is not possible
 
     # bugs
-    # ToDo: Bugfix - Ensure that reminders also happen when they are missed by like up to 120 seconds
     # TODO: Bugfix - multiple reminders at the exact same time (atm only one of them is sent)
 
 
+    # continues a persisted conversation at the step it was interrupted at
+    async def resume_conversation(self, msg: MsgContainer, state: dict):
+        interaction = UserInteractionHandler.resume(self, msg, state)
+        logger.info(f"Resuming conversation '{interaction.flow}' with {msg.user.name} at step '{interaction.state['step']}'")
+        resume = self.resume_flow[interaction.flow]
+        if interaction.flow in self.long_running_flows:
+            return self.jobs.start(msg, interaction.flow, lambda: resume(self, msg, interaction), self.error_handler.handle, self.__job_cancelled)
+        return await resume(self, msg, interaction)
+
+
     @staticmethod  # this is only static so that the compiler shuts up at the execute_command()-call above
     async def not_found(_, msg: MsgContainer):
         raise UnknownCommandException(f"Couldn't find command with the name {msg.cmd}", command=msg.cmd, goal=Goal(0))
@@ -515,10 +1116,24 @@ class MyBot(d.Client):
         'spam': spam,
         'remindme': set_reminder,
         'timezone': change_timezone,
+        'diag': diagnose,
+        'jobs': list_jobs,
+        'cancel': cancel_jobs,
         'not_found': not_found,
         # every function with entry in this dict must have 'self' parameter to work in execute_command call
     }
 
+    # commands (and conversation flows) that may take a long time and therefore run as supervised jobs
+    long_running_commands = {'spam', 'delete'}
+    long_running_flows = {'deletion'}
+
+    # dictionary to map every conversation flow to the function that can resume it
+    resume_flow = {
+        'deletion': __confirm_deletion,
+        'reminderDeletion': __confirm_reminder_deletion,
+        'timezone': __finish_timezone_change,
+    }
+
 
 # start the program
 if __name__ == '__main__':
@@ -0,0 +1,70 @@
+import builtins
+import sys
+import time
+from contextlib import contextmanager
+
+
+class StartupProfiler:
+    flag = '--profile-startup'
+
+    def __init__(self, enabled: bool):
+        self.enabled = enabled
+        self.start = time.perf_counter()
+        self.imports: dict[str, list[float]] = {}      # module -> [cumulative time, self time] of its first import
+        self.phases: list[tuple[str, float]] = []       # (phase, duration) in the order they finished
+        self.__import_stack: list[float] = []          # time spent in nested imports, for every import that is currently running
+        self.__original_import = builtins.__import__
+
+
+    # creates a profiler which is only enabled if the program was started with --profile-startup
+    @classmethod
+    def from_args(cls, args: list[str]) -> 'StartupProfiler':
+        profiler = cls(cls.flag in args)
+        if profiler.enabled:
+            builtins.__import__ = profiler.__timed_import
+        return profiler
+
+
+    @contextmanager
+    def phase(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            if self.enabled:
+                self.phases.append((name, time.perf_counter() - start))
+
+
+    # records a point in time (relative to the program start) as a phase
+    def mark(self, name: str) -> None:
+        if self.enabled:
+            self.phases.append((name, time.perf_counter() - self.start))
+
+
+    # stops measuring imports and summarizes the measurements
+    def report(self, top=15) -> str:
+        builtins.__import__ = self.__original_import
+        slowest = sorted(self.imports.items(), key=lambda item: item[1][0], reverse=True)[:top]
+
+        lines = ['Startup profile', '  phases:']
+        lines += [f'    {name:<30} {duration * 1000:>9.1f} ms' for name, duration in self.phases]
+        lines += [f'  slowest imports (cumulative / self, {len(self.imports)} modules in total):']
+        lines += [f'    {module:<30} {cumulative * 1000:>9.1f} ms {own * 1000:>9.1f} ms' for module, (cumulative, own) in slowest]
+        return '\n'.join(lines)
+
+
+    def __timed_import(self, name, globals=None, locals=None, fromlist=(), level=0):
+        # modules that have been imported before cost (almost) nothing
+        if level or name in sys.modules:
+            return self.__original_import(name, globals, locals, fromlist, level)
+
+        self.__import_stack.append(0.0)
+        start = time.perf_counter()
+        try:
+            return self.__original_import(name, globals, locals, fromlist, level)
+        finally:
+            duration = time.perf_counter() - start
+            nested = self.__import_stack.pop()
+            if self.__import_stack:
+                self.__import_stack[-1] += duration
+            self.imports.setdefault(name, [duration, duration - nested])
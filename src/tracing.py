@@ -0,0 +1,234 @@
+import asyncio
+import contextvars
+import functools
+import inspect
+import json
+import random
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Iterator
+
+
+# Lightweight request tracing: a trace is started for every handled message (or slash command) and every reminder delivery,
+# and everything it waits for - database calls, quotes, sends - is recorded as a span within it. The current span is kept in
+# a context variable, so it follows the request through every await (and into the tasks it creates) without being passed around.
+# Only a sample of the traces is recorded (TRACE_SAMPLE_RATE, 0 by default). Those that aren't cost a single random number,
+# everything within them just finds no span to attach to.
+# asyncio.to_thread copies the context as well, so spans may also be finished (and exported) in worker threads.
+#   TRACE_OUTPUT=traces.jsonl             one json object per finished span, appended to the file
+#   TRACE_OUTPUT=http://collector:4318    batches of spans, posted as OTLP/HTTP json to <url>/v1/traces
+
+
+@dataclass()
+class Span:
+    name: str
+    trace_id: str
+    span_id: str
+    parent_id: str | None
+    attributes: dict = field(default_factory=dict)
+    start: int = field(default_factory=time.time_ns)
+    end: int | None = None
+    error: str | None = None
+
+    def set(self, **attributes) -> None:
+        self.attributes.update(attributes)
+
+    @property
+    def duration(self) -> float:
+        return ((self.end or time.time_ns()) - self.start) / 1e9
+
+    def to_dict(self) -> dict:
+        return {'name': self.name, 'trace_id': self.trace_id, 'span_id': self.span_id, 'parent_id': self.parent_id, 'start': self.start,
+                'duration': round(self.duration, 6), 'attributes': self.attributes, 'error': self.error}
+
+
+# the span the current task is in - None outside of any (sampled) trace
+_current_span: contextvars.ContextVar[Span | None] = contextvars.ContextVar('current_span', default=None)
+
+
+class Tracer:
+
+    def __init__(self, sample_rate: float = 0.0, exporter=None):
+        self.sample_rate = sample_rate
+        self.exporter = exporter
+
+
+    # has to be called on the event loop, the OTLP export runs there
+    def configure(self, sample_rate: float, output: str | None) -> None:
+        self.sample_rate = sample_rate if output else 0.0
+        if not output or sample_rate <= 0:
+            self.exporter = None
+        elif output.startswith(('http://', 'https://')):
+            self.exporter = OtlpExporter(output, asyncio.get_running_loop())
+        else:
+            self.exporter = JsonlExporter(output)
+
+
+    # starts a new trace, no matter whether there is one going on already - unless it isn't sampled
+    @contextmanager
+    def trace(self, name: str, **attributes) -> Iterator[Span | None]:
+        if not self.exporter or random.random() >= self.sample_rate:
+            # an unsampled trace also hides any outer trace from the spans within it
+            token = _current_span.set(None)
+            try:
+                yield None
+            finally:
+                _current_span.reset(token)
+            return
+        yield from self.__record(Span(name, f'{random.getrandbits(128):032x}', f'{random.getrandbits(64):016x}', None, attributes))
+
+
+    # a span within the current trace - nothing is recorded if there isn't one
+    @contextmanager
+    def span(self, name: str, **attributes) -> Iterator[Span | None]:
+        parent = _current_span.get()
+        if parent is None:
+            yield None
+            return
+        yield from self.__record(Span(name, parent.trace_id, f'{random.getrandbits(64):016x}', parent.span_id, attributes))
+
+
+    def __record(self, span: Span) -> Iterator[Span]:
+        token = _current_span.set(span)
+        try:
+            yield span
+        except BaseException as exp:
+            span.error = type(exp).__name__
+            raise
+        finally:
+            span.end = time.time_ns()
+            _current_span.reset(token)
+            self.exporter.export(span)
+
+
+    # decorator which records every call of a function (or coroutine function) as a span within the current trace
+    def traced(self, name: str):
+        def decorator(function):
+            if inspect.iscoroutinefunction(function):
+                @functools.wraps(function)
+                async def traced_coroutine(*args, **kwargs):
+                    if _current_span.get() is None:
+                        return await function(*args, **kwargs)
+                    with self.span(name):
+                        return await function(*args, **kwargs)
+                return traced_coroutine
+
+            @functools.wraps(function)
+            def traced_function(*args, **kwargs):
+                if _current_span.get() is None:
+                    return function(*args, **kwargs)
+                with self.span(name):
+                    return function(*args, **kwargs)
+            return traced_function
+        return decorator
+
+
+    async def close(self) -> None:
+        if self.exporter:
+            await self.exporter.close()
+
+
+class JsonlExporter:
+
+    def __init__(self, path: str):
+        self.file = open(path, 'a', encoding='utf-8')
+        self.lock = threading.Lock()    # spans of worker threads are written right away as well
+
+
+    def export(self, span: Span) -> None:
+        line = json.dumps(span.to_dict(), ensure_ascii=False, separators=(',', ':')) + '\n'
+        with self.lock:
+            self.file.write(line)
+            # the spans of a trace are written in one go, as soon as its root span is done
+            if span.parent_id is None:
+                self.file.flush()
+
+
+    async def close(self) -> None:
+        with self.lock:
+            self.file.close()
+
+
+# Posts the spans to an OpenTelemetry collector (or anything else that speaks OTLP/HTTP json). Spans are sent in batches,
+# at most every <interval> seconds, from a task of their own - a slow collector never holds up a request.
+class OtlpExporter:
+
+    def __init__(self, url: str, loop: asyncio.AbstractEventLoop, interval: float = 5.0, max_pending: int = 10000, service: str = 'shuvi'):
+        self.url = url.rstrip('/') + '/v1/traces'
+        self.loop = loop
+        self.loop_thread = threading.get_ident()    # created on the loop (see Tracer.configure)
+        self.interval = interval
+        self.max_pending = max_pending
+        self.service = service
+        self.pending: list[Span] = []
+        self.dropped = 0
+        self.flush_task: asyncio.Task | None = None
+
+
+    def export(self, span: Span) -> None:
+        # spans of worker threads are handed over to the event loop, which is the only one to touch the batch
+        if threading.get_ident() != self.loop_thread:
+            try:
+                self.loop.call_soon_threadsafe(self.export, span)
+            except RuntimeError:
+                self.dropped += 1   # the loop is closed already
+            return
+
+        # rather lose spans than memory, if the collector can't keep up
+        if len(self.pending) >= self.max_pending:
+            self.dropped += 1
+            return
+        self.pending.append(span)
+        if self.flush_task is None or self.flush_task.done():
+            # created within an empty context (create_task only takes a context since Python 3.11), so that the export isn't traced
+            self.flush_task = contextvars.Context().run(asyncio.create_task, self.__flush_later(), name='trace_export')
+
+
+    async def __flush_later(self):
+        await asyncio.sleep(self.interval)
+        await self.flush()
+
+
+    async def flush(self) -> None:
+        import aiohttp     # a dependency of discord.py anyway
+        batch, self.pending = self.pending, []
+        if not batch:
+            return
+        try:
+            async with aiohttp.ClientSession() as session:
+                await session.post(self.url, json=self.__payload(batch), timeout=aiohttp.ClientTimeout(total=10))
+        except (aiohttp.ClientError, asyncio.TimeoutError):
+            self.dropped += len(batch)
+
+
+    def __payload(self, batch: list[Span]) -> dict:
+        def attributes(values: dict) -> list[dict]:
+            return [{'key': key, 'value': {'stringValue': str(value)}} for key, value in values.items()]
+
+        spans = [{
+            'traceId': span.trace_id,
+            'spanId': span.span_id,
+            'parentSpanId': span.parent_id or '',
+            'name': span.name,
+            'kind': 1,
+            'startTimeUnixNano': str(span.start),
+            'endTimeUnixNano': str(span.end),
+            'attributes': attributes(span.attributes),
+            'status': {'code': 2, 'message': span.error} if span.error else {'code': 1},
+        } for span in batch]
+        return {'resourceSpans': [{
+            'resource': {'attributes': attributes({'service.name': self.service})},
+            'scopeSpans': [{'scope': {'name': 'src.tracing'}, 'spans': spans}],
+        }]}
+
+
+    async def close(self) -> None:
+        if self.flush_task:
+            self.flush_task.cancel()
+        await self.flush()
+
+
+# the one tracer of the bot - configured on startup (see main.py)
+tracer = Tracer()
@@ -0,0 +1,131 @@
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+import uuid
+from datetime import datetime, timezone
+
+import pytz
+
+from src.wrapper.database_wrapper import DatabaseWrapper, DBUser, Reminder
+
+
+# Moves the 'users' and 'reminder' relations between databases (of any backend), e.g. for a backup or a switch of the hosting.
+#   python -m src.transfer export backup.jsonl [--database-url URL]
+#   python -m src.transfer import backup.jsonl [--database-url URL] [--batch-size N]
+# The file holds one compact json array per line, users first, so that the reminders can refer to them:
+#   ["u", user_id, username, discriminator, time_zone]
+#   ["r", id, user_id, channel_id, due date (UTC epoch seconds), memo, recurrence]
+# Both directions stream the data, so the memory usage only depends on the batch size, never on the size of the relations.
+
+
+def user_line(user: DBUser) -> list:
+    return ['u', user.id, user.name, user.hash, user.tz]
+
+
+def reminder_line(rem: Reminder) -> list:
+    return ['r', str(rem.rem_id), rem.user_id, rem.channel_id, rem.due_date.timestamp(), rem.memo, rem.recurrence]
+
+
+# turns a line of the file back into a user entry or reminder, raising a ValueError for anything that doesn't fit the schema
+def parse_line(line: str) -> DBUser | Reminder:
+    match json.loads(line):
+        case ['u', int(user_id), str() | None as name, str() | None as discriminator, str() | None as time_zone]:
+            # a timezone which pytz doesn't know would break every reminder of the user, so it is dropped (and asked for again)
+            if time_zone is not None and time_zone not in pytz.all_timezones_set:
+                raise InvalidTimezone(DBUser(user_id, name, discriminator, None), time_zone)
+            return DBUser(user_id, name, discriminator, time_zone)
+        case ['r', str(rem_id), int(user_id), int(channel_id), int() | float() as due_date, str() | None as memo,
+              str() | None as recurrence]:
+            return Reminder(uuid.UUID(rem_id), user_id, channel_id, datetime.fromtimestamp(due_date, timezone.utc), memo, recurrence)
+    raise ValueError('not a valid user or reminder record')
+
+
+class InvalidTimezone(ValueError):
+
+    def __init__(self, user: DBUser, time_zone: str):
+        super().__init__(f"unknown timezone '{time_zone}' of user {user.id} was dropped")
+        self.user = user
+
+
+async def export(db: DatabaseWrapper, path: str) -> None:
+    counts = {'users': 0, 'reminders': 0}
+    with open(path, 'w', encoding='utf-8') as file:
+        async for user in db.export_users():
+            if user.tz is not None and user.tz not in pytz.all_timezones_set:
+                log(f"warning: user {user.id} has the unknown timezone '{user.tz}', it won't survive an import")
+            file.write(json.dumps(user_line(user), ensure_ascii=False, separators=(',', ':')) + '\n')
+            counts['users'] += 1
+        async for rem in db.export_reminders():
+            file.write(json.dumps(reminder_line(rem), ensure_ascii=False, separators=(',', ':')) + '\n')
+            counts['reminders'] += 1
+    log(f"exported {counts['users']} users and {counts['reminders']} reminders to {path}")
+
+
+async def restore(db: DatabaseWrapper, path: str, batch_size: int) -> None:
+    batches: dict[type, list] = {DBUser: [], Reminder: []}
+    inserted = {DBUser: 0, Reminder: 0}
+    imports = {DBUser: db.import_users, Reminder: db.import_reminders}
+    total, skipped = 0, 0
+
+    async def flush(kind: type):
+        # the users go in first, in case the reminders refer to them with a foreign key
+        if kind is Reminder and batches[DBUser]:
+            await flush(DBUser)
+        inserted[kind] += await imports[kind](batches[kind])
+        batches[kind].clear()
+
+    with open(path, encoding='utf-8') as file:
+        for number, line in enumerate(file, start=1):
+            if not line.strip():
+                continue
+            total += 1
+            try:
+                record = parse_line(line)
+            except InvalidTimezone as exp:
+                log(f'line {number}: {exp}')
+                record = exp.user
+            except (ValueError, TypeError) as exp:
+                log(f'line {number}: skipped ({exp})')
+                skipped += 1
+                continue
+
+            batches[type(record)].append(record)
+            if len(batches[type(record)]) >= batch_size:
+                await flush(type(record))
+
+    for kind in batches:
+        if batches[kind]:
+            await flush(kind)
+    log(f'read {total} records from {path}: {inserted[DBUser]} new users, {inserted[Reminder]} new reminders, '
+        f'{skipped} invalid records skipped (the rest existed already)')
+
+
+def log(text: str) -> None:
+    print(text, file=sys.stderr)
+
+
+async def main(args: argparse.Namespace) -> None:
+    db = await DatabaseWrapper.connect(args.database_url)
+    try:
+        await db.migrate()
+        start = time.perf_counter()
+        if args.command == 'export':
+            await export(db, args.file)
+        else:
+            await restore(db, args.file, args.batch_size)
+        log(f'done in {time.perf_counter() - start:.2f} s')
+    finally:
+        await db.close()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(prog='python -m src.transfer', description='Bulk export and import of users and reminders')
+    parser.add_argument('command', choices=['export', 'import'])
+    parser.add_argument('file', help='line-delimited json file to write to (export) or read from (import)')
+    parser.add_argument('--database-url', default=os.environ.get("DATABASE_URL", None),
+                        help='postgres://, sqlite:/// or memory:// url (default: $DATABASE_URL)')
+    parser.add_argument('--batch-size', type=int, default=5000, help='records inserted with one bulk copy (default: 5000)')
+    asyncio.run(main(parser.parse_args()))
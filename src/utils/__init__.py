@@ -1,4 +1,16 @@
-__all__ = ['UserInteractionHandler', 'TimeHandler']
+__all__ = ['UserInteractionHandler', 'TimeHandler', 'TimeService', 'ConversationRouter', 'ConversationStore', 'ReminderViewCache', 'TimeParser', 'RecipientResolver', 'Diagnostics', 'LoopMonitor', 'RateLimiter', 'TaskSupervisor', 'Job', 'TimezoneIndex', 'SlashCommands']
 
 from src.utils.user_interaction_handler import UserInteractionHandler
 from src.utils.time_handler import TimeHandler
+from src.utils.time_parser import TimeParser
+from src.utils.time_service import TimeService
+from src.utils.conversation_router import ConversationRouter
+from src.utils.conversation_store import ConversationStore
+from src.utils.reminder_cache import ReminderViewCache
+from src.utils.recipient_resolver import RecipientResolver
+from src.utils.diagnostics import Diagnostics
+from src.utils.loop_monitor import LoopMonitor
+from src.utils.rate_limiter import RateLimiter
+from src.utils.task_supervisor import TaskSupervisor, Job
+from src.utils.timezone_index import TimezoneIndex
+from src.utils.slash_commands import SlashCommands
@@ -0,0 +1,53 @@
+import asyncio
+import discord as d
+from typing import Awaitable
+
+
+# Hands incoming messages directly to the conversation that is waiting for them. With bot.wait_for, every pending
+# conversation would have to check every single incoming message - here it's just one dictionary lookup per message.
+class ConversationRouter:
+
+    def __init__(self):
+        # futures of the conversations waiting for an answer, keyed by (user_id, channel_id)
+        self.waiters: dict[tuple[int, int], list[asyncio.Future]] = {}
+
+
+    # passes a message on to the conversation(s) waiting for it and returns whether the message was consumed that way
+    def dispatch(self, message: d.Message) -> bool:
+        # messages without text (image, gif) are no answer to anything
+        if not message.content:
+            return False
+
+        waiters = self.waiters.pop((message.author.id, message.channel.id), None)
+        if not waiters:
+            return False
+
+        for future in waiters:
+            if not future.done():
+                future.set_result(message)
+        return True
+
+
+    # waits for the next message of the given user in the given channel; may throw an asyncio.TimeoutError(!)
+    # <prepare> (e.g. persisting the conversation) is awaited after the conversation has been registered, so that even
+    # an answer which arrives in the meantime is routed to it
+    async def listen(self, user_id: int, channel_id: int, timeout: float | None, prepare: Awaitable | None = None) -> d.Message:
+        key = (user_id, channel_id)
+        future = asyncio.get_running_loop().create_future()
+        self.waiters.setdefault(key, []).append(future)
+
+        try:
+            if prepare is not None:
+                await prepare
+            return await asyncio.wait_for(future, timeout=timeout)
+        finally:
+            # make sure that no stale future remains after a timeout
+            waiters = self.waiters.get(key)
+            if waiters and future in waiters:
+                waiters.remove(future)
+                if not waiters:
+                    del self.waiters[key]
+
+
+    def __len__(self):
+        return sum(len(waiters) for waiters in self.waiters.values())
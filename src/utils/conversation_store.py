@@ -0,0 +1,39 @@
+import json
+
+
+# Persists the state of ongoing conversations (e.g. a pending confirmation), so that they survive a restart of the bot.
+# Only the keys of the pending conversations are kept in memory - the state itself is fetched lazily, as soon as the
+# user's next message arrives.
+class ConversationStore:
+
+    def __init__(self, database):
+        self.db = database
+        self.pending: set[tuple[int, int]] = set()    # (user_id, channel_id) of every persisted conversation
+
+
+    # load the keys of all conversations which were still pending when the bot shut down
+    async def load(self) -> None:
+        self.pending = set(await self.db.fetch_conversation_keys())
+
+
+    def is_pending(self, user_id: int, channel_id: int) -> bool:
+        return (user_id, channel_id) in self.pending
+
+
+    async def save(self, user_id: int, channel_id: int, state: dict, timeout: float) -> None:
+        # the state is stored as compact json without any whitespace
+        await self.db.save_conversation(user_id, channel_id, json.dumps(state, separators=(',', ':')), timeout)
+        self.pending.add((user_id, channel_id))
+
+
+    async def discard(self, user_id: int, channel_id: int) -> None:
+        if (user_id, channel_id) in self.pending:
+            self.pending.remove((user_id, channel_id))
+            await self.db.delete_conversation(user_id, channel_id)
+
+
+    # removes a persisted conversation and returns its state, unless it has already expired
+    async def take(self, user_id: int, channel_id: int) -> dict | None:
+        self.pending.discard((user_id, channel_id))
+        state = await self.db.pop_conversation(user_id, channel_id)
+        return json.loads(state) if state else None
@@ -0,0 +1,142 @@
+import asyncio
+import os
+import re
+import tracemalloc
+from collections import Counter
+from datetime import datetime
+
+import discord as d
+
+from src.utils.time_handler import TimeHandler
+from src.utils.time_parser import TimeParser
+
+
+# Runtime insight into the memory of the long-running bot process: tracemalloc snapshots (and the difference between two
+# of them), the live asyncio tasks and the size of every cache, either in discord.py or in the bot itself.
+# Every method returns a plain text report, which the bot then posts into the debug channel or writes to a file.
+class Diagnostics:
+    # allocations done by tracemalloc or the import machinery itself aren't of interest
+    filters = [tracemalloc.Filter(False, tracemalloc.__file__), tracemalloc.Filter(False, '<frozen importlib._bootstrap*>'),
+               tracemalloc.Filter(False, '<unknown>')]
+
+    def __init__(self, bot: d.Client, max_snapshots: int = 5, directory: str = 'diagnostics'):
+        self.bot = bot
+        self.max_snapshots = max_snapshots
+        self.directory = directory
+        self.snapshots: list[tuple[datetime, tracemalloc.Snapshot]] = []   # oldest first
+
+
+    @property
+    def tracing(self) -> bool:
+        return tracemalloc.is_tracing()
+
+
+    def start(self, frames: int = 1) -> str:
+        if tracemalloc.is_tracing():
+            return f'tracemalloc is already tracing {tracemalloc.get_traceback_limit()} frame(s) per allocation'
+        tracemalloc.start(frames)
+        return f'tracemalloc started with {frames} frame(s) per allocation'
+
+
+    def stop(self) -> str:
+        tracemalloc.stop()
+        self.snapshots.clear()   # snapshots can't be compared to anything traced after a restart anyway
+        return 'tracemalloc stopped, all snapshots were discarded'
+
+
+    def snapshot(self) -> str:
+        if not tracemalloc.is_tracing():
+            return 'tracemalloc is not tracing - start it first'
+
+        self.snapshots.append((datetime.now(), tracemalloc.take_snapshot().filter_traces(self.filters)))
+        if len(self.snapshots) > self.max_snapshots:
+            self.snapshots.pop(0)
+        taken_at, snapshot = self.snapshots[-1]
+        size = sum(stat.size for stat in snapshot.statistics('filename'))
+        return f'Snapshot #{len(self.snapshots)} taken at {taken_at:%H:%M:%S}: {size / 2 ** 20:.1f} MiB traced'
+
+
+    # compares the latest snapshot with the one before it (a new snapshot is taken, if there is only a single one)
+    def diff(self, top: int = 15) -> str:
+        if len(self.snapshots) < 2:
+            summary = self.snapshot()
+            if len(self.snapshots) < 2:
+                return summary
+
+        (old_time, old), (new_time, new) = self.snapshots[-2:]
+        stats = new.compare_to(old, self.__grouping())[:top]
+        lines = [f'Allocation changes {old_time:%H:%M:%S} -> {new_time:%H:%M:%S}:']
+        lines += [f'{stat.size_diff / 1024:>+10.1f} KiB {stat.count_diff:>+8} blocks  {self.__location(stat.traceback)}' for stat in stats]
+        return '\n'.join(lines)
+
+
+    def top(self, top: int = 15) -> str:
+        if not tracemalloc.is_tracing():
+            return 'tracemalloc is not tracing - start it first'
+
+        snapshot = tracemalloc.take_snapshot().filter_traces(self.filters)
+        current, peak = tracemalloc.get_traced_memory()
+        lines = [f'Top allocation sites ({current / 2 ** 20:.1f} MiB traced, peak {peak / 2 ** 20:.1f} MiB):']
+        lines += [f'{stat.size / 1024:>10.1f} KiB {stat.count:>8} blocks  {self.__location(stat.traceback)}'
+                  for stat in snapshot.statistics(self.__grouping())[:top]]
+        return '\n'.join(lines)
+
+
+    # live asyncio tasks, counted by name (numbers are stripped, so e.g. every 'Task-123' ends up as 'Task-#')
+    @staticmethod
+    def tasks() -> str:
+        counts = Counter(re.sub(r'\d+', '#', task.get_name()) for task in asyncio.all_tasks())
+        lines = [f'{sum(counts.values())} asyncio tasks:']
+        lines += [f'{count:>6}  {name}' for name, count in counts.most_common()]
+        return '\n'.join(lines)
+
+
+    def caches(self) -> str:
+        bot = self.bot
+        sizes = {
+            'guilds': len(bot.guilds),
+            'users': len(bot.users),
+            'members': sum(len(guild.members) for guild in bot.guilds),
+            'private channels': len(bot.private_channels),
+            'messages': len(bot.cached_messages),
+            'pending conversations': len(bot.conversations),
+            'reminder views': len(bot.reminder_views.entries),
+            'resolved recipients': len(bot.recipients.users),
+            'resolved dm channels': len(bot.recipients.dm_channels),
+            'rate limit buckets': len(bot.rate_limiter),
+            'running jobs': len(bot.jobs),
+            'parsed time expressions': TimeParser.parse.cache_info().currsize,
+            'resolved timestamps': len(TimeHandler.timestamp_cache),
+        }
+        lines = ['Cache sizes (entries):']
+        lines += [f'{size:>8}  {name}' for name, size in sizes.items()]
+        return '\n'.join(lines)
+
+
+    def status(self) -> str:
+        if tracemalloc.is_tracing():
+            current, peak = tracemalloc.get_traced_memory()
+            tracing = f'tracemalloc: {current / 2 ** 20:.1f} MiB traced, peak {peak / 2 ** 20:.1f} MiB, {len(self.snapshots)} snapshot(s)'
+        else:
+            tracing = 'tracemalloc: off'
+        return '\n\n'.join([tracing, self.tasks(), self.caches()])
+
+
+    # writes a report into a new file of the diagnostics directory and returns its path
+    def write(self, report: str) -> str:
+        os.makedirs(self.directory, exist_ok=True)
+        path = os.path.join(self.directory, f'diagnostics-{datetime.now():%Y%m%d-%H%M%S-%f}.txt')
+        with open(path, 'w', encoding='utf-8') as file:
+            file.write(report + '\n')
+        return path
+
+
+    # group by line, unless more than one frame is traced - then whole tracebacks are far more telling
+    @staticmethod
+    def __grouping() -> str:
+        return 'traceback' if tracemalloc.get_traceback_limit() > 1 else 'lineno'
+
+
+    @staticmethod
+    def __location(traceback: tracemalloc.Traceback) -> str:
+        return ' <- '.join(f'{os.path.basename(frame.filename)}:{frame.lineno}' for frame in reversed(traceback))
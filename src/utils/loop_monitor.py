@@ -0,0 +1,103 @@
+import asyncio
+import sys
+import threading
+import time
+import traceback as tb
+from collections import deque
+from dataclasses import dataclass
+from logging import Logger
+
+
+# what was running on the event loop while it was blocked
+@dataclass(frozen=True)
+class Stall:
+    started: float          # time.time() of the last tick before the stall
+    duration: float         # seconds the loop has been blocked when the sample was taken
+    task: str               # name and coroutine of the task that was running
+    stack: str              # formatted stack of the main thread
+
+
+# Measures how late the event loop runs its callbacks. A task ticks at a fixed interval and records how much later than
+# scheduled it woke up; anything that blocks the loop (CPU-heavy work, blocking IO) shows up as lag.
+# Since a blocked loop can't report on itself, a watchdog thread checks the ticks as well: as soon as the loop has been
+# unresponsive for longer than the threshold, it samples the stack of the main thread and the asyncio task that is running.
+class LoopMonitor:
+
+    def __init__(self, logger: Logger, threshold: float = 0.25, interval: float = 0.1, max_stalls: int = 20):
+        self.log = logger
+        self.threshold = threshold      # seconds of lag which count as a stall
+        self.interval = interval        # seconds between two ticks
+        self.stalls: deque[Stall] = deque(maxlen=max_stalls)     # the latest stalls, oldest first
+        self.max_lag = 0.0              # highest lag since the last summary
+        self.total_lag = 0.0
+        self.ticks = 0
+        self.__last_tick = time.monotonic()
+        self.__stall_reported = False
+        self.__loop: asyncio.AbstractEventLoop | None = None
+        self.__main_thread = threading.main_thread().ident
+        self.__stopped = threading.Event()
+
+
+    async def run(self):
+        self.__loop = asyncio.get_running_loop()
+        # the monitor is created long before it runs (e.g. before the login), which mustn't count as a stall
+        self.__last_tick = time.monotonic()
+        self.__stall_reported = False
+        self.__stopped.clear()
+        watchdog = threading.Thread(target=self.__watch, name='loop_monitor', daemon=True)
+        watchdog.start()
+
+        try:
+            while True:
+                scheduled = self.__loop.time() + self.interval
+                await asyncio.sleep(self.interval)
+                lag = max(self.__loop.time() - scheduled, 0.0)
+
+                self.__last_tick = time.monotonic()
+                self.__stall_reported = False
+                self.ticks += 1
+                self.total_lag += lag
+                self.max_lag = max(self.max_lag, lag)
+                if lag >= self.threshold:
+                    self.log.warning(f'LoopMonitor: the event loop was blocked for {lag * 1000:.0f} ms')
+        finally:
+            # once the ticks stop (e.g. on shutdown), the thread would take the quiet loop for a stall
+            self.__stopped.set()
+            watchdog.join()
+
+
+    # average and maximum lag since the last summary
+    def summary(self) -> str:
+        average = self.total_lag / self.ticks if self.ticks else 0.0
+        lines = [f'Event loop lag: {average * 1000:.1f} ms on average, {self.max_lag * 1000:.1f} ms at most ({self.ticks} ticks), '
+                 f'{len(self.stalls)} recent stall(s)']
+        lines += [f'  {time.strftime("%H:%M:%S", time.localtime(stall.started))} {stall.duration * 1000:>7.0f} ms  {stall.task}'
+                  for stall in self.stalls]
+        self.max_lag, self.total_lag, self.ticks = 0.0, 0.0, 0
+        return '\n'.join(lines)
+
+
+    def __watch(self):
+        while not self.__stopped.wait(self.interval):
+            blocked = time.monotonic() - self.__last_tick - self.interval
+            # only sample once per stall, right after it crossed the threshold
+            if blocked < self.threshold or self.__stall_reported:
+                continue
+            self.__stall_reported = True
+
+            stall = self.__sample(blocked)
+            self.stalls.append(stall)
+            self.log.warning(f'LoopMonitor: the event loop is blocked for {blocked * 1000:.0f} ms by {stall.task}\n{stall.stack}')
+
+
+    def __sample(self, blocked: float) -> Stall:
+        frame = sys._current_frames().get(self.__main_thread)
+        stack = ''.join(tb.format_stack(frame, limit=12)) if frame else '(no stack available)'
+
+        task = asyncio.current_task(self.__loop)
+        if task:
+            coro = task.get_coro()
+            running = f"task '{task.get_name()}' ({getattr(coro, '__qualname__', coro)})"
+        else:
+            running = 'a callback outside of any task'
+        return Stall(time.time() - blocked - self.interval, blocked, running, stack)
@@ -0,0 +1,87 @@
+import time
+from collections import OrderedDict
+
+
+# Token buckets per user and per guild, for every cost class of commands. A command takes one token from the bucket of its
+# user and from the bucket of its guild; it is refused if either of them is empty. Buckets refill continuously at their rate.
+# A bucket that has been idle long enough to be full again is no different from a missing one, so those are evicted,
+# and the number of buckets is capped on top of that - the memory stays bounded no matter how many users write commands.
+class RateLimiter:
+    # cost class -> scope -> (capacity, tokens per second)
+    limits: dict[str, dict[str, tuple[float, float]]] = {
+        'light': {'user': (5, 1 / 2), 'guild': (20, 2)},              # answers straight from memory, e.g. help
+        'database': {'user': (5, 1 / 12), 'guild': (30, 1 / 2)},      # database writes and fuzzy searches, e.g. remindme
+        'heavy': {'user': (2, 1 / 30), 'guild': (4, 1 / 15)},         # lots of discord requests, e.g. spam or delete
+    }
+    # commands that aren't listed here are 'light'
+    costs: dict[str, str] = {
+        'remindme': 'database',
+        'timezone': 'database',
+        'spam': 'heavy',
+        'delete': 'heavy',
+    }
+
+    def __init__(self, max_buckets: int = 10000, enabled: bool = True):
+        self.max_buckets = max_buckets
+        self.enabled = enabled
+        # (scope, user or guild id, cost class) -> [tokens, time of the last refill, refusal already announced], least recently used first
+        self.buckets: OrderedDict[tuple[str, int, str], list] = OrderedDict()
+
+
+    # takes a token for the command and returns (0.0, False) if it may run - otherwise the seconds until it may run again and
+    # whether this is the first refusal since the user's last successful command (so that they are told only once)
+    def acquire(self, command: str, user_id: int, guild_id: int | None) -> tuple[float, bool]:
+        if not self.enabled:
+            return 0.0, False
+
+        cost_class = self.costs.get(command, 'light')
+        now = time.monotonic()
+        self.__evict_idle(now)
+
+        keys = [('user', user_id, cost_class)] + ([('guild', guild_id, cost_class)] if guild_id else [])
+        buckets = [self.__refill(key, now) for key in keys]
+        retry_after = max((1 - bucket[0]) / self.limits[cost_class][scope][1] for (scope, _, _), bucket in zip(keys, buckets))
+
+        user_bucket = buckets[0]
+        if retry_after > 0:
+            first_refusal = not user_bucket[2]
+            user_bucket[2] = True
+            return retry_after, first_refusal
+
+        for bucket in buckets:
+            bucket[0] -= 1
+        user_bucket[2] = False
+        return 0.0, False
+
+
+    def __refill(self, key: tuple[str, int, str], now: float) -> list:
+        scope, _, cost_class = key
+        capacity, rate = self.limits[cost_class][scope]
+
+        bucket = self.buckets.get(key)
+        if bucket is None:
+            bucket = self.buckets[key] = [capacity, now, False]
+            if len(self.buckets) > self.max_buckets:
+                self.buckets.popitem(last=False)
+        else:
+            bucket[0] = min(capacity, bucket[0] + (now - bucket[1]) * rate)
+            bucket[1] = now
+            self.buckets.move_to_end(key)
+        return bucket
+
+
+    # drops the least recently used buckets as long as they have had enough time to fill up again (a few per call at most)
+    def __evict_idle(self, now: float, limit: int = 8):
+        for _ in range(limit):
+            if not self.buckets:
+                return
+            key, (tokens, last_refill, _) = next(iter(self.buckets.items()))
+            scope, _, cost_class = key
+            capacity, rate = self.limits[cost_class][scope]
+            if tokens + (now - last_refill) * rate < capacity:
+                return
+            del self.buckets[key]
+
+
+    def __len__(self):
+        return len(self.buckets)
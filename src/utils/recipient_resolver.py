@@ -0,0 +1,79 @@
+import asyncio
+import discord as d
+from collections import OrderedDict
+from typing import Iterable
+
+from src.wrapper.database_wrapper import Reminder
+
+
+# Resolves user ids to user objects and reminders to the channel they are sent to. Without the member cache (see the 'minimal'
+# gateway profile) discord.py doesn't know most users, so those are fetched from the API on demand and kept in a small LRU cache.
+# The dm channels of reminders are cached the same way, and resolved ahead of time for the reminders that are due soon
+# (see prefetch), so that delivering a reminder at its due time takes nothing but the send itself.
+class RecipientResolver:
+
+    def __init__(self, bot: d.Client, max_users: int = 256, max_channels: int = 256):
+        self.bot = bot
+        self.max_users = max_users
+        self.max_channels = max_channels
+        self.users: OrderedDict[int, d.User] = OrderedDict()
+        self.dm_channels: OrderedDict[int, d.DMChannel] = OrderedDict()     # user id -> dm channel
+
+
+    async def user(self, user_id: int) -> d.User | None:
+        # users that discord.py has cached anyway (e.g. because they just wrote a message)
+        user = self.bot.get_user(user_id)
+        if user:
+            return user
+
+        user = self.users.get(user_id)
+        if user:
+            self.users.move_to_end(user_id)
+            return user
+
+        try:
+            user = await self.bot.fetch_user(user_id)
+        except d.NotFound:
+            return None     # the account doesn't exist anymore
+
+        self.__remember(self.users, user_id, user, self.max_users)
+        return user
+
+
+    # the channel of a reminder: a guild channel, or the dm channel with its user - None if the user doesn't exist anymore
+    async def channel(self, channel_id: int, user_id: int) -> d.abc.Messageable | None:
+        # this only works for guild channels (and dm channels discord.py happens to know)
+        chat = self.bot.get_channel(channel_id)
+        if chat:
+            return chat
+
+        chat = self.dm_channels.get(user_id)
+        if chat:
+            self.dm_channels.move_to_end(user_id)
+            return chat
+
+        # in case we don't have a dm chat with that user yet, we need to create one
+        user = await self.user(user_id)
+        if not user:
+            return None
+        chat = await user.create_dm()
+        self.__remember(self.dm_channels, user_id, chat, self.max_channels)
+        return chat
+
+
+    # resolves the channels of the given reminders concurrently, a batch at a time so that the requests don't pile up at discord;
+    # a reminder whose channel can't be resolved now is simply tried again at its due time
+    async def prefetch(self, reminders: Iterable[Reminder], batch_size: int = 10) -> int:
+        targets = list({(rem.channel_id, rem.user_id) for rem in reminders
+                        if not self.bot.get_channel(rem.channel_id) and rem.user_id not in self.dm_channels})
+        for start in range(0, len(targets), batch_size):
+            await asyncio.gather(*(self.channel(channel_id, user_id) for channel_id, user_id in targets[start:start + batch_size]),
+                                 return_exceptions=True)
+        return len(targets)
+
+
+    @staticmethod
+    def __remember(cache: OrderedDict, key: int, value, limit: int):
+        cache[key] = value
+        if len(cache) > limit:
+            cache.popitem(last=False)
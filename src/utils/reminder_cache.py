@@ -0,0 +1,67 @@
+import time
+import discord as d
+from collections import OrderedDict
+from datetime import datetime, timezone
+
+from src.wrapper.database_wrapper import Reminder
+
+
+# Caches the upcoming reminders of every guild (and of every user, for dm channels) together with the embed rendered from them,
+# so that repeatedly showing (and then deleting) reminders doesn't need to query the database every time.
+# Entries are invalidated whenever a reminder of their guild or user is created, deleted or delivered.
+class ReminderViewCache:
+
+    def __init__(self, ttl: float = 300.0, max_entries: int = 1000):
+        self.ttl = ttl                  # max seconds an entry is kept, as a safety net for changes that bypass the invalidation
+        self.max_entries = max_entries
+        # ('guild', guild_id) or ('user', user_id) -> (time of caching, upcoming reminders, rendered embed)
+        self.entries: OrderedDict[tuple[str, int], tuple[float, list[Reminder], d.Embed | None]] = OrderedDict()
+
+
+    @staticmethod
+    def key(guild: d.Guild | None, user: d.abc.User) -> tuple[str, int]:
+        return ('guild', guild.id) if guild else ('user', user.id)
+
+
+    def get_reminders(self, key: tuple[str, int]) -> list[Reminder] | None:
+        entry = self.__get(key)
+        return entry[1] if entry else None
+
+
+    def get_embed(self, key: tuple[str, int]) -> d.Embed | None:
+        entry = self.__get(key)
+        return entry[2] if entry else None
+
+
+    def put_reminders(self, key: tuple[str, int], reminders: list[Reminder]) -> None:
+        self.entries[key] = (time.monotonic(), reminders, None)
+        self.entries.move_to_end(key)
+        if len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+
+    def put_embed(self, key: tuple[str, int], embed: d.Embed) -> None:
+        if key in self.entries:
+            cached_at, reminders, _ = self.entries[key]
+            self.entries[key] = (cached_at, reminders, embed)
+
+
+    # drops the views of the given guild and the given user
+    def invalidate(self, guild_id: int = None, user_id: int = None) -> None:
+        self.entries.pop(('guild', guild_id), None)
+        self.entries.pop(('user', user_id), None)
+
+
+    def __get(self, key: tuple[str, int]) -> tuple[float, list[Reminder], d.Embed | None] | None:
+        entry = self.entries.get(key)
+        if not entry:
+            return None
+
+        cached_at, reminders, _ = entry
+        # as soon as the first reminder in the view is due, the view is outdated
+        if time.monotonic() - cached_at > self.ttl or (reminders and reminders[0].due_date <= datetime.now(timezone.utc)):
+            del self.entries[key]
+            return None
+
+        self.entries.move_to_end(key)
+        return entry
@@ -0,0 +1,116 @@
+import hashlib
+import json
+import discord as d
+from discord import app_commands
+
+from src.localization.quote_server import QuoteServer as Quotes
+from src.tracing import tracer
+from src.utils.task_supervisor import Job
+from src.utils.timezone_index import TimezoneIndex
+from src.wrapper.interaction_container import InteractionContainer
+
+
+# Slash commands for help, remindme, timezone, delete and spam, next to the prefix commands. Discord parses their options
+# (and sends them along with the interaction) instead of the bot parsing every message of every guild, so a bot that only
+# uses these doesn't need the message content intent at all (see the 'slash' gateway profile).
+# Every slash command is turned into the text of its prefix command (see InteractionContainer) and runs through the same
+# handler, with the same rate limits and jobs.
+class SlashCommands:
+    setting_key = 'slash_commands_hash'
+
+    def __init__(self, bot, timezones: TimezoneIndex, guild_id: int | None = None):
+        self.bot = bot
+        self.timezones = timezones
+        # commands of a single guild are updated instantly, global ones may take up to an hour - handy for testing
+        self.guild: d.Object | None = d.Object(guild_id) if guild_id else None
+        self.tree = app_commands.CommandTree(bot)
+        self.__register()
+
+
+    # registers the commands with discord, unless exactly the same commands have been registered before: discord rate limits
+    # the registration heavily, so it only happens when the hash of the commands differs from the one stored in the database
+    async def sync(self) -> bool:
+        if self.guild:
+            self.tree.copy_global_to(guild=self.guild)
+        commands = [command.to_dict() for command in self.tree.get_commands(guild=self.guild)]
+        scope = {'application': self.bot.application_id, 'guild': self.guild.id if self.guild else None}
+        digest = hashlib.sha256(json.dumps({**scope, 'commands': commands}, sort_keys=True).encode('utf-8')).hexdigest()
+
+        if await self.bot.db.fetch_setting(self.setting_key) == digest:
+            return False
+        await self.tree.sync(guild=self.guild)
+        await self.bot.db.save_setting(self.setting_key, digest)
+        return True
+
+
+    # runs the prefix command that corresponds to the slash command
+    async def __run(self, interaction: d.Interaction, command: str, arguments: str = ''):
+        if self.bot.drain_task:
+            return await interaction.response.send_message(Quotes.get_quote('slashCommands/shuttingDown').format(self.bot), ephemeral=True)
+
+        with tracer.trace('slash_command', channel=interaction.channel_id, command=command):
+            # discord only waits 3 seconds for an answer, which e.g. a database query or a fuzzy search might exceed
+            await interaction.response.defer(thinking=True)
+            msg = InteractionContainer(interaction, self.bot.db, command, arguments, prefix=self.bot.prefix)
+            try:
+                result = await self.bot.run_command(msg)
+            except Exception as exp:
+                return await self.bot.error_handler.handle(exp, msg)
+
+            # the command ended without any answer (e.g. a repeated refusal of the rate limiter), so the 'thinking' message has to go
+            if not msg.answered and not isinstance(result, Job):
+                await interaction.delete_original_response()
+
+
+    def __register(self):
+        descriptions: dict[str, str] = {name: text.format(self.bot) for name, text in Quotes.get_dict('slashCommands/descriptions').items()}
+        options: dict[str, str] = Quotes.get_dict('slashCommands/options')
+        repetitions = [app_commands.Choice(name=name, value=option) for name, option in Quotes.get_dict('slashCommands/repeat').items()]
+
+        async def complete_timezone(_: d.Interaction, current: str) -> list[app_commands.Choice[str]]:
+            return [app_commands.Choice(name=zone, value=zone) for zone in self.timezones.complete(current)]
+
+        @self.tree.command(name='help', description=descriptions['help'])
+        async def help_command(interaction: d.Interaction):
+            await self.__run(interaction, 'help')
+
+        reminders = app_commands.Group(name='remindme', description=descriptions['remindme'])
+
+        @reminders.command(name='set', description=descriptions['remindme set'])
+        @app_commands.describe(date=options['date'], time=options['time'], memo=options['memo'], repeat=options['repeat'])
+        @app_commands.choices(repeat=repetitions)
+        async def set_reminder(interaction: d.Interaction, date: str, time: str, memo: str, repeat: app_commands.Choice[str] = None):
+            # the memo is recognized by its quotes, so it mustn't contain any of its own
+            arguments = f'{date} {time} "{memo.replace(chr(34), chr(39))}"'
+            await self.__run(interaction, 'remindme', f'{arguments} {repeat.value}' if repeat else arguments)
+
+        @reminders.command(name='show', description=descriptions['remindme show'])
+        async def show_reminders(interaction: d.Interaction):
+            await self.__run(interaction, 'remindme', '-show')
+
+        @reminders.command(name='delete', description=descriptions['remindme delete'])
+        @app_commands.describe(number=options['number'])
+        async def delete_reminder(interaction: d.Interaction, number: app_commands.Range[int, 1]):
+            await self.__run(interaction, 'remindme', f'-delete {number}')
+
+        self.tree.add_command(reminders)
+
+        @self.tree.command(name='timezone', description=descriptions['timezone'])
+        @app_commands.describe(zone=options['zone'])
+        @app_commands.autocomplete(zone=complete_timezone)
+        async def timezone(interaction: d.Interaction, zone: str):
+            # anything but a known zone would start the written timezone search, which needs the message content
+            if not (known_zone := self.timezones.lookup(zone)):
+                refusal = Quotes.get_quote('slashCommands/unknownTimezone').format(self.bot, zone=zone)
+                return await interaction.response.send_message(refusal, ephemeral=True)
+            await self.__run(interaction, 'timezone', known_zone)
+
+        @self.tree.command(name='delete', description=descriptions['delete'])
+        @app_commands.describe(count=options['count'])
+        async def delete(interaction: d.Interaction, count: app_commands.Range[int, 1]):
+            await self.__run(interaction, 'delete', str(count))
+
+        @self.tree.command(name='spam', description=descriptions['spam'])
+        @app_commands.describe(count=options['count'])
+        async def spam(interaction: d.Interaction, count: app_commands.Range[int, 1]):
+            await self.__run(interaction, 'spam', str(count))
@@ -0,0 +1,81 @@
+import asyncio
+import itertools
+import time
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable
+
+from src.exceptions.errors import *
+from src.wrapper.msg_container import MsgContainer
+
+
+@dataclass()
+class Job:
+    id: int
+    command: str
+    user_id: int
+    scope: int                  # guild id, or the channel id for dm channels
+    channel_id: int
+    started: float = field(default_factory=time.time)
+    task: asyncio.Task | None = None
+    cancelled: bool = False     # cancelled by a user (as opposed to e.g. a shutdown of the bot)
+
+
+# Runs long commands (e.g. spam or delete) as tasks of their own instead of inside on_message, so that they can be listed and
+# cancelled. The number of jobs that run at the same time is capped per guild and in total, which keeps a handful of long jobs
+# from taking up every connection of the database pool and the whole outbound rate limit of the bot.
+class TaskSupervisor:
+
+    def __init__(self, max_per_guild: int = 2, max_total: int = 10):
+        self.max_per_guild = max_per_guild
+        self.max_total = max_total
+        self.jobs: dict[int, Job] = {}
+        self.__ids = itertools.count(1)
+
+
+    # starts the job in a new task - errors of the job are passed on to on_error, together with the message that started it
+    def start(self, msg: MsgContainer, command: str, job: Callable[[], Awaitable],
+              on_error: Callable[[Exception, MsgContainer], Awaitable], on_cancel: Callable[[Job], Awaitable]) -> Job:
+        scope = msg.server.id if msg.server else msg.chat.id
+        if len(self.jobs) >= self.max_total:
+            raise CapacityException(f'{len(self.jobs)} jobs are running already', cause=Cause.GLOBAL_JOB_LIMIT, limit=self.max_total)
+        if sum(1 for running in self.jobs.values() if running.scope == scope) >= self.max_per_guild:
+            raise CapacityException(f'Too many jobs are running in {scope} already', cause=Cause.GUILD_JOB_LIMIT, limit=self.max_per_guild)
+
+        entry = Job(next(self.__ids), command, msg.user.id, scope, msg.chat.id)
+        self.jobs[entry.id] = entry
+
+        async def supervise():
+            try:
+                await job()
+            except asyncio.CancelledError:
+                if not entry.cancelled:
+                    raise
+                await on_cancel(entry)
+            except Exception as exp:
+                await on_error(exp, msg)
+            finally:
+                self.jobs.pop(entry.id, None)
+
+        entry.task = asyncio.create_task(supervise(), name=f'job_{entry.id}_{command}')
+        return entry
+
+
+    # jobs of the given guild (or dm channel), oldest first
+    def running(self, scope: int) -> list[Job]:
+        return [job for job in self.jobs.values() if job.scope == scope]
+
+
+    # cancels the job with the given id, or every job of the user in the given channel if no id is given
+    def cancel(self, user_id: int, channel_id: int, job_id: int = None) -> list[Job]:
+        if job_id is not None:
+            targets = [job for job in self.jobs.values() if job.id == job_id and job.user_id == user_id]
+        else:
+            targets = [job for job in self.jobs.values() if job.user_id == user_id and job.channel_id == channel_id]
+        for job in targets:
+            job.cancelled = True
+            job.task.cancel()
+        return targets
+
+
+    def __len__(self):
+        return len(self.jobs)
@@ -1,14 +1,24 @@
-import re
-import pytz
-from datetime import datetime
-from dateutil.relativedelta import relativedelta
+import asyncio
+import itertools
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
 
 from src.exceptions.errors import *
 from src.wrapper.msg_container import MsgContainer
 from src.localization.quote_server import QuoteServer as Quotes
+from src.utils.time_parser import TimeParser, TimeExpression
+from src.utils.time_service import TimeService
+
+
+# every occurrence of a reminder is a message, so a rule (e.g. FREQ=SECONDLY, or FREQ=DAILY;BYMINUTE=0,1,2,...) mustn't post any more often
+MIN_RECURRENCE_INTERVAL = timedelta(days=1)
 
 
 class TimeHandler:
+    # resolved timestamps, keyed by (text, timezone, minute) - every parse within the same minute yields the same result anyway
+    timestamp_cache: OrderedDict[tuple[str, str, int], datetime] = OrderedDict()
+    cache_size: int = 1024
 
     def __init__(self):
         self.time_set = False
@@ -16,123 +26,128 @@ class TimeHandler:
 
 
     async def get_timestamp(self, msg: MsgContainer) -> datetime:
-        self.time_set = False
-        self.date_set = False
-
-        # reduce the text to search through to everything except the memo text
-        memo: str = self.get_memo(msg)
-        relevant_text: str = msg.text.replace(memo.casefold(), "")
-
         # get the timezone of the user to calculate their local time
         user_data = await msg.db_user
-        user_timezone = pytz.timezone(user_data.tz)
+        text = msg.original_text.strip()
+        # tokenize the text in a worker thread - resolve() then finds the parsed expression in the parser's cache
+        await asyncio.to_thread(TimeParser.parse, text)
+        return self.resolve(text, user_data.tz)
 
-        # look for absolute date and time values (e.g. '18.06.22' or '14:25')
-        timestamp = self.__get_absolute_datetime(datetime.now(user_timezone), relevant_text)
 
-        # if either date or time was not set by an absolute value, search for relative time statements
-        if not (self.date_set and self.time_set):
-            timestamp = self.__get_relative_datetime(timestamp, relevant_text)
+    # turns a reminder text into a timestamp in the given timezone
+    def resolve(self, text: str, timezone: str) -> datetime:
+        cache_key = (text, timezone, int(time.time() // 60))
+        if cache_key in self.timestamp_cache:
+            self.timestamp_cache.move_to_end(cache_key)
+            self.time_set = self.date_set = True
+            return self.timestamp_cache[cache_key]
+
+        expression: TimeExpression = TimeParser.parse(text)
+        timestamp = self.__get_datetime(TimeService.now(timezone).replace(tzinfo=None), expression)
 
         # check if reminder date and time have been made clear
         if not self.date_set:
-            raise InvalidArgumentsException(f"Could not parse reminder date from {msg.text}", cause=Cause.DATE_NOT_FOUND, goal=Goal.REMINDER_SET,
-                                            arguments=msg.text)
+            raise InvalidArgumentsException(f"Could not parse reminder date from {text}", cause=Cause.DATE_NOT_FOUND, goal=Goal.REMINDER_SET,
+                                            arguments=text)
         if not self.time_set:
-            raise InvalidArgumentsException(f"Could not parse reminder time from {msg.text}", cause=Cause.TIME_NOT_FOUND, goal=Goal.REMINDER_SET,
-                                            arguments=msg.text)
+            raise InvalidArgumentsException(f"Could not parse reminder time from {text}", cause=Cause.TIME_NOT_FOUND, goal=Goal.REMINDER_SET,
+                                            arguments=text)
 
         # at last, add timezone information to the timestamp
-        timestamp_localized = user_timezone.localize(timestamp)
+        timestamp_localized = TimeService.localize(timestamp, timezone)
+
+        # offsets in seconds or minutes would drift too far within one minute, so those results are never reused
+        if not ('seconds' in expression.offsets or 'minutes' in expression.offsets):
+            self.timestamp_cache[cache_key] = timestamp_localized
+            if len(self.timestamp_cache) > self.cache_size:
+                self.timestamp_cache.popitem(last=False)
         return timestamp_localized
 
 
     # finds the message in quotes inside the message and returns it
     @staticmethod
     def get_memo(msg: MsgContainer):
-        memo = re.search(Quotes.get_quote('timestamp/patterns/memo'), msg.original_text)
-        if memo:
-            return memo.group()
+        return TimeHandler.memo_of(msg.original_text.strip())
+
+
+    @staticmethod
+    def memo_of(text: str) -> str:
+        memo = TimeParser.parse(text).memo
+        if memo is not None:
+            return memo
         return Quotes.get_quote('reminder/noMemo')
 
 
-    def __get_absolute_datetime(self, start_timestamp: datetime, text: str) -> datetime.time:
-        date = start_timestamp.date()
-        time = start_timestamp.time()
+    # finds a recurrence option inside the message and returns the corresponding recurrence rule (RRULE syntax)
+    @staticmethod
+    def get_recurrence(msg: MsgContainer) -> str | None:
+        return TimeHandler.recurrence_of(msg.options)
 
-        # read date and time in message
-        date_match = re.search(Quotes.get_quote('timestamp/patterns/date'), text)
-        time_match = re.search(Quotes.get_quote('timestamp/patterns/time'), text)
 
-        if date_match:
-            date = self.__parse_date(date_match.group())
+    @staticmethod
+    def recurrence_of(options: list[str]) -> str | None:
+        keywords: dict[str, str] = Quotes.get_dict('timestamp/recurrence')
+        for option in options:
+            if option in keywords:
+                return keywords[option]
+
+            if option.startswith('-rrule='):
+                rule = option.removeprefix('-rrule=').upper()
+                # the rule gets re-evaluated starting from the latest occurrence every time, so a COUNT would never run out
+                if 'COUNT=' in rule:
+                    raise InvalidArgumentsException(f"Recurrence rule {rule} must not contain a COUNT", cause=Cause.INVALID_RECURRENCE,
+                                                    goal=Goal.REMINDER_SET, arguments=rule)
+                from dateutil.rrule import rrulestr     # imported on first use, to keep the startup fast
+                try:
+                    recurrence = rrulestr(rule, dtstart=datetime.now())
+                except ValueError as exp:
+                    raise InvalidArgumentsException(str(exp), cause=Cause.INVALID_RECURRENCE, goal=Goal.REMINDER_SET, arguments=rule)
+                occurrences = list(itertools.islice(recurrence, 10))
+                if any(later - earlier < MIN_RECURRENCE_INTERVAL for earlier, later in zip(occurrences, occurrences[1:])):
+                    raise InvalidArgumentsException(f"Recurrence rule {rule} occurs more often than every {MIN_RECURRENCE_INTERVAL}",
+                                                    cause=Cause.INVALID_RECURRENCE, goal=Goal.REMINDER_SET, arguments=rule)
+                return rule
+        return None
+
+
+    # computes the first occurrence of a recurring reminder after the given point in time (in the wall-clock time of the user's timezone),
+    # returns None if the recurrence rule has run out of occurrences (e.g. due to an UNTIL)
+    @staticmethod
+    def next_occurrence(recurrence: str, due_date: datetime, timezone: str, after: datetime) -> datetime | None:
+        from dateutil.rrule import rrulestr     # imported on first use, to keep the startup fast
+        timezone = timezone or Quotes.get_dict('timezone')['default']
+        local_due_date = TimeService.to_local(due_date, timezone).replace(tzinfo=None)
+        local_after = TimeService.to_local(after, timezone).replace(tzinfo=None)
+
+        next_due_date = rrulestr(recurrence, dtstart=local_due_date).after(local_after)
+        if next_due_date is None:
+            return None
+        return TimeService.localize(next_due_date, timezone)
+
+
+    def __get_datetime(self, start_timestamp: datetime, expression: TimeExpression) -> datetime:
+        # take the absolute date and time values (e.g. '18.06.22' or '14:25') if there were any
+        self.date_set = expression.date is not None
+        self.time_set = expression.time is not None
+        timestamp = datetime.combine(expression.date or start_timestamp.date(), expression.time or start_timestamp.time())
+
+        # if either date or time was not set by an absolute value, take the relative time statements into account
+        if self.date_set and self.time_set:
+            return timestamp
+
+        # keywords which explicitly take the current date/time
+        if expression.today:
             self.date_set = True
-
-        if time_match:
-            time = self.__parse_time(time_match.group())
+        if expression.now:
             self.time_set = True
 
-        return datetime.combine(date, time)
-
-
-    def __get_relative_datetime(self, start_timestamp: datetime, text: str) -> datetime:
-        time_units = ["seconds", "minutes", "hours"]
-        date_units = ["days", "weeks", "months", "years"]
-        units: dict[str, int] = {"seconds": 0, "minutes": 0, "hours": 0, "days": 0, "weeks": 0, "months": 0, "years": 0}
-
-        for unit in units:
-            # check for various patterns to describe the given unit
-            for day_pattern in Quotes.get_choices(f'timestamp/{unit}/patterns'):
-                match = re.search(day_pattern, text)
-                if match:
-                    units[unit] = int(match.group())
-
-            # check for other special keywords to describe a shift in the given unit
-            for keyword, value in Quotes.get_dict(f'timestamp/{unit}/keywords').items():
-                match = re.search(keyword, text)
-                if match:
-                    units[unit] = value
-
-        # check for date keywords which explicitly take the current date
-        for modifier in Quotes.get_choices(f'timestamp/futileKeywords/date'):
-            if modifier in text:
-                self.date_set = True
-
-        # check for time keywords which explicitly take the current time
-        for modifier in Quotes.get_choices(f'timestamp/futileKeywords/time'):
-            if modifier in text:
-                self.time_set = True
-
         # confirm the existence of a date/time unit
-        units_set = {unit: count for unit, count in units.items() if count != 0}
-        if any(unit in time_units for unit in units_set):   # checks for any common element in time_units and units_set
+        if expression.has_time_offset:
             self.time_set = True
             self.date_set = True    # if a time was set, then a date is not required
-        if any(unit in date_units for unit in units_set):   # checks for any common element in date_units and units_set
+        if expression.has_date_offset:
             self.date_set = True
 
-        # offset the start timestamp by the values of all the units which were set
-        return start_timestamp + relativedelta(**units)
-
-
-    @staticmethod
-    def __parse_date(date_str: str) -> datetime.date:
-        # if the user used '/' or '-' as a date delimiter, replace it with '.'
-        date_str = date_str.replace('/', '.')
-        date_str = date_str.replace('-', '.')
-
-        try:
-            # special case if year was given as two digits instead of four
-            if len(date_str.split('.')[2]) == 2:
-                return datetime.strptime(date_str, '%d.%m.%y').date()
-
-            return datetime.strptime(date_str, '%d.%m.%Y').date()
-        except ValueError as exp:
-            raise InvalidArgumentsException(str(exp), cause=Cause.INCORRECT_DATE, goal=Goal.REMINDER_SET, arguments=date_str)
-
-    @staticmethod
-    def __parse_time(time_str: str) -> datetime.time:
-        try:
-            return datetime.strptime(time_str, '%H:%M').time()
-        except ValueError as exp:
-            raise InvalidArgumentsException(str(exp), cause=Cause.INCORRECT_TIME, goal=Goal.REMINDER_SET, arguments=time_str)
+        # offset the timestamp by the values of all the units which were set
+        from dateutil.relativedelta import relativedelta     # imported on first use, to keep the startup fast
+        return timestamp + relativedelta(**expression.offsets)
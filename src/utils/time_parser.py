@@ -0,0 +1,163 @@
+import re
+from dataclasses import dataclass
+from datetime import datetime, date, time
+from functools import lru_cache
+
+from src.exceptions.errors import *
+from src.localization.quote_server import QuoteServer as Quotes
+
+
+TIME_UNITS = ["seconds", "minutes", "hours"]
+DATE_UNITS = ["days", "weeks", "months", "years"]
+
+
+# normalized result of parsing a reminder command - contains everything that can be read from the text alone,
+# without knowing the current time or the user's timezone
+@dataclass(frozen=True)
+class TimeExpression:
+    memo: str | None            # text in between the quotes (in its original case)
+    date: date | None           # absolute date (e.g. '18.06.22')
+    time: time | None           # absolute time (e.g. '14:25')
+    offsets: dict[str, int]     # relative shifts per unit (e.g. {'days': 2} for 'in 2 days')
+    today: bool                 # a keyword explicitly asked for the current date
+    now: bool                   # a keyword explicitly asked for the current time
+
+    @property
+    def has_time_offset(self) -> bool:
+        return any(unit in TIME_UNITS for unit in self.offsets)
+
+    @property
+    def has_date_offset(self) -> bool:
+        return any(unit in DATE_UNITS for unit in self.offsets)
+
+
+class TimeParser:
+    # one combined pattern for every kind of token, compiled on first use
+    scanner: re.Pattern = None
+    # most characters (outside the memo) that are scanned - dates, times and options never need more, but a message may have 4000
+    max_length: int = 200
+    # maps the name of every alternative in the scanner to its token kind and an optional payload (unit or keyword value)
+    tokens: dict[str, tuple[str, str | tuple[str, int] | None]] = {}
+
+
+    # tokenizes the text around the memo in a single scan and builds a TimeExpression from the tokens;
+    # results are cached, so repeated (or templated) commands are parsed for free
+    @classmethod
+    @lru_cache(maxsize=1024)
+    def parse(cls, text: str) -> TimeExpression:
+        if cls.scanner is None:
+            cls.__build_scanner()
+
+        # the memo is cut out first, so that nothing inside the quotes is mistaken for a date or time
+        memo, rest = cls.split_memo(text)
+        # checked before any regex work, so the time a parse takes is bounded no matter how long the message is
+        if len(rest) > cls.max_length:
+            raise InvalidArgumentsException(f"{len(rest)} characters outside the memo exceed the limit of {cls.max_length}",
+                                            cause=Cause.INPUT_TOO_LONG, goal=Goal.REMINDER_SET, arguments=rest[:cls.max_length])
+
+        date_value, time_value = None, None
+        offsets: dict[str, int] = {}
+        today, now = False, False
+
+        for match in cls.scanner.finditer(rest):
+            kind, payload = cls.tokens[match.lastgroup]
+            token = match.group()
+
+            match kind:
+                case 'date' if date_value is None:
+                    date_value = cls.__parse_date(token)
+                case 'time' if time_value is None:
+                    time_value = cls.__parse_time(token)
+                case 'unit' if int(token) != 0:
+                    offsets[payload] = int(token)
+                case 'keyword':
+                    unit, value = payload
+                    offsets[unit] = value
+                case 'today':
+                    today = True
+                case 'now':
+                    now = True
+
+        return TimeExpression(memo, date_value, time_value, offsets, today, now)
+
+
+    # splits the text into the memo (in between the first quote and the last quote on the same line) and everything else;
+    # two plain string searches instead of a regex, which would have to backtrack from the end of the line at every quote
+    @staticmethod
+    def split_memo(text: str) -> tuple[str | None, str]:
+        start = text.find('"')
+        while start != -1:
+            line_end = text.find('\n', start)
+            line_end = len(text) if line_end == -1 else line_end
+            end = text.rfind('"', start + 1, line_end)
+            if end != -1:
+                return text[start + 1:end], text[:start] + ' ' + text[end + 1:]
+            # a single quote on this line, so the memo (if any) starts on one of the next lines
+            start = text.find('"', line_end)
+        return None, text
+
+
+    @classmethod
+    def __build_scanner(cls):
+        alternatives: list[str] = []
+
+        def add(kind: str, pattern: str, payload=None):
+            name = f'tok{len(alternatives)}'
+            cls.tokens[name] = (kind, payload)
+            alternatives.append(f'(?P<{name}>{pattern})')
+
+        # command options (e.g. '-weekly') are consumed and ignored, because they never hold any date or time information
+        add('option', r'(?<!\S)-[^\W\d]\S*')
+        for pattern in Quotes.get_choices('timestamp/patterns/date'):
+            add('date', pattern)
+        for pattern in Quotes.get_choices('timestamp/patterns/time'):
+            add('time', pattern)
+
+        # longer (i.e. more specific) patterns are tried first, so that e.g. '5 monate' isn't read as 5 minutes;
+        # a number only matches from its first digit on and always up to its last one (a lookahead instead of a possessive
+        # quantifier, which Python only has since 3.11) - otherwise a long run of digits would be matched again from every single
+        # one of its digits, which makes the scan quadratic
+        unit_patterns = [(unit, pattern) for unit in TIME_UNITS + DATE_UNITS for pattern in Quotes.get_choices(f'timestamp/{unit}/patterns')]
+        for unit, pattern in sorted(unit_patterns, key=lambda unit_pattern: len(unit_pattern[1]), reverse=True):
+            add('unit', r'(?<![\d-])' + pattern.replace(r'\d+', r'\d+(?!\d)'), unit)
+
+        # a leading space of a keyword means that it only matches at the start of a word - as a lookbehind, so that it also
+        # matches at the very start of the text (e.g. of an entry of a bulk reminder, which is stripped)
+        def word(keyword: str, escape=False) -> str:
+            text = keyword.lstrip()
+            return (r'(?<!\S)' if text != keyword else '') + (re.escape(text) if escape else text)
+
+        keywords = [(keyword, (unit, value)) for unit in TIME_UNITS + DATE_UNITS
+                    for keyword, value in Quotes.get_dict(f'timestamp/{unit}/keywords').items()]
+        for keyword, payload in sorted(keywords, key=lambda keyword_entry: len(keyword_entry[0]), reverse=True):
+            add('keyword', word(keyword), payload)
+
+        for keyword in Quotes.get_choices('timestamp/futileKeywords/date'):
+            add('today', word(keyword, escape=True))
+        for keyword in Quotes.get_choices('timestamp/futileKeywords/time'):
+            add('now', word(keyword, escape=True))
+
+        cls.scanner = re.compile('|'.join(alternatives), re.IGNORECASE)
+
+
+    @staticmethod
+    def __parse_date(date_str: str) -> date:
+        # if the user used '/' or '-' as a date delimiter, replace it with '.'
+        date_str = date_str.replace('/', '.')
+        date_str = date_str.replace('-', '.')
+
+        try:
+            # special case if year was given as two digits instead of four
+            if len(date_str.split('.')[2]) == 2:
+                return datetime.strptime(date_str, '%d.%m.%y').date()
+
+            return datetime.strptime(date_str, '%d.%m.%Y').date()
+        except ValueError as exp:
+            raise InvalidArgumentsException(str(exp), cause=Cause.INCORRECT_DATE, goal=Goal.REMINDER_SET, arguments=date_str)
+
+    @staticmethod
+    def __parse_time(time_str: str) -> time:
+        try:
+            return datetime.strptime(time_str, '%H:%M').time()
+        except ValueError as exp:
+            raise InvalidArgumentsException(str(exp), cause=Cause.INCORRECT_TIME, goal=Goal.REMINDER_SET, arguments=time_str)
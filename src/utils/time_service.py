@@ -0,0 +1,67 @@
+import pytz
+from bisect import bisect_right
+from datetime import datetime, timedelta, tzinfo
+
+
+# Shared access to timezones for both parsing and displaying timestamps.
+# Timezone objects are only resolved once per name, and the UTC offset every zone currently has is cached until its next
+# DST transition, so converting timestamps within the current period doesn't need a lookup in the zone's transition table.
+class TimeService:
+    # interned timezone objects, keyed by their name (e.g. 'Europe/Berlin')
+    zones: dict[str, tzinfo] = {}
+    # current offset period of every zone: (start in UTC, end in UTC, UTC offset, tzinfo for exactly that offset)
+    periods: dict[str, tuple[datetime, datetime, timedelta, tzinfo]] = {}
+
+
+    @classmethod
+    def timezone(cls, name: str) -> tzinfo:
+        zone = cls.zones.get(name)
+        if zone is None:
+            zone = cls.zones[name] = pytz.timezone(name)
+        return zone
+
+
+    # the current time in the given timezone
+    @classmethod
+    def now(cls, name: str) -> datetime:
+        return cls.to_local(datetime.now(pytz.utc), name)
+
+
+    # converts a timezone-aware timestamp into the given timezone
+    @classmethod
+    def to_local(cls, timestamp: datetime, name: str) -> datetime:
+        start, end, offset, period_tz = cls.__current_period(name)
+        utc_timestamp = timestamp.astimezone(pytz.utc).replace(tzinfo=None)
+        if start <= utc_timestamp < end:
+            return (utc_timestamp + offset).replace(tzinfo=period_tz)
+        return timestamp.astimezone(cls.timezone(name))
+
+
+    # attaches the given timezone to a naive timestamp in local (wall-clock) time
+    @classmethod
+    def localize(cls, timestamp: datetime, name: str) -> datetime:
+        start, end, offset, period_tz = cls.__current_period(name)
+        # keep a safety margin of a day to the transitions, where a local time might be ambiguous or might not exist at all
+        utc_timestamp = timestamp - offset
+        if start + timedelta(days=1) <= utc_timestamp < end - timedelta(days=1):
+            return timestamp.replace(tzinfo=period_tz)
+        return cls.timezone(name).localize(timestamp)
+
+
+    @classmethod
+    def __current_period(cls, name: str) -> tuple[datetime, datetime, timedelta, tzinfo]:
+        utc_now = datetime.now(pytz.utc).replace(tzinfo=None)
+        period = cls.periods.get(name)
+        if period and period[0] <= utc_now < period[1]:
+            return period
+
+        zone = cls.timezone(name)
+        local_now = pytz.utc.localize(utc_now).astimezone(zone)
+        # zones without any DST transitions (e.g. UTC) have the same offset forever
+        transitions: list[datetime] = getattr(zone, '_utc_transition_times', None) or []
+        index = bisect_right(transitions, utc_now)
+        start = transitions[index - 1] if index > 0 else datetime.min + timedelta(days=2)
+        end = transitions[index] if index < len(transitions) else datetime.max - timedelta(days=2)
+
+        period = cls.periods[name] = (start, end, local_now.utcoffset(), local_now.tzinfo)
+        return period
@@ -0,0 +1,45 @@
+import re
+from collections import defaultdict
+from typing import Iterable
+
+
+# Answers the autocomplete requests of the timezone options. Discord sends one request per keystroke, so the zones are indexed
+# once by the first letters of every part of their name ('america', 'buenos', 'aires', ...) - a request only looks at the
+# zones behind its prefix instead of comparing itself against every zone.
+class TimezoneIndex:
+    prefix_length = 3
+    separators = re.compile(r'[/_\-+ ]+')
+
+    def __init__(self, zones: Iterable[str], default: str = None):
+        self.zones: list[str] = sorted(zones)
+        self.default = default
+        self.canonical: dict[str, str] = {zone.casefold(): zone for zone in self.zones}
+        self.by_prefix: dict[str, list[str]] = defaultdict(list)
+        for zone in self.zones:
+            words = {word for word in self.separators.split(zone.casefold()) if word}
+            for prefix in {word[:length] for word in words for length in range(1, self.prefix_length + 1)}:
+                self.by_prefix[prefix].append(zone)
+
+
+    # the correctly spelled name of a zone, no matter how it was capitalized - None if there is no such zone
+    def lookup(self, name: str) -> str | None:
+        return self.canonical.get(name.strip().casefold().replace(' ', '_'))
+
+
+    # the zones that fit what has been typed so far: zones starting with it first, then zones with a part starting with it
+    def complete(self, current: str, limit: int = 25) -> list[str]:
+        query = current.strip().casefold().replace(' ', '_')
+        if not query:
+            # nothing typed yet, so offer the default zone right at the top
+            return ([self.default] if self.default else []) + [zone for zone in self.zones if zone != self.default][:limit - 1]
+
+        first_word = next((word for word in self.separators.split(query) if word), query)
+        candidates = self.by_prefix.get(first_word[:self.prefix_length])
+        # a query from the middle of a word (e.g. 'erlin') has no prefix entry, for those every zone has to be checked
+        matches = [zone for zone in candidates or self.zones if query in zone.casefold()]
+        matches.sort(key=lambda zone: (not zone.casefold().startswith(query), not self.__has_part_starting_with(zone, query), zone))
+        return matches[:limit]
+
+
+    def __has_part_starting_with(self, zone: str, query: str) -> bool:
+        return any(word.startswith(query) for word in self.separators.split(zone.casefold()))
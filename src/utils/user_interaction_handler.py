@@ -1,23 +1,41 @@
 import asyncio
+import discord as d
 
 from src.wrapper.msg_container import MsgContainer
+from src.wrapper.interaction_container import InteractionContainer
 from src.localization.quote_server import QuoteServer as Quotes
 
 
 class UserInteractionHandler:
 
-    def __init__(self, bot, msg: MsgContainer):
+    def __init__(self, bot, msg: MsgContainer, flow: str = None):
         self.bot = bot
         self.msg = msg
         self.task_messages: int = 1     # counts the messages needed for the confirmation process in order to e.g. delete them afterwards
         self.retry_counter: int = 0     # counts the retries for a given question; the caller can set a maximum of retries
+        self.flow = flow                # name of the conversation flow - only conversations with a flow are persisted and can be resumed
+        self.state: dict = {}           # current step of the conversation plus all the data needed to resume it from there
+        self.pending_answer: str | None = None  # answer that was given while the bot was offline, before the conversation was resumed
 
 
-    async def get_confirmation(self, question: str, abort_msg: str, timeout_msg=None, retry_msg=None, enough_msg=None, retries=5) -> [bool, int]:
-        # keep all the kwargs for the recursive function call later
-        arguments = vars()
-        del arguments['self']
+    # restores a persisted conversation, taking the message that arrived after the restart as the answer to its pending question
+    @classmethod
+    def resume(cls, bot, msg: MsgContainer, state: dict) -> 'UserInteractionHandler':
+        interaction = cls(bot, msg, flow=state.pop('flow'))
+        interaction.task_messages = state.pop('tm')
+        interaction.retry_counter = state.pop('rc')
+        interaction.state = state
+        interaction.pending_answer = msg.original_text
+        return interaction
 
+
+    # remembers where the conversation currently stands, so that it can be resumed from there after a restart
+    def checkpoint(self, step: str, **data) -> None:
+        self.state = {'step': step, **data}
+
+
+    async def get_confirmation(self, question: str, abort_msg: str, timeout_msg=None, retry_msg=None, enough_msg=None, retries=5,
+                               timeout=30.0) -> [bool, int]:
         # set the default message wherever there was no message given
         if retry_msg is None:
             retry_msg = Quotes.get_quote('userInteraction/retry').format(self.bot)
@@ -26,17 +44,23 @@ class UserInteractionHandler:
         if enough_msg is None:
             enough_msg = Quotes.get_quote('userInteraction/enough').format(self.bot)
 
-        try:  # ask the user for confirmation with a predetermined question
-            await self.msg.post(question)
-            self.task_messages += 1
-            answer = await self.listen(timeout=30.0)    # listen for the next user message
+        # slash commands are answered with buttons - without the message content intent, the bot couldn't read a written answer
+        if isinstance(self.msg, InteractionContainer):
+            return await self.__confirm_with_buttons(question, abort_msg, timeout_msg, timeout)
 
-        # if you don't receive an answer until timeout, give up
-        except asyncio.TimeoutError:
-            await self.msg.post(timeout_msg)
-            return False, 0
+        # ask again until a proper answer is given
+        while True:
+            try:  # ask the user for confirmation with a predetermined question (unless it has already been asked before a restart)
+                if self.pending_answer is None:
+                    await self.msg.post(question)
+                    self.task_messages += 1
+                answer = await self.listen(timeout=timeout)    # listen for the next user message
+
+            # if you don't receive an answer until timeout, give up
+            except asyncio.TimeoutError:
+                await self.msg.post(timeout_msg)
+                return False, 0
 
-        else:
             # if the user agreed
             if answer.casefold() in Quotes.get_choices('affirmations'):
                 self.task_messages += 1
@@ -44,28 +68,44 @@ class UserInteractionHandler:
                 return True, self.task_messages
 
             # if the user rejected
-            elif answer.casefold() in Quotes.get_choices('rejections'):
+            if answer.casefold() in Quotes.get_choices('rejections'):
                 await self.msg.post(abort_msg)
                 self.task_messages += 2  # the abort_msg and the user's previous reply -> 2 messages
                 self.retry_counter = 0
                 return False, self.task_messages
 
-            # if the user responded with something weird
-            else:
-                # increment the retry counter and check if we already reached the retry limit
-                self.retry_counter += 1
-                if self.retry_counter >= retries:
-                    await self.msg.post(enough_msg)
-                    self.retry_counter = 0
-                    return False, self.task_messages + 2
+            # if the user responded with something weird, increment the retry counter and check if we already reached the retry limit
+            self.retry_counter += 1
+            if self.retry_counter >= retries:
+                await self.msg.post(enough_msg)
+                self.retry_counter = 0
+                return False, self.task_messages + 2
+
+            await self.msg.post(retry_msg)
+            self.task_messages += 2  # the retry_msg and the user's previous reply -> 2 messages
+
 
-                await self.msg.post(retry_msg)
-                self.task_messages += 2  # the retry_msg and the user's previous reply -> 2 messages
-                # call this function recursively until a proper answer is given
-                return await self.get_confirmation(**arguments)
+    # the question is the only message of this confirmation, since a click on a button doesn't leave a message behind;
+    # unlike a written answer, it can't be resumed after a restart (the interaction of a button expires with the bot)
+    async def __confirm_with_buttons(self, question: str, abort_msg: str | None, timeout_msg: str, timeout: float) -> [bool, int]:
+        buttons = ConfirmationButtons(self.msg.user.id, timeout=timeout)
+        await self.msg.post(question, view=buttons)
+        if await buttons.wait():
+            await self.msg.post(timeout_msg)
+            return False, 0
+        if not buttons.confirmed:
+            # the caller might rather explain the rejection itself
+            if abort_msg:
+                await self.msg.post(abort_msg)
+            return False, 2
+        return True, 1
 
 
     async def get_response(self, question=None, timeout_msg=None, timeout=120.0, hint_msg=None, hint_on_try=3) -> str | None:
+        # the question (and the hint) have already been posted before a restart
+        if self.pending_answer is not None:
+            return await self.listen(timeout=timeout)
+
         if question:
             # post the question
             await self.msg.post(question)
@@ -90,11 +130,63 @@ class UserInteractionHandler:
 
 
     # listen for the next message that isn't empty; may throw an asyncio.TimeoutError(!)
-    async def listen(self, timeout=None) -> str:
-        # wait for the next message of the regarded user in the regarded channel
-        message = await self.bot.wait_for("message", check=lambda ans: ans.author == self.msg.user and ans.channel == self.msg.chat, timeout=timeout)
-        # if the message's content was none (image, gif), wait again
-        if message.content is None:
-            return await self.listen()
-        # else return the text of the message
+    async def listen(self, timeout=120.0) -> str:
+        # a resumed conversation already has its answer
+        if self.pending_answer is not None:
+            answer, self.pending_answer = self.pending_answer, None
+            return answer
+
+        store = self.bot.conversation_store
+        user_id, channel_id = self.msg.user.id, self.msg.chat.id
+        persist = None
+        if self.flow:
+            # persist the conversation while waiting, in case the bot gets restarted in the meantime
+            state = {'flow': self.flow, 'tm': self.task_messages, 'rc': self.retry_counter, **self.state}
+            persist = store.save(user_id, channel_id, state, timeout)
+
+        try:
+            # wait for the next message of the regarded user in the regarded channel - the bot's router hands it over directly,
+            # even if it arrives before the conversation has been persisted
+            message = await self.bot.conversations.listen(user_id, channel_id, timeout=timeout, prepare=persist)
+        except asyncio.TimeoutError:
+            if self.flow:
+                await store.discard(user_id, channel_id)
+            raise
+        # a cancellation (e.g. on shutdown) deliberately keeps the persisted state, so only an answer discards it
+        if self.flow:
+            await store.discard(user_id, channel_id)
+
+        # return the text of the message
         return message.content
+
+
+# a yes and a no button, which only the user who was asked can click
+class ConfirmationButtons(d.ui.View):
+
+    def __init__(self, user_id: int, timeout: float):
+        super().__init__(timeout=timeout)
+        self.user_id = user_id
+        self.confirmed: bool | None = None
+        self.yes.label = Quotes.get_quote('userInteraction/buttons/yes')
+        self.no.label = Quotes.get_quote('userInteraction/buttons/no')
+
+
+    async def interaction_check(self, interaction: d.Interaction) -> bool:
+        return interaction.user.id == self.user_id
+
+
+    @d.ui.button(style=d.ButtonStyle.green)
+    async def yes(self, interaction: d.Interaction, _: d.ui.Button):
+        await self.__answer(interaction, True)
+
+
+    @d.ui.button(style=d.ButtonStyle.grey)
+    async def no(self, interaction: d.Interaction, _: d.ui.Button):
+        await self.__answer(interaction, False)
+
+
+    # removes the buttons, so the question can't be answered twice
+    async def __answer(self, interaction: d.Interaction, confirmed: bool):
+        self.confirmed = confirmed
+        self.stop()
+        await interaction.response.edit_message(view=None)
@@ -1,9 +1,12 @@
 import uuid
 import os
+import inspect
 import discord as d
+from abc import ABC, abstractmethod
 from dataclasses import dataclass
 from datetime import datetime
-from typing import Tuple
+from typing import AsyncIterator, Tuple
+from src.tracing import tracer
 
 
 @dataclass()
@@ -24,120 +27,213 @@ class Reminder:
     channel_id: int = os.environ.get("TEST_CHANNEL", None)    # defaults to 'bot' channel on my private 'SR388' server
     due_date: datetime = None
     memo: str = 'Keine Nachricht spezifiziert'
+    recurrence: str = None      # recurrence rule (RRULE syntax), only set for recurring reminders
+    time_zone: str = None       # timezone of the reminder's user, needed to compute the next occurrence of recurring reminders
 
     def __str__(self):
         return f'Reminder for user {self.user_id} at {self.due_date} (id = {self.rem_id})'
 
 
-class DatabaseWrapper:
+@dataclass()
+class PoolMetrics:
+    acquisitions: int = 0               # connections handed out by the pool
+    acquire_wait_total: float = 0.0     # total time (in seconds) spent waiting for a free connection
+    acquire_wait_max: float = 0.0       # longest wait for a free connection since the last reset
+    in_use: int = 0                     # connections currently in use
+    in_use_peak: int = 0                # most connections in use at the same time since the last reset
+    timeouts: int = 0                   # queries (or acquisitions) that ran into the timeout
+    retries: int = 0                    # reads that were retried after a connection problem
+
+    @property
+    def acquire_wait_avg(self) -> float:
+        return self.acquire_wait_total / self.acquisitions if self.acquisitions else 0.0
+
+    # start a new observation window for the peak values
+    def reset_peaks(self):
+        self.acquire_wait_max = 0.0
+        self.in_use_peak = self.in_use
+
+
+# Storage interface of the bot. Every backend stores the same relations (users, reminders and conversations) and must behave
+# the same way, so the bot never needs to know which one it is talking to. The backend is chosen by the scheme of the
+# database url (see connect):
+#   postgres://... or postgresql://...  PostgresWrapper, a connection pool to a Postgres server (the default)
+#   sqlite:///path/to/file.db           SqliteWrapper, an embedded database file (sqlite:///:memory: for a temporary one)
+#   memory://                           MemoryWrapper, plain python dicts which are lost on shutdown
+class DatabaseWrapper(ABC):
+    metrics: PoolMetrics
+
+    # every query of a backend is recorded as a span of the current trace (if there is one)
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        for name, method in list(vars(cls).items()):
+            if not name.startswith('_') and inspect.iscoroutinefunction(method):
+                setattr(cls, name, tracer.traced(f'db.{name}')(method))
+
+    # connects to the backend the url points to
+    @staticmethod
+    async def connect(url: str) -> 'DatabaseWrapper':
+        scheme = url.split('://', 1)[0].lower() if url and '://' in url else None
+        match scheme:
+            # without any url, asyncpg connects with the PG* environment variables
+            case 'postgres' | 'postgresql' | None:
+                from src.wrapper.postgres_wrapper import PostgresWrapper
+                return await PostgresWrapper.connect(url)
+            case 'sqlite':
+                from src.wrapper.sqlite_wrapper import SqliteWrapper
+                return await SqliteWrapper.connect(url)
+            case 'memory':
+                from src.wrapper.memory_wrapper import MemoryWrapper
+                return await MemoryWrapper.connect(url)
+        raise ValueError(f"Unsupported database url '{url}' - use a postgres://, sqlite:/// or memory:// url")
+
+
+    @abstractmethod
+    async def close(self) -> None: ...
+
+
+    # current utilization of the connections
+    @abstractmethod
+    def pool_stats(self) -> dict: ...
+
 
-    def __init__(self, database_connection):
-        self.database_connection = database_connection
+    # checks whether the database answers in time and returns that result along with the pool statistics
+    @abstractmethod
+    async def health(self) -> dict: ...
 
 
-    async def check_next_reminder(self) -> Tuple[datetime, int] | Tuple[None, None]:
-        next_time_data: Tuple[datetime, str] = await self.database_connection.fetchrow("""
-            SELECT MIN(rem.date_time_zone), EXTRACT(EPOCH FROM ( MIN(rem.date_time_zone) - current_timestamp) )
-            FROM reminder rem
-            WHERE rem.date_time_zone > current_timestamp;
-        """)
+    # bring the database schema up to date
+    @abstractmethod
+    async def migrate(self) -> None: ...
 
-        # apparently there are no upcoming reminders in the database atm
-        if not next_time_data:
-            return None, None
 
-        due_date, timeleft_epoch = next_time_data
-        # we add one to the time remaining because the reminders were always a fraction of a second too early
-        return due_date, int(timeleft_epoch) + 1
+    # creates the partitions of the upcoming months ahead of time - only a partitioned reminder relation has any to maintain
+    async def maintain_partitions(self) -> None:
+        pass
 
 
-    async def fetch_next_reminder(self) -> Reminder:
-        reminder_args = await self.database_connection.fetchrow("""
-            SELECT id, user_id, channel_id, date_time_zone, memo
-            FROM reminder
-            WHERE date_time_zone = (
-                SELECT MIN(rem.date_time_zone)
-                FROM reminder rem
-                WHERE rem.date_time_zone > current_timestamp
-            );
-        """)
-        # create a reminder object from the data retrieved from the database
-        return Reminder(*reminder_args)
+    # due date of the next upcoming reminder and the (rounded up) seconds until then
+    @abstractmethod
+    async def check_next_reminder(self) -> Tuple[datetime, int] | Tuple[None, None]: ...
 
 
-    async def fetch_reminders(self, channels=None, user=None) -> list[Reminder]:
-        # if a list of channels was given, only fetch reminders which are bound to one of those channels
-        channel_filter = ''
-        if channels:
-            server: str = ", ".join(channels)
-            channel_filter = f'AND rem.channel_id IN ({server})'
+    @abstractmethod
+    async def fetch_next_reminder(self) -> Reminder: ...
 
-        # if a specific user was given, only fetch reminders for that user
-        user_filter = ''
-        if user:
-            user_filter = f'AND rem.user_id = {user.id}'
 
-        reminder_args = await self.database_connection.fetch(f"""
-            SELECT id, user_id, channel_id, date_time_zone, memo
-            FROM reminder rem
-            WHERE rem.date_time_zone >= current_timestamp {channel_filter} {user_filter}
-            ORDER BY date_time_zone ASC;
-        """)
-        # create a list of Reminder objects from the data
-        reminder_list = [Reminder(*record) for record in reminder_args]
-        return reminder_list
+    # upcoming reminders, optionally only those of the given channels (ids as strings) and/or of the given user
+    @abstractmethod
+    async def fetch_reminders(self, channels=None, user=None) -> list[Reminder]: ...
+
+
+    # the next (at most <limit>) reminders that are due within the next <within> seconds
+    @abstractmethod
+    async def fetch_upcoming_reminders(self, within: float, limit: int = 100) -> list[Reminder]: ...
+
+
+    # every reminder that was due within the last <grace_period> seconds but has never been sent
+    @abstractmethod
+    async def fetch_missed_reminders(self, grace_period: float) -> list[Reminder]: ...
+
+
+    # recurring reminders that were due more than <grace_period> seconds ago - too late to be sent, but their series goes on
+    @abstractmethod
+    async def fetch_stale_reminders(self, grace_period: float) -> list[Reminder]: ...
 
 
     async def delete_reminder(self, reminder) -> None:
-        # delete reminder in database afterwards
         await self.delete_reminder_by_id(reminder.rem_id)
 
 
-    async def delete_reminder_by_id(self, reminder_id) -> None:
-        # delete reminder in database afterwards
-        await self.database_connection.execute(f"DELETE FROM reminder WHERE id = '{reminder_id}';")
+    @abstractmethod
+    async def delete_reminder_by_id(self, reminder_id) -> None: ...
+
+
+    # move a recurring reminder on to its next occurrence instead of deleting it
+    @abstractmethod
+    async def advance_reminder(self, reminder: Reminder, next_due: datetime) -> None: ...
+
+
+    @abstractmethod
+    async def delete_reminders(self, reminders: list[Reminder]) -> None: ...
+
+
+    # remove one batch of reminders that expired more than two days ago and return the number of deleted reminders -
+    # a partitioned reminder relation gets rid of whole months of expired reminders instead (see PostgresWrapper).
+    # Recurring reminders are never removed, they have to be advanced to their next occurrence (see fetch_stale_reminders)
+    @abstractmethod
+    async def clean_up_reminders(self, batch_size: int = 500) -> int: ...
+
+
+    @abstractmethod
+    async def fetch_user_entry(self, user: d.User) -> DBUser | None: ...
+
+
+    # create an entry for the user if there isn't one already
+    @abstractmethod
+    async def create_user_entry(self, user) -> None: ...
+
+
+    @abstractmethod
+    async def push_reminder(self, msg, timestamp: datetime, memo: str, recurrence: str = None) -> None: ...
+
+
+    # inserts several reminders (due date, memo, recurrence) of the message's user and channel with a single statement - all or none
+    @abstractmethod
+    async def push_reminders(self, msg, reminders: list[tuple[datetime, str, str | None]]) -> None: ...
+
+
+    @abstractmethod
+    async def update_timezone(self, user, timezone: str) -> None: ...
+
+
+    # (user id, channel id) of every conversation that hasn't expired yet
+    @abstractmethod
+    async def fetch_conversation_keys(self) -> list[tuple[int, int]]: ...
+
+
+    @abstractmethod
+    async def save_conversation(self, user_id: int, channel_id: int, state: str, timeout: float) -> None: ...
+
+
+    # delete a conversation and return its state - expired conversations are deleted as well, but None is returned for them
+    @abstractmethod
+    async def pop_conversation(self, user_id: int, channel_id: int) -> str | None: ...
+
+
+    @abstractmethod
+    async def delete_conversation(self, user_id: int, channel_id: int) -> None: ...
+
+
+    # remove conversations which nobody answered before their deadline and return their number
+    @abstractmethod
+    async def clean_up_conversations(self) -> int: ...
+
+
+    # small values the bot keeps for itself across restarts, e.g. the hash of the registered slash commands
+    @abstractmethod
+    async def fetch_setting(self, key: str) -> str | None: ...
 
 
-    # remove long expired reminders from database
-    async def clean_up_reminders(self) -> None:
-        # lösche alte Reminder, die seit mehr als zwei Tagen abgelaufen sind
-        await self.database_connection.execute("DELETE FROM reminder WHERE date_time_zone < current_timestamp - INTERVAL '2 day';")
+    @abstractmethod
+    async def save_setting(self, key: str, value: str) -> None: ...
 
 
-    async def fetch_user_entry(self, user: d.User) -> DBUser | None:
-        user_entry = await self.database_connection.fetchrow(f"""
-            SELECT user_id, username, discriminator, time_zone
-            FROM users
-            WHERE user_id = {user.id};
-        """)
-        # if no user was found
-        if not user_entry:
-            return None
-        return DBUser(*user_entry)
+    # streams every user entry, without holding the whole relation in memory
+    @abstractmethod
+    def export_users(self) -> AsyncIterator[DBUser]: ...
 
 
-    async def create_user_entry(self, user) -> None:
-        # create an entry for the sender in the users() relation if there isn't one already
-        await self.database_connection.execute(f"""
-            INSERT INTO users(user_id, username, discriminator)
-            SELECT {user.id}, '{user.name}', '{user.discriminator}'
-            WHERE NOT EXISTS (SELECT user_id FROM users WHERE user_id = {user.id});
-        """)
+    # streams every reminder (without the timezone of its user), without holding the whole relation in memory
+    @abstractmethod
+    def export_reminders(self) -> AsyncIterator[Reminder]: ...
 
 
-    async def push_reminder(self, msg, timestamp: datetime, memo: str) -> None:
-        # escape potential single quotes in the message (works in SQL by doubling up the single quotes)
-        memo = memo.replace("'", "''")
-        # write the new reminder to the database
-        await self.database_connection.execute(f"""
-            INSERT INTO reminder(id, user_id, channel_id, date_time_zone, memo)
-            VALUES(gen_random_uuid(), {msg.user.id}, {msg.chat.id}, '{timestamp}', '{memo}');
-        """)
+    # bulk inserts user entries and returns how many were new - entries of users that already exist are left as they are
+    @abstractmethod
+    async def import_users(self, users: list[DBUser]) -> int: ...
 
 
-    async def update_timezone(self, user, timezone: str) -> None:
-        await self.database_connection.execute(f"""
-            UPDATE users
-            SET time_zone = '{timezone}'
-            WHERE user_id = {user.id};
-        """)
+    # bulk inserts reminders and returns how many were new - reminders whose id already exists are skipped
+    @abstractmethod
+    async def import_reminders(self, reminders: list[Reminder]) -> int: ...
@@ -0,0 +1,47 @@
+import discord as d
+from src.tracing import tracer
+from src.wrapper.database_wrapper import DatabaseWrapper
+from src.wrapper.msg_container import MsgContainer
+
+
+# Makes a slash command look like the prefix command it stands for, so that both of them run through the very same handlers.
+# The options of the slash command are put together into the text of that prefix command (e.g. '.remindme 24.12.22 18:00 "memo"'),
+# which is then split up into the command, its words and options just like the text of a message.
+class InteractionContainer(MsgContainer):
+
+    def __init__(self, interaction: d.Interaction, database: DatabaseWrapper, command: str, arguments: str = '', prefix='.', option_prefix='-'):
+        self.interaction = interaction
+        self.id: int = interaction.id
+        self.attachments = []
+        self.reference = None
+
+        self.user = interaction.user
+        self.chat = interaction.channel
+        self.server = interaction.guild
+
+        self.original_text = f'{prefix}{command} {arguments}'.strip()
+        self.text = self.original_text.casefold()
+        self.prefix = prefix
+        self.cmd: str = command
+        self.words: list[str] = self.text.split()[1:]
+        self.options: list[str] = list(filter(lambda word: word.startswith(option_prefix), self.words))
+
+        self.db = database
+        self._db_user = None
+        self.answered = False
+
+
+    # the first post answers the (deferred) interaction, everything after that is a normal message in the channel -
+    # the token of an interaction expires after 15 minutes, which long commands like spam would easily outlast
+    @tracer.traced('send')
+    async def post(self, text=None, ttl=None, embed=None, file=None, view=None):
+        if self.answered:
+            return await self.chat.send(text, embed=embed, file=file, view=view, delete_after=ttl)
+
+        self.answered = True
+        # the webhook of the interaction doesn't accept None for the optional arguments
+        arguments = {name: value for name, value in {'embed': embed, 'file': file, 'view': view}.items() if value is not None}
+        message = await self.interaction.followup.send(str(text) if text is not None else d.utils.MISSING, wait=True, **arguments)
+        if ttl:
+            await message.delete(delay=ttl)
+        return message
@@ -0,0 +1,190 @@
+import time
+import uuid
+import discord as d
+from dataclasses import replace
+from datetime import datetime, timedelta, timezone
+from typing import AsyncIterator, Tuple
+from src.wrapper.database_wrapper import DatabaseWrapper, DBUser, Reminder, PoolMetrics
+
+
+# Keeps everything in plain dicts, so nothing survives a restart. Meant for trying out the bot and for benchmarks,
+# where a database server would only get in the way.
+class MemoryWrapper(DatabaseWrapper):
+
+    def __init__(self):
+        self.metrics = PoolMetrics()
+        self.users: dict[int, DBUser] = {}
+        self.reminders: dict[uuid.UUID, Reminder] = {}      # stored without time_zone, that one is joined in from the user
+        self.conversations: dict[tuple[int, int], tuple[str, float]] = {}     # (user id, channel id) -> (state, deadline)
+        self.settings: dict[str, str] = {}
+
+
+    @classmethod
+    async def connect(cls, url: str = 'memory://') -> 'MemoryWrapper':
+        return cls()
+
+
+    async def close(self) -> None:
+        pass
+
+
+    def pool_stats(self) -> dict:
+        return {'size': 0, 'idle': 0, 'min_size': 0, 'max_size': 0, 'in_use': 0, 'in_use_peak': 0, 'acquisitions': 0,
+                'acquire_wait_avg': 0.0, 'acquire_wait_max': 0.0, 'timeouts': 0, 'retries': 0}
+
+
+    async def health(self) -> dict:
+        return {'healthy': True, 'latency': 0.0, **self.pool_stats()}
+
+
+    async def migrate(self) -> None:
+        pass
+
+
+    # the matching reminders along with the timezone of their user, sorted by due date
+    def __sorted_reminders(self, condition) -> list[Reminder]:
+        reminders = [rem for rem in self.reminders.values() if condition(rem)]
+        reminders.sort(key=lambda rem: rem.due_date)
+        return [replace(rem, time_zone=self.users[rem.user_id].tz if rem.user_id in self.users else None) for rem in reminders]
+
+
+    async def check_next_reminder(self) -> Tuple[datetime, int] | Tuple[None, None]:
+        now = datetime.now(timezone.utc)
+        upcoming = [rem.due_date for rem in self.reminders.values() if rem.due_date > now]
+        if not upcoming:
+            return None, None
+        due_date = min(upcoming)
+        # one second more, just like the Postgres backend, because the reminders were always a fraction of a second too early
+        return due_date, int((due_date - now).total_seconds()) + 1
+
+
+    async def fetch_next_reminder(self) -> Reminder:
+        now = datetime.now(timezone.utc)
+        return self.__sorted_reminders(lambda rem: rem.due_date > now)[0]
+
+
+    async def fetch_reminders(self, channels=None, user=None) -> list[Reminder]:
+        now = datetime.now(timezone.utc)
+        channel_ids = {int(channel) for channel in channels} if channels else None
+        return self.__sorted_reminders(lambda rem: rem.due_date >= now and (not channel_ids or rem.channel_id in channel_ids)
+                                       and (not user or rem.user_id == user.id))
+
+
+    async def fetch_upcoming_reminders(self, within: float, limit: int = 100) -> list[Reminder]:
+        now = datetime.now(timezone.utc)
+        return self.__sorted_reminders(lambda rem: now < rem.due_date <= now + timedelta(seconds=within))[:limit]
+
+
+    async def fetch_missed_reminders(self, grace_period: float) -> list[Reminder]:
+        now = datetime.now(timezone.utc)
+        return self.__sorted_reminders(lambda rem: now - timedelta(seconds=grace_period) < rem.due_date <= now)
+
+
+    async def fetch_stale_reminders(self, grace_period: float) -> list[Reminder]:
+        now = datetime.now(timezone.utc)
+        return self.__sorted_reminders(lambda rem: rem.recurrence and rem.due_date <= now - timedelta(seconds=grace_period))
+
+
+    async def delete_reminder_by_id(self, reminder_id) -> None:
+        self.reminders.pop(uuid.UUID(str(reminder_id)), None)
+
+
+    async def advance_reminder(self, reminder: Reminder, next_due: datetime) -> None:
+        if reminder.rem_id in self.reminders:
+            self.reminders[reminder.rem_id] = replace(self.reminders[reminder.rem_id], due_date=next_due.astimezone(timezone.utc))
+
+
+    async def delete_reminders(self, reminders: list[Reminder]) -> None:
+        for rem in reminders:
+            self.reminders.pop(rem.rem_id, None)
+
+
+    async def clean_up_reminders(self, batch_size: int = 500) -> int:
+        expired_before = datetime.now(timezone.utc) - timedelta(days=2)
+        expired = [rem_id for rem_id, rem in self.reminders.items() if rem.due_date < expired_before and not rem.recurrence][:batch_size]
+        for rem_id in expired:
+            del self.reminders[rem_id]
+        return len(expired)
+
+
+    async def fetch_user_entry(self, user: d.User) -> DBUser | None:
+        entry = self.users.get(user.id)
+        # hand out a copy, just like every other backend creates a new object per query
+        return replace(entry) if entry else None
+
+
+    async def create_user_entry(self, user) -> None:
+        self.users.setdefault(user.id, DBUser(user.id, user.name, user.discriminator, None))
+
+
+    async def push_reminder(self, msg, timestamp: datetime, memo: str, recurrence: str = None) -> None:
+        rem_id = uuid.uuid4()
+        self.reminders[rem_id] = Reminder(rem_id, msg.user.id, msg.chat.id, timestamp.astimezone(timezone.utc), memo, recurrence)
+
+
+    async def push_reminders(self, msg, reminders: list[tuple[datetime, str, str | None]]) -> None:
+        for timestamp, memo, recurrence in reminders:
+            await self.push_reminder(msg, timestamp, memo, recurrence)
+
+
+    async def update_timezone(self, user, timezone: str) -> None:
+        if user.id in self.users:
+            self.users[user.id].tz = timezone
+
+
+    async def fetch_conversation_keys(self) -> list[tuple[int, int]]:
+        now = time.time()
+        return [key for key, (_, deadline) in self.conversations.items() if deadline > now]
+
+
+    async def save_conversation(self, user_id: int, channel_id: int, state: str, timeout: float) -> None:
+        self.conversations[(user_id, channel_id)] = (state, time.time() + timeout)
+
+
+    async def pop_conversation(self, user_id: int, channel_id: int) -> str | None:
+        state, deadline = self.conversations.pop((user_id, channel_id), (None, 0.0))
+        return state if deadline > time.time() else None
+
+
+    async def delete_conversation(self, user_id: int, channel_id: int) -> None:
+        self.conversations.pop((user_id, channel_id), None)
+
+
+    async def clean_up_conversations(self) -> int:
+        now = time.time()
+        expired = [key for key, (_, deadline) in self.conversations.items() if deadline < now]
+        for key in expired:
+            del self.conversations[key]
+        return len(expired)
+
+
+    async def fetch_setting(self, key: str) -> str | None:
+        return self.settings.get(key)
+
+
+    async def save_setting(self, key: str, value: str) -> None:
+        self.settings[key] = value
+
+
+    async def export_users(self) -> AsyncIterator[DBUser]:
+        for user in list(self.users.values()):
+            yield replace(user)
+
+
+    async def export_reminders(self) -> AsyncIterator[Reminder]:
+        for rem in sorted(self.reminders.values(), key=lambda rem: rem.due_date):
+            yield rem
+
+
+    async def import_users(self, users: list[DBUser]) -> int:
+        new_users = [user for user in users if user.id not in self.users]
+        for user in new_users:
+            self.users[user.id] = replace(user)
+        return len(new_users)
+
+
+    async def import_reminders(self, reminders: list[Reminder]) -> int:
+        new_reminders = [rem for rem in reminders if rem.rem_id not in self.reminders]
+        for rem in new_reminders:
+            self.reminders[rem.rem_id] = replace(rem, due_date=rem.due_date.astimezone(timezone.utc), time_zone=None)
+        return len(new_reminders)
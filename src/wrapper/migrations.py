@@ -0,0 +1,75 @@
+# Schema changes that were made after the initial 'users' and 'reminder' relations had been created.
+# Every statement has to be idempotent, because all of them are applied in order on every startup.
+MIGRATIONS: list[str] = [
+    # recurrence rule (RRULE syntax, e.g. 'FREQ=WEEKLY') of recurring reminders - NULL for one-shot reminders
+    "ALTER TABLE reminder ADD COLUMN IF NOT EXISTS recurrence TEXT;",
+
+    # state of ongoing conversations (json), so that they can be resumed after a restart
+    """
+    CREATE TABLE IF NOT EXISTS conversation (
+        user_id BIGINT NOT NULL,
+        channel_id BIGINT NOT NULL,
+        state TEXT NOT NULL,
+        deadline TIMESTAMPTZ NOT NULL,
+        PRIMARY KEY (user_id, channel_id)
+    );
+    """,
+
+    # key-value pairs the bot keeps for itself, e.g. the hash of the slash commands it registered last
+    "CREATE TABLE IF NOT EXISTS setting (key TEXT PRIMARY KEY, value TEXT NOT NULL);",
+]
+
+
+# Turns the plain 'reminder' relation into one that is range partitioned by due month (only if DB_PARTITIONING is enabled).
+# Applied once in a single transaction, followed by the monthly partitions and the copy of the reminders (see PostgresWrapper).
+# The partition key has to be part of the primary key, and reminders that don't fit into any monthly partition (yet) end up
+# in the default partition - from where they are moved as soon as the partition of their month is created.
+PARTITION_REMINDERS: list[str] = [
+    "LOCK TABLE reminder IN ACCESS EXCLUSIVE MODE;",
+    "ALTER TABLE reminder RENAME TO reminder_unpartitioned;",
+    """
+    CREATE TABLE reminder (
+        LIKE reminder_unpartitioned INCLUDING DEFAULTS,
+        PRIMARY KEY (id, date_time_zone)
+    ) PARTITION BY RANGE (date_time_zone);
+    """,
+    "CREATE INDEX ON reminder (date_time_zone);",
+    "CREATE TABLE reminder_default PARTITION OF reminder DEFAULT;",
+]
+
+
+# Complete schema of the embedded SQLite backend. Its databases are always created by the bot itself, so there is no history
+# to migrate from - the statements just have to be idempotent as well.
+# Timestamps are stored as UTC epoch seconds, which keeps comparing them to the current time trivial.
+SQLITE_SCHEMA: list[str] = [
+    "PRAGMA journal_mode = WAL;",
+    """
+    CREATE TABLE IF NOT EXISTS users (
+        user_id INTEGER PRIMARY KEY,
+        username TEXT,
+        discriminator TEXT,
+        time_zone TEXT
+    );
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS reminder (
+        id TEXT PRIMARY KEY,
+        user_id INTEGER NOT NULL,
+        channel_id INTEGER NOT NULL,
+        date_time_zone REAL NOT NULL,
+        memo TEXT,
+        recurrence TEXT
+    );
+    """,
+    "CREATE INDEX IF NOT EXISTS reminder_due_date ON reminder (date_time_zone);",
+    """
+    CREATE TABLE IF NOT EXISTS conversation (
+        user_id INTEGER NOT NULL,
+        channel_id INTEGER NOT NULL,
+        state TEXT NOT NULL,
+        deadline REAL NOT NULL,
+        PRIMARY KEY (user_id, channel_id)
+    );
+    """,
+    "CREATE TABLE IF NOT EXISTS setting (key TEXT PRIMARY KEY, value TEXT NOT NULL);",
+]
@@ -1,5 +1,6 @@
 import discord as d
 from src.wrapper.database_wrapper import DatabaseWrapper, DBUser
+from src.tracing import tracer
 
 class MsgContainer:
 
@@ -67,4 +68,5 @@ class MsgContainer:
 
     # simple wrapper around the normal msg.send method
     async def post(self, text=None, ttl=None, embed=None, file=None):
-        await self.chat.send(text, embed=embed, file=file, delete_after=ttl)
+        with tracer.span('send', channel=self.chat.id):
+            await self.chat.send(text, embed=embed, file=file, delete_after=ttl)
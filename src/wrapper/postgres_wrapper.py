@@ -0,0 +1,553 @@
+import asyncio
+import random
+import re
+import time
+import uuid
+import os
+import asyncpg
+import discord as d
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta, timezone
+from typing import AsyncIterator, Tuple
+from src.wrapper.database_wrapper import DatabaseWrapper, DBUser, Reminder, PoolMetrics
+from src.wrapper.migrations import MIGRATIONS, PARTITION_REMINDERS
+
+
+# errors after which a read is worth another try, e.g. during a failover of the database server
+RETRYABLE_ERRORS = (asyncpg.PostgresConnectionError, asyncpg.CannotConnectNowError, asyncpg.InterfaceError, ConnectionError, OSError,
+                    asyncio.TimeoutError)
+
+
+# columns (of the relation REMINDER_RELATION) which are needed to create a Reminder object
+REMINDER_COLUMNS = "rem.id, rem.user_id, rem.channel_id, rem.date_time_zone, rem.memo, rem.recurrence, usr.time_zone"
+REMINDER_RELATION = "reminder rem LEFT JOIN users usr ON usr.user_id = rem.user_id"
+
+# bulk transfers of whole relations are allowed to take much longer than any regular query
+BULK_TIMEOUT = 600.0
+# backslash escapes of the text format of COPY (see the Postgres docs on COPY)
+COPY_ESCAPES = {'b': '\b', 'f': '\f', 'n': '\n', 'r': '\r', 't': '\t', 'v': '\v'}
+
+# reminders are expired (and may be removed) two days after they were due
+REMINDER_EXPIRY = timedelta(days=2)
+
+
+# the first moment (in UTC) of the month <months> months after the one of the given moment
+def month_start(moment: datetime, months: int = 0) -> datetime:
+    index = moment.year * 12 + moment.month - 1 + months
+    return datetime(index // 12, index % 12 + 1, 1, tzinfo=timezone.utc)
+
+
+# name of the partition holding the reminders that are due in the month starting at <start>
+def partition_name(start: datetime) -> str:
+    return f'reminder_p{start:%Y%m}'
+
+
+# the original backend: a pool of connections to a Postgres server (e.g. the one provided by heroku)
+class PostgresWrapper(DatabaseWrapper):
+
+    def __init__(self, database_connection, min_size=3, max_size=5, timeout=10.0, read_retries=3, retry_backoff=0.2,
+                 partitioning=False, partitions_ahead=3, partition_expiry='drop'):
+        self.database_connection = database_connection
+        self.min_size = min_size
+        self.max_size = max_size
+        self.timeout = timeout                  # max seconds for getting a connection as well as for running a query
+        self.read_retries = read_retries        # how often an idempotent read is retried after a connection problem
+        self.retry_backoff = retry_backoff      # base delay (in seconds) of the exponential backoff between two retries
+        self.partitioning = partitioning            # whether migrate turns the reminder relation into a partitioned one
+        self.partitions_ahead = partitions_ahead    # number of monthly partitions created in advance (besides the current one)
+        self.partition_expiry = partition_expiry    # what happens to expired partitions: 'drop' or 'detach' (kept as tables of their own)
+        self.partitioned = False                    # whether the reminder relation actually is partitioned (found out by migrate)
+        self.metrics = PoolMetrics()
+
+
+    # creates a connection pool configured via environment variables
+    @classmethod
+    async def connect(cls, dsn: str) -> 'PostgresWrapper':
+        min_size = int(os.environ.get("DB_POOL_MIN", 3))
+        max_size = int(os.environ.get("DB_POOL_MAX", 5))
+        timeout = float(os.environ.get("DB_TIMEOUT", 10.0))
+        pool = await asyncpg.create_pool(dsn, min_size=min_size, max_size=max_size, command_timeout=timeout,
+                                         max_inactive_connection_lifetime=float(os.environ.get("DB_MAX_IDLE_TIME", 300.0)),
+                                         max_queries=int(os.environ.get("DB_MAX_QUERIES", 50000)),
+                                         # let the server cancel statements that would outlive their timeout anyway
+                                         server_settings={'statement_timeout': str(int(timeout * 1000))})
+        return cls(pool, min_size=min_size, max_size=max_size, timeout=timeout, read_retries=int(os.environ.get("DB_READ_RETRIES", 3)),
+                   retry_backoff=float(os.environ.get("DB_RETRY_BACKOFF", 0.2)),
+                   partitioning=os.environ.get("DB_PARTITIONING", 'FALSE') == 'TRUE',
+                   partitions_ahead=int(os.environ.get("DB_PARTITIONS_AHEAD", 3)),
+                   partition_expiry=os.environ.get("DB_PARTITION_EXPIRY", 'drop'))
+
+
+    async def close(self) -> None:
+        await self.database_connection.close()
+
+
+    # current utilization of the connection pool
+    def pool_stats(self) -> dict:
+        return {
+            'size': self.database_connection.get_size(),
+            'idle': self.database_connection.get_idle_size(),
+            'min_size': self.min_size,
+            'max_size': self.max_size,
+            'in_use': self.metrics.in_use,
+            'in_use_peak': self.metrics.in_use_peak,
+            'acquisitions': self.metrics.acquisitions,
+            'acquire_wait_avg': round(self.metrics.acquire_wait_avg, 4),
+            'acquire_wait_max': round(self.metrics.acquire_wait_max, 4),
+            'timeouts': self.metrics.timeouts,
+            'retries': self.metrics.retries,
+        }
+
+
+    # checks whether the database answers in time and returns that result along with the pool statistics
+    async def health(self) -> dict:
+        start = time.perf_counter()
+        try:
+            async with self.__connection() as connection:
+                await connection.fetchval("SELECT 1;", timeout=self.timeout)
+            healthy = True
+        except RETRYABLE_ERRORS:
+            healthy = False
+        return {'healthy': healthy, 'latency': round(time.perf_counter() - start, 4), **self.pool_stats()}
+
+
+    @asynccontextmanager
+    async def __connection(self):
+        start = time.perf_counter()
+        connection = await self.database_connection.acquire(timeout=self.timeout)
+
+        # keep track of how long it took to get a connection and how many connections are in use
+        wait = time.perf_counter() - start
+        self.metrics.acquisitions += 1
+        self.metrics.acquire_wait_total += wait
+        self.metrics.acquire_wait_max = max(self.metrics.acquire_wait_max, wait)
+        self.metrics.in_use += 1
+        self.metrics.in_use_peak = max(self.metrics.in_use_peak, self.metrics.in_use)
+        try:
+            yield connection
+        finally:
+            self.metrics.in_use -= 1
+            await self.database_connection.release(connection)
+
+
+    # runs a query on a pooled connection; idempotent queries are retried with a jittered exponential backoff on connection problems
+    async def __query(self, method: str, query: str, *args, idempotent: bool):
+        attempts = self.read_retries + 1 if idempotent else 1
+        for attempt in range(attempts):
+            try:
+                async with self.__connection() as connection:
+                    return await getattr(connection, method)(query, *args, timeout=self.timeout)
+            except RETRYABLE_ERRORS as exp:
+                if isinstance(exp, asyncio.TimeoutError):
+                    self.metrics.timeouts += 1
+                if attempt + 1 >= attempts:
+                    raise
+            self.metrics.retries += 1
+            await asyncio.sleep(random.uniform(0, self.retry_backoff * 2 ** attempt))
+
+
+    async def __fetch(self, query: str, *args, idempotent=True) -> list[asyncpg.Record]:
+        return await self.__query('fetch', query, *args, idempotent=idempotent)
+
+
+    async def __fetchrow(self, query: str, *args, idempotent=True) -> asyncpg.Record | None:
+        return await self.__query('fetchrow', query, *args, idempotent=idempotent)
+
+
+    async def __fetchval(self, query: str, *args, idempotent=True):
+        return await self.__query('fetchval', query, *args, idempotent=idempotent)
+
+
+    async def __execute(self, query: str, *args, idempotent=False) -> str:
+        return await self.__query('execute', query, *args, idempotent=idempotent)
+
+
+    # bring the database schema up to date
+    async def migrate(self) -> None:
+        for statement in MIGRATIONS:
+            await self.__execute(statement)
+
+        relkind = await self.__fetchval("SELECT relkind::text FROM pg_class WHERE oid = to_regclass('reminder');")
+        if self.partitioning and relkind == 'r':
+            await self.__partition_reminders()
+            relkind = 'p'
+        # a relation that has been partitioned once stays that way, even if partitioning is disabled later on
+        self.partitioned = relkind == 'p'
+        await self.maintain_partitions()
+
+
+    # moves every reminder that hasn't expired yet into a new, partitioned reminder relation - all at once, or not at all
+    async def __partition_reminders(self) -> None:
+        first_month = month_start(datetime.now(timezone.utc) - REMINDER_EXPIRY)
+        async with self.__connection() as connection:
+            async with connection.transaction():
+                # the copy may take much longer than any regular query, and the statement_timeout is reset along with the transaction
+                await connection.execute("SET LOCAL statement_timeout = 0;")
+                for statement in PARTITION_REMINDERS:
+                    await connection.execute(statement, timeout=BULK_TIMEOUT)
+                for months in range(self.partitions_ahead + 2):
+                    await self.__create_partition(connection, month_start(first_month, months))
+                # expired reminders would be removed by the reaper anyway, so they aren't even copied
+                await connection.execute("""
+                    INSERT INTO reminder
+                    SELECT * FROM reminder_unpartitioned
+                    WHERE date_time_zone >= $1;
+                """, first_month, timeout=BULK_TIMEOUT)
+                await connection.execute("DROP TABLE reminder_unpartitioned;", timeout=BULK_TIMEOUT)
+
+
+    # names of the monthly partitions of the reminder relation (without the default partition)
+    async def __partitions(self) -> list[str]:
+        records = await self.__fetch("""
+            SELECT child.relname
+            FROM pg_inherits JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+            WHERE pg_inherits.inhparent = 'reminder'::regclass;
+        """)
+        return sorted(record['relname'] for record in records if re.fullmatch(r'reminder_p\d{6}', record['relname']))
+
+
+    async def maintain_partitions(self) -> None:
+        if not self.partitioned:
+            return
+        existing = set(await self.__partitions())
+        this_month = month_start(datetime.now(timezone.utc))
+        for months in range(self.partitions_ahead + 1):
+            start = month_start(this_month, months)
+            if partition_name(start) not in existing:
+                async with self.__connection() as connection:
+                    async with connection.transaction():
+                        await self.__create_partition(connection, start)
+
+
+    # creates the partition of a month, along with the reminders of that month which have been waiting in the default partition
+    @staticmethod
+    async def __create_partition(connection, start: datetime) -> None:
+        end = month_start(start, 1)
+        name = partition_name(start)
+        await connection.execute(f"CREATE TABLE {name} (LIKE reminder INCLUDING DEFAULTS);")
+        await connection.execute(f"""
+            WITH moved AS (
+                DELETE FROM reminder_default
+                WHERE date_time_zone >= $1 AND date_time_zone < $2
+                RETURNING *
+            )
+            INSERT INTO {name} SELECT * FROM moved;
+        """, start, end)
+        # the bounds of a partition have to be literals
+        await connection.execute(f"ALTER TABLE reminder ATTACH PARTITION {name} FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}');")
+
+
+    async def check_next_reminder(self) -> Tuple[datetime, int] | Tuple[None, None]:
+        next_time_data: Tuple[datetime, str] = await self.__fetchrow("""
+            SELECT MIN(rem.date_time_zone), EXTRACT(EPOCH FROM ( MIN(rem.date_time_zone) - current_timestamp) )
+            FROM reminder rem
+            WHERE rem.date_time_zone > current_timestamp;
+        """)
+
+        # apparently there are no upcoming reminders in the database atm
+        if not next_time_data:
+            return None, None
+
+        due_date, timeleft_epoch = next_time_data
+        # we add one to the time remaining because the reminders were always a fraction of a second too early
+        return due_date, int(timeleft_epoch) + 1
+
+
+    async def fetch_next_reminder(self) -> Reminder:
+        reminder_args = await self.__fetchrow(f"""
+            SELECT {REMINDER_COLUMNS}
+            FROM {REMINDER_RELATION}
+            WHERE rem.date_time_zone = (
+                SELECT MIN(rem.date_time_zone)
+                FROM reminder rem
+                WHERE rem.date_time_zone > current_timestamp
+            );
+        """)
+        # create a reminder object from the data retrieved from the database
+        return Reminder(*reminder_args)
+
+
+    async def fetch_reminders(self, channels=None, user=None) -> list[Reminder]:
+        # if a list of channels was given, only fetch reminders which are bound to one of those channels
+        channel_filter = ''
+        if channels:
+            server: str = ", ".join(channels)
+            channel_filter = f'AND rem.channel_id IN ({server})'
+
+        # if a specific user was given, only fetch reminders for that user
+        user_filter = ''
+        if user:
+            user_filter = f'AND rem.user_id = {user.id}'
+
+        reminder_args = await self.__fetch(f"""
+            SELECT {REMINDER_COLUMNS}
+            FROM {REMINDER_RELATION}
+            WHERE rem.date_time_zone >= current_timestamp {channel_filter} {user_filter}
+            ORDER BY rem.date_time_zone ASC;
+        """)
+        # create a list of Reminder objects from the data
+        reminder_list = [Reminder(*record) for record in reminder_args]
+        return reminder_list
+
+
+    async def fetch_upcoming_reminders(self, within: float, limit: int = 100) -> list[Reminder]:
+        records = await self.__fetch(f"""
+            SELECT {REMINDER_COLUMNS}
+            FROM {REMINDER_RELATION}
+            WHERE rem.date_time_zone > current_timestamp AND rem.date_time_zone <= current_timestamp + make_interval(secs => $1)
+            ORDER BY rem.date_time_zone ASC
+            LIMIT $2;
+        """, within, limit)
+        return [Reminder(*record) for record in records]
+
+
+    # fetch every reminder that was due within the last <grace_period> seconds but has never been sent
+    async def fetch_missed_reminders(self, grace_period: float) -> list[Reminder]:
+        reminder_args = await self.__fetch(f"""
+            SELECT {REMINDER_COLUMNS}
+            FROM {REMINDER_RELATION}
+            WHERE rem.date_time_zone <= current_timestamp
+              AND rem.date_time_zone > current_timestamp - make_interval(secs => $1)
+            ORDER BY rem.date_time_zone ASC;
+        """, grace_period)
+        return [Reminder(*record) for record in reminder_args]
+
+
+    async def fetch_stale_reminders(self, grace_period: float) -> list[Reminder]:
+        reminder_args = await self.__fetch(f"""
+            SELECT {REMINDER_COLUMNS}
+            FROM {REMINDER_RELATION}
+            WHERE rem.recurrence IS NOT NULL
+              AND rem.date_time_zone <= current_timestamp - make_interval(secs => $1)
+            ORDER BY rem.date_time_zone ASC;
+        """, grace_period)
+        return [Reminder(*record) for record in reminder_args]
+
+
+    async def delete_reminder_by_id(self, reminder_id) -> None:
+        # delete reminder in database afterwards
+        await self.__execute(f"DELETE FROM reminder WHERE id = '{reminder_id}';")
+
+
+    # move a recurring reminder on to its next occurrence instead of deleting it
+    async def advance_reminder(self, reminder: Reminder, next_due: datetime) -> None:
+        await self.__execute("UPDATE reminder SET date_time_zone = $2 WHERE id = $1;", reminder.rem_id, next_due)
+
+
+    async def delete_reminders(self, reminders: list[Reminder]) -> None:
+        # delete several reminders at once with a single statement
+        await self.__execute("DELETE FROM reminder WHERE id = ANY($1::uuid[]);", [rem.rem_id for rem in reminders])
+
+
+    # remove one batch of long expired reminders from database and return the number of deleted rows
+    async def clean_up_reminders(self, batch_size: int = 500) -> int:
+        if self.partitioned:
+            return await self.__expire_partitions()
+
+        # lösche alte Reminder, die seit mehr als zwei Tagen abgelaufen sind - aber nur bis zu batch_size Stück auf einmal,
+        # damit die Tabelle nicht für längere Zeit gesperrt wird
+        status: str = await self.__execute("""
+            DELETE FROM reminder
+            WHERE ctid IN (
+                SELECT ctid
+                FROM reminder
+                WHERE date_time_zone < current_timestamp - INTERVAL '2 day' AND recurrence IS NULL
+                LIMIT $1
+            );
+        """, batch_size)
+        # asyncpg returns the command status tag, e.g. 'DELETE 500'
+        return int(status.split()[-1])
+
+
+    # drops (or detaches) every partition whose reminders have all expired and returns the number of reminders they held -
+    # no matter how many there are, this never costs more than a count and a drop per month
+    async def __expire_partitions(self) -> int:
+        cutoff = datetime.now(timezone.utc) - REMINDER_EXPIRY
+        removed = 0
+        for name in await self.__partitions():
+            start = datetime.strptime(name, 'reminder_p%Y%m').replace(tzinfo=timezone.utc)
+            if month_start(start, 1) > cutoff:
+                break   # the partitions are sorted by month
+            # recurring reminders keep their partition alive until the bot has advanced them to their next occurrence
+            expired, recurring = await self.__fetchrow(f"SELECT count(*), count(recurrence) FROM {name};")
+            if recurring:
+                continue
+            removed += expired
+            if self.partition_expiry == 'detach':
+                await self.__execute(f"ALTER TABLE reminder DETACH PARTITION {name};")
+            else:
+                await self.__execute(f"DROP TABLE {name};")
+        return removed
+
+
+    async def fetch_user_entry(self, user: d.User) -> DBUser | None:
+        user_entry = await self.__fetchrow(f"""
+            SELECT user_id, username, discriminator, time_zone
+            FROM users
+            WHERE user_id = {user.id};
+        """)
+        # if no user was found
+        if not user_entry:
+            return None
+        return DBUser(*user_entry)
+
+
+    async def create_user_entry(self, user) -> None:
+        # create an entry for the sender in the users() relation if there isn't one already
+        await self.__execute(f"""
+            INSERT INTO users(user_id, username, discriminator)
+            SELECT {user.id}, '{user.name}', '{user.discriminator}'
+            WHERE NOT EXISTS (SELECT user_id FROM users WHERE user_id = {user.id});
+        """)
+
+
+    async def push_reminder(self, msg, timestamp: datetime, memo: str, recurrence: str = None) -> None:
+        # write the new reminder to the database
+        await self.__execute("""
+            INSERT INTO reminder(id, user_id, channel_id, date_time_zone, memo, recurrence)
+            VALUES(gen_random_uuid(), $1, $2, $3, $4, $5);
+        """, msg.user.id, msg.chat.id, timestamp, memo, recurrence)
+
+
+    async def push_reminders(self, msg, reminders: list[tuple[datetime, str, str | None]]) -> None:
+        # one array per column, so the number of parameters (and the statement) stays the same no matter how many reminders there are
+        due_dates, memos, recurrences = (list(column) for column in zip(*reminders))
+        await self.__execute("""
+            INSERT INTO reminder(id, user_id, channel_id, date_time_zone, memo, recurrence)
+            SELECT gen_random_uuid(), $1, $2, entry.date_time_zone, entry.memo, entry.recurrence
+            FROM unnest($3::timestamptz[], $4::text[], $5::text[]) AS entry(date_time_zone, memo, recurrence);
+        """, msg.user.id, msg.chat.id, due_dates, memos, recurrences)
+
+
+    async def update_timezone(self, user, timezone: str) -> None:
+        await self.__execute(f"""
+            UPDATE users
+            SET time_zone = '{timezone}'
+            WHERE user_id = {user.id};
+        """)
+
+
+    async def fetch_conversation_keys(self) -> list[tuple[int, int]]:
+        records = await self.__fetch("SELECT user_id, channel_id FROM conversation WHERE deadline > current_timestamp;")
+        return [(record['user_id'], record['channel_id']) for record in records]
+
+
+    async def save_conversation(self, user_id: int, channel_id: int, state: str, timeout: float) -> None:
+        await self.__execute("""
+            INSERT INTO conversation(user_id, channel_id, state, deadline)
+            VALUES($1, $2, $3, current_timestamp + make_interval(secs => $4))
+            ON CONFLICT (user_id, channel_id) DO UPDATE SET state = EXCLUDED.state, deadline = EXCLUDED.deadline;
+        """, user_id, channel_id, state, timeout)
+
+
+    # delete a conversation and return its state - expired conversations are deleted as well, but None is returned for them
+    async def pop_conversation(self, user_id: int, channel_id: int) -> str | None:
+        record = await self.__fetchrow("""
+            DELETE FROM conversation
+            WHERE user_id = $1 AND channel_id = $2
+            RETURNING state, deadline > current_timestamp AS active;
+        """, user_id, channel_id, idempotent=False)
+        if not record or not record['active']:
+            return None
+        return record['state']
+
+
+    async def delete_conversation(self, user_id: int, channel_id: int) -> None:
+        await self.__execute("DELETE FROM conversation WHERE user_id = $1 AND channel_id = $2;", user_id, channel_id)
+
+
+    # remove conversations which nobody answered before their deadline
+    async def clean_up_conversations(self) -> int:
+        status: str = await self.__execute("DELETE FROM conversation WHERE deadline < current_timestamp;")
+        return int(status.split()[-1])
+
+
+    async def fetch_setting(self, key: str) -> str | None:
+        record = await self.__fetchrow("SELECT value FROM setting WHERE key = $1;", key)
+        return record['value'] if record else None
+
+
+    async def save_setting(self, key: str, value: str) -> None:
+        await self.__execute("""
+            INSERT INTO setting(key, value)
+            VALUES($1, $2)
+            ON CONFLICT (key) DO UPDATE SET value = EXCLUDED.value;
+        """, key, value, idempotent=True)
+
+
+    async def export_users(self) -> AsyncIterator[DBUser]:
+        async for user_id, username, discriminator, time_zone in self.__copy_out(
+                "SELECT user_id, username, discriminator, time_zone FROM users ORDER BY user_id"):
+            yield DBUser(int(user_id), username, discriminator, time_zone)
+
+
+    async def export_reminders(self) -> AsyncIterator[Reminder]:
+        async for rem_id, user_id, channel_id, due_date, memo, recurrence in self.__copy_out(
+                "SELECT id, user_id, channel_id, EXTRACT(EPOCH FROM date_time_zone), memo, recurrence FROM reminder ORDER BY date_time_zone"):
+            yield Reminder(uuid.UUID(rem_id), int(user_id), int(channel_id), datetime.fromtimestamp(float(due_date), timezone.utc), memo, recurrence)
+
+
+    async def import_users(self, users: list[DBUser]) -> int:
+        records = [(user.id, user.name, user.hash, user.tz) for user in users]
+        return await self.__copy_in('users', ['user_id', 'username', 'discriminator', 'time_zone'], records)
+
+
+    async def import_reminders(self, reminders: list[Reminder]) -> int:
+        records = [(rem.rem_id, rem.user_id, rem.channel_id, rem.due_date, rem.memo, rem.recurrence) for rem in reminders]
+        return await self.__copy_in('reminder', ['id', 'user_id', 'channel_id', 'date_time_zone', 'memo', 'recurrence'], records)
+
+
+    # streams the result of a query with COPY and yields the fields of every row (as strings, or None for NULL)
+    async def __copy_out(self, query: str) -> AsyncIterator[list[str | None]]:
+        # COPY pauses while the queue is full, so at most a few chunks are held in memory at any time
+        chunks: asyncio.Queue[bytes | None] = asyncio.Queue(maxsize=8)
+
+        async def copy():
+            try:
+                async with self.__connection() as connection:
+                    # the statement_timeout of the pool is reset as soon as the connection is released
+                    await connection.execute("SET statement_timeout = 0;")
+                    await connection.copy_from_query(query, output=chunks.put, format='text', timeout=BULK_TIMEOUT)
+            except Exception:
+                await chunks.put(None)
+                raise
+            # no end marker after a cancellation: the consumer stopped early and on a full queue, the put would never return
+            await chunks.put(None)
+
+        copy_task = asyncio.create_task(copy())
+        try:
+            rest = b''
+            while (chunk := await chunks.get()) is not None:
+                # a chunk may end in the middle of a row - that part is completed by the next chunk
+                *rows, rest = (rest + chunk).split(b'\n')
+                for row in rows:
+                    yield [None if field == b'\\N' else self.__unescape(field.decode('utf-8')) for field in row.split(b'\t')]
+            # raises the error of the COPY, if there was one
+            await copy_task
+        finally:
+            # if the consumer stopped early (an error, a cancellation), the COPY is aborted and its connection returned to the pool
+            copy_task.cancel()
+            await asyncio.gather(copy_task, return_exceptions=True)
+
+
+    @staticmethod
+    def __unescape(field: str) -> str:
+        if '\\' not in field:
+            return field
+        return re.sub(r'\\(.)', lambda escape: COPY_ESCAPES.get(escape[1], escape[1]), field)
+
+
+    # copies the records into a temporary table first, so that rows which already exist can be skipped instead of aborting the COPY
+    async def __copy_in(self, table: str, columns: list[str], records: list[tuple]) -> int:
+        column_list = ', '.join(columns)
+        async with self.__connection() as connection:
+            async with connection.transaction():
+                await connection.execute(f"CREATE TEMPORARY TABLE import_{table} (LIKE {table}) ON COMMIT DROP;")
+                await connection.copy_records_to_table(f'import_{table}', records=records, columns=columns, timeout=BULK_TIMEOUT)
+                status: str = await connection.execute(f"""
+                    INSERT INTO {table} ({column_list})
+                    SELECT {column_list} FROM import_{table}
+                    ON CONFLICT DO NOTHING;
+                """, timeout=BULK_TIMEOUT)
+        # asyncpg returns the command status tag, e.g. 'INSERT 0 500'
+        return int(status.split()[-1])
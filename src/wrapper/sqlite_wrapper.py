@@ -0,0 +1,335 @@
+import asyncio
+import json
+import os
+import sqlite3
+import time
+import uuid
+import discord as d
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import AsyncIterator, Tuple
+from src.wrapper.database_wrapper import DatabaseWrapper, DBUser, Reminder, PoolMetrics
+from src.wrapper.migrations import SQLITE_SCHEMA
+
+
+# same columns as the Postgres backend, see REMINDER_COLUMNS there
+REMINDER_COLUMNS = "rem.id, rem.user_id, rem.channel_id, rem.date_time_zone, rem.memo, rem.recurrence, usr.time_zone"
+REMINDER_RELATION = "reminder rem LEFT JOIN users usr ON usr.user_id = rem.user_id"
+
+
+# An embedded database file for small deployments and benchmarks, which doesn't need a database server at all.
+# sqlite3 blocks, so every statement runs on a single worker thread which owns the connection: the event loop never waits
+# for the disk, and the statements are serialized just like SQLite serializes writes anyway. WAL mode keeps readers and the
+# writer from blocking each other (e.g. when the database is inspected while the bot runs).
+class SqliteWrapper(DatabaseWrapper):
+
+    def __init__(self, path: str, timeout=10.0):
+        self.path = path
+        self.timeout = timeout          # max seconds to wait for a lock held by another process
+        self.metrics = PoolMetrics()    # 'acquisitions' are statements handed to the worker thread, 'in_use' are the queued ones
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='sqlite')
+        self.connection: sqlite3.Connection | None = None
+
+
+    # sqlite:///relative/path.db, sqlite:////absolute/path.db or sqlite:///:memory:
+    @classmethod
+    async def connect(cls, url: str) -> 'SqliteWrapper':
+        path = url.split('://', 1)[1][1:] or ':memory:'
+        wrapper = cls(path, timeout=float(os.environ.get("DB_TIMEOUT", 10.0)))
+        await wrapper.__run(wrapper.__open)
+        return wrapper
+
+
+    def __open(self):
+        # autocommit mode: every statement is a transaction of its own
+        self.connection = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None, check_same_thread=False)
+        # with WAL, a crash can at most lose the latest commits, but never corrupt the database
+        self.connection.execute("PRAGMA synchronous = NORMAL;")
+
+
+    async def close(self) -> None:
+        await self.__run(self.connection.close)
+        self.executor.shutdown(wait=True)
+
+
+    def pool_stats(self) -> dict:
+        return {
+            'size': 1,
+            'idle': 0 if self.metrics.in_use else 1,
+            'min_size': 1,
+            'max_size': 1,
+            'in_use': self.metrics.in_use,
+            'in_use_peak': self.metrics.in_use_peak,
+            'acquisitions': self.metrics.acquisitions,
+            'acquire_wait_avg': round(self.metrics.acquire_wait_avg, 4),
+            'acquire_wait_max': round(self.metrics.acquire_wait_max, 4),
+            'timeouts': self.metrics.timeouts,
+            'retries': self.metrics.retries,
+        }
+
+
+    async def health(self) -> dict:
+        start = time.perf_counter()
+        try:
+            await asyncio.wait_for(self.__fetchrow("SELECT 1;"), timeout=self.timeout)
+            healthy = True
+        except (sqlite3.Error, asyncio.TimeoutError):
+            healthy = False
+        return {'healthy': healthy, 'latency': round(time.perf_counter() - start, 4), **self.pool_stats()}
+
+
+    # runs a function on the database thread and keeps track of how long it had to wait for its turn
+    async def __run(self, function, *args):
+        queued = time.perf_counter()
+        started: list[float] = []
+
+        def job():
+            started.append(time.perf_counter())
+            return function(*args)
+
+        self.metrics.in_use += 1
+        self.metrics.in_use_peak = max(self.metrics.in_use_peak, self.metrics.in_use)
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self.executor, job)
+        finally:
+            self.metrics.in_use -= 1
+            if started:
+                wait = started[0] - queued
+                self.metrics.acquisitions += 1
+                self.metrics.acquire_wait_total += wait
+                self.metrics.acquire_wait_max = max(self.metrics.acquire_wait_max, wait)
+
+
+    async def __fetch(self, query: str, *args) -> list[tuple]:
+        return await self.__run(lambda: self.connection.execute(query, args).fetchall())
+
+
+    async def __fetchrow(self, query: str, *args) -> tuple | None:
+        return await self.__run(lambda: self.connection.execute(query, args).fetchone())
+
+
+    # returns the number of affected rows
+    async def __execute(self, query: str, *args) -> int:
+        return await self.__run(lambda: self.connection.execute(query, args).rowcount)
+
+
+    @staticmethod
+    def __reminder(record: tuple) -> Reminder:
+        rem_id, user_id, channel_id, due_date, memo, recurrence, time_zone = record
+        return Reminder(uuid.UUID(rem_id), user_id, channel_id, datetime.fromtimestamp(due_date, timezone.utc), memo, recurrence, time_zone)
+
+
+    async def migrate(self) -> None:
+        for statement in SQLITE_SCHEMA:
+            await self.__execute(statement)
+
+
+    async def check_next_reminder(self) -> Tuple[datetime, int] | Tuple[None, None]:
+        now = time.time()
+        due_date, = await self.__fetchrow("SELECT MIN(date_time_zone) FROM reminder WHERE date_time_zone > ?;", now)
+        if due_date is None:
+            return None, None
+        # one second more, just like the Postgres backend, because the reminders were always a fraction of a second too early
+        return datetime.fromtimestamp(due_date, timezone.utc), int(due_date - now) + 1
+
+
+    async def fetch_next_reminder(self) -> Reminder:
+        record = await self.__fetchrow(f"""
+            SELECT {REMINDER_COLUMNS}
+            FROM {REMINDER_RELATION}
+            WHERE rem.date_time_zone = (SELECT MIN(date_time_zone) FROM reminder WHERE date_time_zone > ?);
+        """, time.time())
+        return self.__reminder(record)
+
+
+    async def fetch_reminders(self, channels=None, user=None) -> list[Reminder]:
+        filters, args = '', [time.time()]
+        if channels:
+            filters += f" AND rem.channel_id IN ({', '.join('?' * len(channels))})"
+            args += [int(channel) for channel in channels]
+        if user:
+            filters += " AND rem.user_id = ?"
+            args.append(user.id)
+
+        records = await self.__fetch(f"""
+            SELECT {REMINDER_COLUMNS}
+            FROM {REMINDER_RELATION}
+            WHERE rem.date_time_zone >= ? {filters}
+            ORDER BY rem.date_time_zone ASC;
+        """, *args)
+        return [self.__reminder(record) for record in records]
+
+
+    async def fetch_upcoming_reminders(self, within: float, limit: int = 100) -> list[Reminder]:
+        now = time.time()
+        records = await self.__fetch(f"""
+            SELECT {REMINDER_COLUMNS}
+            FROM {REMINDER_RELATION}
+            WHERE rem.date_time_zone > ? AND rem.date_time_zone <= ?
+            ORDER BY rem.date_time_zone ASC
+            LIMIT ?;
+        """, now, now + within, limit)
+        return [self.__reminder(record) for record in records]
+
+
+    async def fetch_missed_reminders(self, grace_period: float) -> list[Reminder]:
+        now = time.time()
+        records = await self.__fetch(f"""
+            SELECT {REMINDER_COLUMNS}
+            FROM {REMINDER_RELATION}
+            WHERE rem.date_time_zone <= ? AND rem.date_time_zone > ?
+            ORDER BY rem.date_time_zone ASC;
+        """, now, now - grace_period)
+        return [self.__reminder(record) for record in records]
+
+
+    async def fetch_stale_reminders(self, grace_period: float) -> list[Reminder]:
+        records = await self.__fetch(f"""
+            SELECT {REMINDER_COLUMNS}
+            FROM {REMINDER_RELATION}
+            WHERE rem.recurrence IS NOT NULL AND rem.date_time_zone <= ?
+            ORDER BY rem.date_time_zone ASC;
+        """, time.time() - grace_period)
+        return [self.__reminder(record) for record in records]
+
+
+    async def delete_reminder_by_id(self, reminder_id) -> None:
+        await self.__execute("DELETE FROM reminder WHERE id = ?;", str(reminder_id))
+
+
+    async def advance_reminder(self, reminder: Reminder, next_due: datetime) -> None:
+        await self.__execute("UPDATE reminder SET date_time_zone = ? WHERE id = ?;", next_due.timestamp(), str(reminder.rem_id))
+
+
+    async def delete_reminders(self, reminders: list[Reminder]) -> None:
+        # a json array is a single parameter, no matter how many reminders there are
+        ids = json.dumps([str(rem.rem_id) for rem in reminders])
+        await self.__execute("DELETE FROM reminder WHERE id IN (SELECT value FROM json_each(?));", ids)
+
+
+    async def clean_up_reminders(self, batch_size: int = 500) -> int:
+        return await self.__execute("""
+            DELETE FROM reminder
+            WHERE id IN (SELECT id FROM reminder WHERE date_time_zone < ? AND recurrence IS NULL LIMIT ?);
+        """, time.time() - 2 * 24 * 3600, batch_size)
+
+
+    async def fetch_user_entry(self, user: d.User) -> DBUser | None:
+        record = await self.__fetchrow("SELECT user_id, username, discriminator, time_zone FROM users WHERE user_id = ?;", user.id)
+        return DBUser(*record) if record else None
+
+
+    async def create_user_entry(self, user) -> None:
+        await self.__execute("INSERT OR IGNORE INTO users(user_id, username, discriminator) VALUES(?, ?, ?);",
+                             user.id, user.name, user.discriminator)
+
+
+    async def push_reminder(self, msg, timestamp: datetime, memo: str, recurrence: str = None) -> None:
+        await self.__execute("""
+            INSERT INTO reminder(id, user_id, channel_id, date_time_zone, memo, recurrence)
+            VALUES(?, ?, ?, ?, ?, ?);
+        """, str(uuid.uuid4()), msg.user.id, msg.chat.id, timestamp.timestamp(), memo, recurrence)
+
+
+    async def push_reminders(self, msg, reminders: list[tuple[datetime, str, str | None]]) -> None:
+        records = [(str(uuid.uuid4()), msg.user.id, msg.chat.id, timestamp.timestamp(), memo, recurrence) for timestamp, memo, recurrence in reminders]
+        await self.__run(self.__insert_all, """
+            INSERT INTO reminder(id, user_id, channel_id, date_time_zone, memo, recurrence)
+            VALUES(?, ?, ?, ?, ?, ?);
+        """, records)
+
+
+    async def update_timezone(self, user, timezone: str) -> None:
+        await self.__execute("UPDATE users SET time_zone = ? WHERE user_id = ?;", timezone, user.id)
+
+
+    async def fetch_conversation_keys(self) -> list[tuple[int, int]]:
+        return await self.__fetch("SELECT user_id, channel_id FROM conversation WHERE deadline > ?;", time.time())
+
+
+    async def save_conversation(self, user_id: int, channel_id: int, state: str, timeout: float) -> None:
+        await self.__execute("""
+            INSERT INTO conversation(user_id, channel_id, state, deadline)
+            VALUES(?, ?, ?, ?)
+            ON CONFLICT (user_id, channel_id) DO UPDATE SET state = excluded.state, deadline = excluded.deadline;
+        """, user_id, channel_id, state, time.time() + timeout)
+
+
+    async def pop_conversation(self, user_id: int, channel_id: int) -> str | None:
+        record = await self.__fetchrow("""
+            DELETE FROM conversation
+            WHERE user_id = ? AND channel_id = ?
+            RETURNING state, deadline > ?;
+        """, user_id, channel_id, time.time())
+        if not record or not record[1]:
+            return None
+        return record[0]
+
+
+    async def delete_conversation(self, user_id: int, channel_id: int) -> None:
+        await self.__execute("DELETE FROM conversation WHERE user_id = ? AND channel_id = ?;", user_id, channel_id)
+
+
+    async def clean_up_conversations(self) -> int:
+        return await self.__execute("DELETE FROM conversation WHERE deadline < ?;", time.time())
+
+
+    async def fetch_setting(self, key: str) -> str | None:
+        record = await self.__fetchrow("SELECT value FROM setting WHERE key = ?;", key)
+        return record[0] if record else None
+
+
+    async def save_setting(self, key: str, value: str) -> None:
+        await self.__execute("""
+            INSERT INTO setting(key, value)
+            VALUES(?, ?)
+            ON CONFLICT (key) DO UPDATE SET value = excluded.value;
+        """, key, value)
+
+
+    async def export_users(self) -> AsyncIterator[DBUser]:
+        async for record in self.__stream("SELECT user_id, username, discriminator, time_zone FROM users ORDER BY user_id;"):
+            yield DBUser(*record)
+
+
+    async def export_reminders(self) -> AsyncIterator[Reminder]:
+        query = "SELECT id, user_id, channel_id, date_time_zone, memo, recurrence, NULL FROM reminder rem ORDER BY date_time_zone;"
+        async for record in self.__stream(query):
+            yield self.__reminder(record)
+
+
+    async def import_users(self, users: list[DBUser]) -> int:
+        return await self.__run(self.__insert_all, "INSERT OR IGNORE INTO users(user_id, username, discriminator, time_zone) VALUES(?, ?, ?, ?);",
+                                [(user.id, user.name, user.hash, user.tz) for user in users])
+
+
+    async def import_reminders(self, reminders: list[Reminder]) -> int:
+        records = [(str(rem.rem_id), rem.user_id, rem.channel_id, rem.due_date.timestamp(), rem.memo, rem.recurrence) for rem in reminders]
+        return await self.__run(self.__insert_all, """
+            INSERT OR IGNORE INTO reminder(id, user_id, channel_id, date_time_zone, memo, recurrence)
+            VALUES(?, ?, ?, ?, ?, ?);
+        """, records)
+
+
+    # fetches the rows of a query in batches, so that the whole result is never held in memory
+    async def __stream(self, query: str, batch_size: int = 1000) -> AsyncIterator[tuple]:
+        # a dedicated cursor, so that other statements can run in between two batches
+        cursor = await self.__run(self.connection.execute, query)
+        try:
+            while rows := await self.__run(cursor.fetchmany, batch_size):
+                for row in rows:
+                    yield row
+        finally:
+            await self.__run(cursor.close)
+
+
+    # inserts all records within a single transaction and returns the number of inserted rows
+    def __insert_all(self, statement: str, records: list[tuple]) -> int:
+        self.connection.execute("BEGIN;")
+        try:
+            inserted = self.connection.executemany(statement, records).rowcount
+        except BaseException:
+            self.connection.execute("ROLLBACK;")
+            raise
+        self.connection.execute("COMMIT;")
+        return inserted
@@ -0,0 +1,3 @@
+# the exceptions have to be imported before anything that uses the quotes, just like main.py does it -
+# src.localization.quote_server and src.exceptions import each other
+import src.exceptions  # noqa: F401
@@ -0,0 +1,44 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from src.utils.conversation_router import ConversationRouter
+
+
+def message(user_id: int, channel_id: int, content: str = 'answer'):
+    return SimpleNamespace(author=SimpleNamespace(id=user_id), channel=SimpleNamespace(id=channel_id), content=content)
+
+
+async def test_answer_is_routed_to_the_waiting_conversation():
+    router = ConversationRouter()
+    listener = asyncio.create_task(router.listen(1, 2, timeout=1))
+    await asyncio.sleep(0)
+
+    assert not router.dispatch(message(1, 3))
+    assert router.dispatch(message(1, 2))
+    assert (await listener).content == 'answer'
+    assert len(router) == 0
+
+
+async def test_answer_during_preparation_is_not_lost():
+    router = ConversationRouter()
+    dispatched = []
+
+    # e.g. the database round trip that persists the conversation - the answer is faster
+    async def prepare():
+        dispatched.append(router.dispatch(message(1, 2)))
+
+    answer = await router.listen(1, 2, timeout=1, prepare=prepare())
+
+    assert dispatched == [True]
+    assert answer.content == 'answer'
+
+
+async def test_timeout_leaves_no_waiter_behind():
+    router = ConversationRouter()
+    with pytest.raises(asyncio.TimeoutError):
+        await router.listen(1, 2, timeout=0.01)
+
+    assert len(router) == 0
+    assert not router.dispatch(message(1, 2))
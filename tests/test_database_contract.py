@@ -0,0 +1,217 @@
+import os
+import random
+import uuid
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+import pytest
+
+from src.wrapper.database_wrapper import DatabaseWrapper, DBUser, Reminder
+
+
+# One contract for every storage backend: the embedded ones always run, Postgres only if DATABASE_URL points to one.
+# Use a scratch database for that - every test removes the rows it creates, but checks like the next due reminder or
+# the clean-up of expired reminders assume that nobody else has any reminders in there.
+BACKENDS = ['memory', 'sqlite'] + (['postgres'] if os.environ.get('DATABASE_URL') else [])
+
+
+@pytest.fixture(params=BACKENDS)
+async def db(request, tmp_path):
+    urls = {'memory': 'memory://', 'sqlite': f'sqlite:///{tmp_path}/contract.db', 'postgres': os.environ.get('DATABASE_URL')}
+    database = await DatabaseWrapper.connect(urls[request.param])
+    await database.migrate()
+    yield database
+    await database.close()
+
+
+# a user of its own for every test, so that tests never see each other's reminders (on a shared Postgres)
+@pytest.fixture
+async def user(db):
+    entry = DBUser(random.randint(10 ** 12, 10 ** 13), 'contract', '0001', 'Europe/Vienna')
+    await db.import_users([entry])
+    return entry
+
+
+# adds reminders that are due <offset> seconds from now and removes them again after the test
+@pytest.fixture
+async def add_reminder(db, user):
+    created: list[Reminder] = []
+
+    async def add(offset: float, channel_id: int = 1, memo: str = 'memo', recurrence: str = None) -> Reminder:
+        reminder = Reminder(uuid.uuid4(), user.id, channel_id, datetime.now(timezone.utc) + timedelta(seconds=offset), memo, recurrence)
+        await db.import_reminders([reminder])
+        created.append(reminder)
+        return reminder
+
+    yield add
+    await db.delete_reminders(created)
+
+
+def ids(reminders: list[Reminder]) -> list[str]:
+    return [str(rem.rem_id) for rem in reminders]
+
+
+def message(user: DBUser, channel_id: int = 1):
+    return SimpleNamespace(user=SimpleNamespace(id=user.id, name=user.name, discriminator=user.hash), chat=SimpleNamespace(id=channel_id))
+
+
+async def test_next_reminder(db, add_reminder):
+    assert await db.check_next_reminder() == (None, None)
+
+    await add_reminder(-60)
+    await add_reminder(300)
+    first = await add_reminder(120)
+
+    due_date, seconds = await db.check_next_reminder()
+    assert abs((due_date - first.due_date).total_seconds()) < 0.01
+    assert 119 <= seconds <= 121
+
+    upcoming = await db.fetch_next_reminder()
+    assert str(upcoming.rem_id) == str(first.rem_id)
+    # the timezone is joined in from the user
+    assert upcoming.time_zone == 'Europe/Vienna'
+
+
+async def test_fetch_reminders_filters(db, user, add_reminder):
+    await add_reminder(-60, channel_id=1)
+    later = await add_reminder(600, channel_id=1)
+    sooner = await add_reminder(300, channel_id=2)
+    elsewhere = await add_reminder(60, channel_id=3)
+
+    assert ids(await db.fetch_reminders(user=user)) == ids([elsewhere, sooner, later])
+    assert ids(await db.fetch_reminders(channels=['1', '2'], user=user)) == ids([sooner, later])
+    assert ids(await db.fetch_reminders(channels=['3'])) == ids([elsewhere])
+
+
+async def test_missed_and_upcoming_windows(db, add_reminder):
+    await add_reminder(-1000)
+    long_ago, recently = await add_reminder(-100), await add_reminder(-10)
+    soon, later = await add_reminder(10), await add_reminder(100)
+    await add_reminder(1000)
+
+    assert ids(await db.fetch_missed_reminders(500)) == ids([long_ago, recently])
+    assert ids(await db.fetch_upcoming_reminders(500)) == ids([soon, later])
+    assert ids(await db.fetch_upcoming_reminders(500, limit=1)) == ids([soon])
+
+
+async def test_advance_reminder(db, user, add_reminder):
+    missed = await add_reminder(-30, recurrence='FREQ=DAILY')
+    next_due = datetime.now(timezone.utc) + timedelta(hours=1)
+
+    await db.advance_reminder(missed, next_due)
+
+    assert await db.fetch_missed_reminders(3600) == []
+    advanced, = await db.fetch_reminders(user=user)
+    assert str(advanced.rem_id) == str(missed.rem_id)
+    assert advanced.recurrence == 'FREQ=DAILY'
+    assert abs((advanced.due_date - next_due).total_seconds()) < 0.01
+
+
+async def test_clean_up_reminders_in_batches(db, user, add_reminder):
+    for _ in range(5):
+        await add_reminder(-3 * 86400)
+    kept = await add_reminder(-86400)
+
+    assert [await db.clean_up_reminders(2) for _ in range(4)] == [2, 2, 1, 0]
+    remaining = [rem async for rem in db.export_reminders() if rem.user_id == user.id]
+    assert ids(remaining) == ids([kept])
+
+
+async def test_clean_up_keeps_recurring_reminders(db, user, add_reminder):
+    recurring = await add_reminder(-3 * 86400, recurrence='FREQ=DAILY')
+    await add_reminder(-3 * 86400)
+
+    assert await db.clean_up_reminders(10) == 1
+    remaining = [rem async for rem in db.export_reminders() if rem.user_id == user.id]
+    assert ids(remaining) == ids([recurring])
+
+
+async def test_stale_reminders(db, add_reminder):
+    stale = await add_reminder(-3 * 86400, recurrence='FREQ=DAILY')
+    await add_reminder(-3 * 86400)
+    await add_reminder(-60, recurrence='FREQ=DAILY')     # missed, but still within the grace period
+
+    assert ids(await db.fetch_stale_reminders(3600)) == ids([stale])
+
+
+async def test_delete_reminders(db, user, add_reminder):
+    first, second, third = await add_reminder(60), await add_reminder(120), await add_reminder(180)
+
+    await db.delete_reminders([first, third])
+    await db.delete_reminder(second)
+
+    assert await db.fetch_reminders(user=user) == []
+
+
+async def test_push_reminders(db, user):
+    now = datetime.now(timezone.utc)
+    await db.push_reminder(message(user), now + timedelta(hours=1), 'single')
+    await db.push_reminders(message(user, channel_id=2), [(now + timedelta(hours=2), 'first', None), (now + timedelta(hours=3), 'second', 'FREQ=WEEKLY')])
+
+    reminders = await db.fetch_reminders(user=user)
+    assert [(rem.channel_id, rem.memo, rem.recurrence) for rem in reminders] == [(1, 'single', None), (2, 'first', None), (2, 'second', 'FREQ=WEEKLY')]
+    await db.delete_reminders(reminders)
+
+
+async def test_user_entries(db):
+    discord_user = SimpleNamespace(id=random.randint(10 ** 12, 10 ** 13), name='new', discriminator='1234')
+    assert await db.fetch_user_entry(discord_user) is None
+
+    await db.create_user_entry(discord_user)
+    await db.create_user_entry(discord_user)
+    await db.update_timezone(discord_user, 'Asia/Tokyo')
+
+    entry = await db.fetch_user_entry(discord_user)
+    assert (entry.id, entry.name, entry.hash, entry.tz) == (discord_user.id, 'new', '1234', 'Asia/Tokyo')
+
+
+async def test_conversation_store(db):
+    user_id = random.randint(10 ** 12, 10 ** 13)
+    await db.save_conversation(user_id, 1, '{"step": 1}', 60)
+    await db.save_conversation(user_id, 1, '{"step": 2}', 60)
+    await db.save_conversation(user_id, 2, '{"step": 1}', -1)      # expired already
+    await db.save_conversation(user_id, 3, '{"step": 1}', 60)
+
+    keys = await db.fetch_conversation_keys()
+    assert (user_id, 1) in keys and (user_id, 3) in keys and (user_id, 2) not in keys
+
+    assert await db.pop_conversation(user_id, 1) == '{"step": 2}'
+    assert await db.pop_conversation(user_id, 1) is None
+    assert await db.clean_up_conversations() >= 1
+    assert await db.pop_conversation(user_id, 2) is None
+
+    await db.delete_conversation(user_id, 3)
+    assert await db.pop_conversation(user_id, 3) is None
+
+
+async def test_settings(db):
+    key = f'contract_{uuid.uuid4()}'
+    assert await db.fetch_setting(key) is None
+
+    await db.save_setting(key, 'first')
+    await db.save_setting(key, 'second')
+
+    assert await db.fetch_setting(key) == 'second'
+
+
+async def test_import_export_round_trip(db, user):
+    due_date = datetime.now(timezone.utc).replace(microsecond=0) + timedelta(days=1)
+    reminders = [
+        Reminder(uuid.uuid4(), user.id, 1, due_date, 'tab\tnewline\nbackslash\\ umlaut äöü', None),
+        Reminder(uuid.uuid4(), user.id, 2, due_date + timedelta(hours=1), None, 'FREQ=MONTHLY'),
+    ]
+    try:
+        assert await db.import_reminders(reminders) == 2
+        # reminders (and users) that exist already are skipped
+        assert await db.import_reminders(reminders) == 0
+        assert await db.import_users([user]) == 0
+
+        exported = [rem async for rem in db.export_reminders() if rem.user_id == user.id]
+        assert [(str(rem.rem_id), rem.channel_id, rem.memo, rem.recurrence, rem.time_zone) for rem in exported] == \
+               [(str(rem.rem_id), rem.channel_id, rem.memo, rem.recurrence, None) for rem in reminders]
+        assert [rem.due_date.timestamp() for rem in exported] == pytest.approx([rem.due_date.timestamp() for rem in reminders])
+
+        users = [entry async for entry in db.export_users() if entry.id == user.id]
+        assert users == [user]
+    finally:
+        await db.delete_reminders(reminders)
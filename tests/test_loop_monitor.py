@@ -0,0 +1,33 @@
+import asyncio
+import logging
+import threading
+import time
+
+from src.utils.loop_monitor import LoopMonitor
+
+
+async def test_stopped_monitor_reports_no_stall():
+    monitor = LoopMonitor(logging.getLogger('test'), threshold=0.05, interval=0.01)
+    task = asyncio.create_task(monitor.run())
+    await asyncio.sleep(0.05)
+
+    task.cancel()
+    await asyncio.gather(task, return_exceptions=True)
+    assert 'loop_monitor' not in [thread.name for thread in threading.enumerate()]
+
+    # e.g. the loop closing on shutdown - the sampling thread mustn't take that for a stall
+    time.sleep(0.2)
+    assert len(monitor.stalls) == 0
+
+
+async def test_delayed_start_reports_no_stall():
+    monitor = LoopMonitor(logging.getLogger('test'), threshold=0.05, interval=0.01)
+    # e.g. the login of the bot in between
+    time.sleep(0.2)
+
+    task = asyncio.create_task(monitor.run())
+    await asyncio.sleep(0.05)
+    task.cancel()
+    await asyncio.gather(task, return_exceptions=True)
+
+    assert len(monitor.stalls) == 0
@@ -0,0 +1,62 @@
+import asyncio
+
+from src.wrapper.postgres_wrapper import PostgresWrapper
+
+
+# stands in for an asyncpg pool whose COPY produces far more chunks than the queue of the export holds
+class FakePool:
+
+    def __init__(self):
+        self.acquired = 0
+        self.released = 0
+
+
+    async def acquire(self, timeout=None):
+        self.acquired += 1
+        return self
+
+
+    async def release(self, connection):
+        self.released += 1
+
+
+    async def execute(self, query: str):
+        pass
+
+
+    async def copy_from_query(self, query: str, output, format: str, timeout: float):
+        for user_id in range(1000):
+            await output(f'{user_id}\tuser\t0000\t\\N\n'.encode())
+
+
+async def test_export_stops_the_copy_if_the_consumer_stops_early():
+    pool = FakePool()
+    db = PostgresWrapper(pool)
+
+    async for user in db.export_users():
+        break
+    # an async generator that is left early is closed in the background
+    await asyncio.sleep(0.05)
+
+    assert user.id == 0
+    assert pool.acquired == pool.released == 1
+    assert [task for task in asyncio.all_tasks() if task is not asyncio.current_task()] == []
+
+
+async def test_export_stops_the_copy_if_the_consumer_is_cancelled():
+    pool = FakePool()
+    db = PostgresWrapper(pool)
+    consumed = asyncio.Event()
+
+    async def consume():
+        async for _ in db.export_users():
+            consumed.set()
+            await asyncio.sleep(10)
+
+    consumer = asyncio.create_task(consume())
+    await consumed.wait()
+    consumer.cancel()
+    await asyncio.wait_for(asyncio.gather(consumer, return_exceptions=True), timeout=1)
+    await asyncio.sleep(0.05)
+
+    assert pool.acquired == pool.released == 1
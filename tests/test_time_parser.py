@@ -0,0 +1,76 @@
+import random
+from datetime import timedelta
+
+import pytest
+
+from src.benchmarks.parse_worst_case import MESSAGE_LENGTH, adversarial_texts, fill, fuzz_texts, parse_time
+from src.exceptions.errors import Cause, InvalidArgumentsException
+from src.utils.time_handler import TimeHandler
+from src.utils.time_parser import TimeParser
+from src.utils.time_service import TimeService
+
+# ten times the bound of the benchmark, so that slow machines don't fail - the quadratic scanner took seconds for such texts
+BOUND_SECONDS = 0.05
+
+
+def parse(text: str):
+    # bypasses the cache of the parser, otherwise repeated texts wouldn't be parsed at all
+    return TimeParser.parse.__wrapped__(TimeParser, text)
+
+
+def test_length_budget_is_rejected():
+    with pytest.raises(InvalidArgumentsException) as error:
+        parse('1' * (TimeParser.max_length + 1))
+    assert error.value.cause == Cause.INPUT_TOO_LONG
+
+    # the memo doesn't count towards the budget
+    expression = parse('in 5 minuten "' + 'a' * 3000 + '"')
+    assert expression.offsets == {'minutes': 5} and len(expression.memo) == 3000
+
+
+# the entries of a bulk reminder are stripped, so a keyword may just as well start the text
+@pytest.mark.parametrize('text, offsets', [('morgen 14:00 "a"', {'days': 1}), ('übermorgen 9:00 "a"', {'days': 2}),
+                                           ('next week 10:00 "a"', {'weeks': 1}), ('um 10 übermorgen "a"', {'days': 2})])
+def test_keyword_at_the_start_of_an_entry(text, offsets):
+    assert parse(text).offsets == offsets
+
+
+def test_bulk_entry_with_keyword_resolves():
+    timestamp = TimeHandler().resolve('morgen 14:00 "a"', 'Europe/Berlin')
+    assert timestamp.date() == TimeService.now('Europe/Berlin').date() + timedelta(days=1)
+    assert (timestamp.hour, timestamp.minute) == (14, 0)
+
+
+def test_keyword_only_matches_at_the_start_of_a_word():
+    assert parse('14:00 tagesmorgen "a"').offsets == {}
+    assert parse('heute 14:00 "a"').today
+
+
+@pytest.mark.parametrize('family', adversarial_texts().keys())
+def test_worst_case_stays_within_bound(family):
+    TimeParser.parse('')    # builds the scanner
+    texts = adversarial_texts()[family]
+    for text in texts + [fill(text, MESSAGE_LENGTH) for text in texts]:
+        assert parse_time(text, repeats=1) < BOUND_SECONDS, text[:40]
+
+
+def test_fuzz_raises_only_documented_exceptions():
+    rng = random.Random(1)
+    texts = fuzz_texts(1000, seed=0) + [''.join(chr(rng.randint(1, 0x2FFF)) for _ in range(rng.randint(1, 300))) for _ in range(300)]
+    for text in texts:
+        try:
+            parse(text)
+        except InvalidArgumentsException:
+            pass
+
+
+@pytest.mark.parametrize('rule', ['FREQ=SECONDLY', 'FREQ=MINUTELY;INTERVAL=30', 'FREQ=HOURLY', 'FREQ=DAILY;BYHOUR=8,20', 'FREQ=WEEKLY;BYDAY=MO,TU;BYHOUR=1,2'])
+def test_too_frequent_recurrence_is_rejected(rule):
+    with pytest.raises(InvalidArgumentsException) as error:
+        TimeHandler.recurrence_of([f'-rrule={rule.lower()}'])
+    assert error.value.cause == Cause.INVALID_RECURRENCE
+
+
+@pytest.mark.parametrize('rule', ['FREQ=DAILY', 'FREQ=HOURLY;INTERVAL=24', 'FREQ=WEEKLY;BYDAY=MO,FR', 'FREQ=MONTHLY;BYMONTHDAY=1'])
+def test_recurrence_of_at_most_once_a_day(rule):
+    assert TimeHandler.recurrence_of([f'-rrule={rule.lower()}']) == rule
@@ -0,0 +1,42 @@
+import asyncio
+import json
+
+from src.tracing import Tracer
+
+
+def finish_span(tracer: Tracer) -> str:
+    with tracer.span('quotes'):
+        return 'done'
+
+
+async def test_spans_of_worker_threads_are_handed_to_the_loop():
+    tracer = Tracer()
+    tracer.configure(1.0, 'http://127.0.0.1:9')
+    exporter = tracer.exporter
+    exported = []
+
+    async def flush():
+        exported.extend(exporter.pending)
+        exporter.pending = []
+    exporter.flush = flush
+    exporter.interval = 0.01
+
+    with tracer.trace('root'):
+        # asyncio.to_thread copies the context, so the spans belong to the trace - but are finished off the loop
+        assert await asyncio.gather(*(asyncio.to_thread(finish_span, tracer) for _ in range(20))) == ['done'] * 20
+    await asyncio.sleep(0.1)
+
+    assert len(exported) == 21 and exporter.dropped == 0
+    assert {span.trace_id for span in exported} == {exported[-1].trace_id}
+
+
+async def test_jsonl_export_from_worker_threads(tmp_path):
+    tracer = Tracer()
+    tracer.configure(1.0, str(tmp_path / 'traces.jsonl'))
+
+    with tracer.trace('root'):
+        await asyncio.gather(*(asyncio.to_thread(finish_span, tracer) for _ in range(50)))
+    await tracer.close()
+
+    spans = [json.loads(line) for line in (tmp_path / 'traces.jsonl').read_text(encoding='utf-8').splitlines()]
+    assert sorted(span['name'] for span in spans) == ['quotes'] * 50 + ['root']